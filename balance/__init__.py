@@ -0,0 +1,47 @@
+# The core API, importable without Qt. Names are loaded on first use, so ``import balance`` only
+# costs what a script actually touches.
+from importlib import import_module
+
+# Public name -> module in balance.main providing it.
+_EXPORTS = {
+    'Account': 'base_classes',
+    'Bill': 'base_classes',
+    'Category': 'base_classes',
+    'CategoryManager': 'base_classes',
+    'Income': 'base_classes',
+    'Person': 'base_classes',
+    'PersonManager': 'base_classes',
+    'Transaction': 'base_classes',
+    'TransferIn': 'base_classes',
+    'TransferOut': 'base_classes',
+    'Ledger': 'ledger',
+    'LedgerListener': 'ledger',
+    'TransactionKind': 'ledger',
+    'Money': 'money',
+    'BalanceEngine': 'balances',
+    'Categoriser': 'categoriser',
+    'MatchType': 'categoriser',
+    'EventBus': 'events',
+    'CsvFormat': 'importer',
+    'import_statement': 'importer',
+    'import_statements': 'importer',
+    'Journal': 'journal',
+    'save': 'persistence',
+    'load': 'persistence',
+    'Projection': 'projection',
+    'project': 'projection',
+    'SqliteStorage': 'storage',
+    'Workspace': 'workspace',
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name : str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'balance' has no attribute '{name}'")
+    value = globals()[name] = getattr(import_module(f'.main.{module}', __name__), name)
+    return value
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,216 @@
+import argparse
+import csv
+import datetime
+import json
+import os
+import sys
+
+from .main.base_classes import CategoryManager, PersonManager
+from .main.ledger import TransactionKind
+from .main.money import format_minor
+
+KIND_NAMES = {
+    TransactionKind.TRANSACTION: 'transaction',
+    TransactionKind.INCOME: 'income',
+    TransactionKind.BILL: 'bill',
+    TransactionKind.TRANSFER_IN: 'transfer_in',
+    TransactionKind.TRANSFER_OUT: 'transfer_out',
+}
+
+EXPORT_COLUMNS = ('person', 'account', 'kind', 'name', 'amount', 'date', 'period', 'category')
+
+def open_data(path : str) -> tuple[PersonManager, CategoryManager]:
+    """
+    :param path: A data file written by :func:`balance.main.persistence.save`.
+    :type path: str
+    :return: The people and categories in the file, or empty managers if it does not exist.
+    :rtype: tuple[PersonManager, CategoryManager]
+    """
+    if not os.path.exists(path):
+        return PersonManager(), CategoryManager()
+    from .main.persistence import load
+    return load(path)
+
+def select_accounts(person_manager : PersonManager, person_name : str = None, account_name : str = None) -> list:
+    """
+    :param person_manager: The people.
+    :type person_manager: PersonManager
+    :param person_name: Restrict to a person, defaults to None
+    :type person_name: str, optional
+    :param account_name: Restrict to accounts with this name, defaults to None
+    :type account_name: str, optional
+    :return: (person, account) pairs.
+    :rtype: list[tuple[Person, Account]]
+    """
+    people = person_manager.get_people()
+    if person_name is not None:
+        people = [person for person in people if person.get_name() == person_name]
+    return [(person, account) for person in people for account in person.get_accounts()
+            if account_name is None or account.get_account_name() == account_name]
+
+def find_or_create_account(person_manager : PersonManager, person_name : str, account_name : str):
+    """
+    :param person_manager: The people.
+    :type person_manager: PersonManager
+    :param person_name: Name of the person, created if missing.
+    :type person_name: str
+    :param account_name: Name of the account, created if missing.
+    :type account_name: str
+    :return: The account.
+    :rtype: Account
+    """
+    person = person_manager.get_person_by_name(person_name) or person_manager.add_person_by_name(person_name)
+    return person.get_account_by_name(account_name) or person.create_account(account_name)
+
+def command_import(arguments : argparse.Namespace) -> int:
+    """Import statements into an account of a data file.
+
+    :param arguments: Parsed command line.
+    :type arguments: argparse.Namespace
+    :return: Exit status.
+    :rtype: int
+    """
+    from .main.importer import CsvFormat, import_statement, import_statements
+    from .main.persistence import save
+
+    person_manager, category_manager = open_data(arguments.data)
+    account = find_or_create_account(person_manager, arguments.person, arguments.account)
+    csv_format = CsvFormat(date_format=arguments.date_format, delimiter=arguments.delimiter)
+    if arguments.jobs > 1 and len(arguments.statements) > 1:
+        report = import_statements([(path, account) for path in arguments.statements],
+                                   max_workers=arguments.jobs, file_format=arguments.format, csv_format=csv_format)
+        print(f"{' '.join(arguments.statements)}: {report}", file=sys.stderr)
+    else:
+        for path in arguments.statements:
+            report = import_statement(path, account, arguments.format, csv_format)
+            print(f"{path}: {report}", file=sys.stderr)
+    save(arguments.data, person_manager, category_manager)
+    return 0
+
+def command_balance(arguments : argparse.Namespace) -> int:
+    """Print the total of each person and account.
+
+    :param arguments: Parsed command line.
+    :type arguments: argparse.Namespace
+    :return: Exit status.
+    :rtype: int
+    """
+    person_manager, _ = open_data(arguments.data)
+    for person in person_manager.get_people():
+        if arguments.person is not None and person.get_name() != arguments.person:
+            continue
+        print(f"{person.get_name()}\t{person.get_total():.2f}")
+        for account in person.get_accounts():
+            print(f"  {account.get_account_name()}\t{account.get_total():.2f}")
+    return 0
+
+def command_project(arguments : argparse.Namespace) -> int:
+    """Print projected month-end and lowest balances of each account.
+
+    :param arguments: Parsed command line.
+    :type arguments: argparse.Namespace
+    :return: Exit status.
+    :rtype: int
+    """
+    from .main.projection import project
+
+    person_manager, _ = open_data(arguments.data)
+    accounts = select_accounts(person_manager, arguments.person, arguments.account)
+    start = datetime.datetime.strptime(arguments.start, '%Y-%m').date() if arguments.start else None
+    opening = {account: account.get_total() for _, account in accounts} if arguments.opening_totals else None
+    projection = project(person_manager.get_ledger(), arguments.months, start, opening)
+    dates = projection.get_dates()
+    month_ends = [index for index, date in enumerate(dates)
+                  if index + 1 == len(dates) or dates[index + 1].month != date.month]
+    print("person\taccount\t" + "\t".join(dates[index].strftime('%Y-%m') for index in month_ends) + "\tlowest")
+    for person, account in accounts:
+        balances = projection.get_account_balances(account)
+        lowest_date, lowest = projection.get_lowest_balance(account)
+        print(f"{person.get_name()}\t{account.get_account_name()}\t" +
+              "\t".join(format_minor(balances[index]) for index in month_ends) +
+              f"\t{lowest:.2f} on {lowest_date.isoformat()}")
+    return 0
+
+def command_export(arguments : argparse.Namespace) -> int:
+    """Write the transactions of a data file as CSV or JSON.
+
+    :param arguments: Parsed command line.
+    :type arguments: argparse.Namespace
+    :return: Exit status.
+    :rtype: int
+    """
+    person_manager, _ = open_data(arguments.data)
+    ledger = person_manager.get_ledger()
+    rows = []
+    for person, account in select_accounts(person_manager, arguments.person):
+        for row in account.get_transaction_rows():
+            category = ledger.category_at(ledger.category_ids[row])
+            rows.append((person.get_name(), account.get_account_name(), KIND_NAMES[ledger.kinds[row]],
+                         ledger.get_name(row), format_minor(ledger.amounts[row]), ledger.get_date(row), ledger.periods[row],
+                         category.get_name() if category is not None else ''))
+
+    output = sys.stdout if arguments.output == '-' else open(arguments.output, 'w', newline='')
+    try:
+        if arguments.format == 'json':
+            json.dump([dict(zip(EXPORT_COLUMNS, row)) for row in rows], output, indent=1)
+            output.write("\n")
+        else:
+            writer = csv.writer(output)
+            writer.writerow(EXPORT_COLUMNS)
+            writer.writerows(rows)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 0
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    :return: The command line parser.
+    :rtype: argparse.ArgumentParser
+    """
+    parser = argparse.ArgumentParser(prog='balance', description="Household finances without the GUI.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('import', help="import bank statements into an account")
+    command.add_argument('data', help="data file, created if missing")
+    command.add_argument('statements', nargs='+', help="CSV or OFX statement files")
+    command.add_argument('--person', required=True, help="owner of the account, created if missing")
+    command.add_argument('--account', required=True, help="account receiving the transactions, created if missing")
+    command.add_argument('--format', choices=('csv', 'ofx'), help="statement format, defaults to the file extension")
+    command.add_argument('--date-format', default='%d/%m/%Y', help="strptime format of CSV dates")
+    command.add_argument('--delimiter', default=',', help="CSV field delimiter")
+    command.add_argument('--jobs', type=int, default=1, help="parse statements in this many processes")
+    command.set_defaults(handler=command_import)
+
+    command = commands.add_parser('balance', help="print account and person totals")
+    command.add_argument('data', help="data file")
+    command.add_argument('--person', help="only this person")
+    command.set_defaults(handler=command_balance)
+
+    command = commands.add_parser('project', help="project month-end balances of recurring transactions")
+    command.add_argument('data', help="data file")
+    command.add_argument('--months', type=int, default=12, help="number of months, defaults to 12")
+    command.add_argument('--start', help="first month as YYYY-MM, defaults to this month")
+    command.add_argument('--person', help="only this person's accounts")
+    command.add_argument('--account', help="only accounts with this name")
+    command.add_argument('--opening-totals', action='store_true',
+                         help="start from each account's current total instead of zero")
+    command.set_defaults(handler=command_project)
+
+    command = commands.add_parser('export', help="export transactions as CSV or JSON")
+    command.add_argument('data', help="data file")
+    command.add_argument('output', nargs='?', default='-', help="output file, defaults to standard output")
+    command.add_argument('--format', choices=('csv', 'json'), default='csv', help="output format")
+    command.add_argument('--person', help="only this person's accounts")
+    command.set_defaults(handler=command_export)
+    return parser
+
+def main(argv : list[str] = None) -> int:
+    """
+    :param argv: Command line arguments, defaults to sys.argv[1:]
+    :type argv: list[str], optional
+    :return: Exit status.
+    :rtype: int
+    """
+    arguments = build_parser().parse_args(argv)
+    return arguments.handler(arguments)
@@ -0,0 +1,9 @@
+import sys
+
+from PySide6 import QtWidgets
+
+from .main import MainAppWidget
+
+app = QtWidgets.QApplication([])
+widget = MainAppWidget()
+sys.exit(app.exec())
@@ -0,0 +1,160 @@
+from .ledger import Ledger, LedgerListener, KIND_SIGNS, NO_ACCOUNT, NO_CATEGORY
+from .money import Money
+
+class BalanceEngine(LedgerListener):
+    """Running totals per account, per person and per category for a ledger.
+
+    The totals are built with a single pass over the ledger when the engine is created and are
+    then kept up to date from ledger notifications, so every change costs O(1) rather than a
+    re-sum of the account history. All totals are net: incomes and transfers in are positive,
+    bills and transfers out are negative. Totals are kept as integer minor units, so they stay
+    exact however many changes are applied, and are returned as :class:`Money`.
+    """
+    def __init__(self, ledger : Ledger):
+        """Constructor.
+
+        :param ledger: The ledger to total.
+        :type ledger: Ledger
+        """
+        self.ledger = ledger
+        self.rebuild()
+        ledger.subscribe(self)
+
+    def rebuild(self):
+        """Total every live row of the ledger from scratch."""
+        self.account_totals : dict[int, int] = {}
+        self.person_totals : dict = {}
+        self.category_totals : dict[int, int] = {}
+
+        # Owner each account's total was credited to, so it can be moved on an owner change.
+        self.owners : dict[int, object] = {}
+
+        for row in self.ledger.live_rows():
+            self.apply(row, 1)
+
+    def close(self):
+        """Stop tracking the ledger."""
+        self.ledger.unsubscribe(self)
+        if self.ledger.balances is self:
+            self.ledger.balances = None
+
+    def get_account_total(self, account) -> Money:
+        """
+        :param account: The account.
+        :type account: Account
+        :return: Net total of the account.
+        :rtype: Money
+        """
+        return Money.from_minor(self.account_totals.get(account.account_id, 0), self.ledger.currency)
+
+    def get_person_total(self, person) -> Money:
+        """
+        :param person: The person.
+        :type person: Person
+        :return: Net total across every account owned by the person.
+        :rtype: Money
+        """
+        return Money.from_minor(self.person_totals.get(person, 0), self.ledger.currency)
+
+    def get_category_total(self, category) -> Money:
+        """
+        :param category: The category.
+        :type category: Category
+        :return: Net total of the transactions assigned to the category.
+        :rtype: Money
+        """
+        code = self.ledger.find_category_code(category)
+        return Money.from_minor(self.category_totals.get(code, 0), self.ledger.currency)
+
+    def signed_amount(self, row : int, amount : int = None) -> int:
+        """
+        :param row: The row number.
+        :type row: int
+        :param amount: Amount to sign instead of the stored one, defaults to None
+        :type amount: int, optional
+        :return: The amount of the row in minor units with its kind sign applied.
+        :rtype: int
+        """
+        if amount is None:
+            amount = self.ledger.amounts[row]
+        return amount * KIND_SIGNS[self.ledger.kinds[row]]
+
+    def add_to_account(self, account_id : int, value : int):
+        """
+        :param account_id: Id of the account.
+        :type account_id: int
+        :param value: Value in minor units to add to the account and its owner.
+        :type value: int
+        """
+        if account_id == NO_ACCOUNT:
+            return
+        self.account_totals[account_id] = self.account_totals.get(account_id, 0) + value
+        if account_id not in self.owners:
+            self.owners[account_id] = self.ledger.account_at(account_id).get_account_owner()
+        owner = self.owners[account_id]
+        if owner is not None:
+            self.person_totals[owner] = self.person_totals.get(owner, 0) + value
+
+    def add_to_category(self, category_id : int, value : int):
+        """
+        :param category_id: Id of the category.
+        :type category_id: int
+        :param value: Value in minor units to add to the category.
+        :type value: int
+        """
+        if category_id == NO_CATEGORY:
+            return
+        self.category_totals[category_id] = self.category_totals.get(category_id, 0) + value
+
+    def apply(self, row : int, direction : int):
+        """Add (direction 1) or subtract (direction -1) a row from every total.
+
+        :param row: The row number.
+        :type row: int
+        :param direction: 1 or -1.
+        :type direction: int
+        """
+        value = self.signed_amount(row) * direction
+        self.add_to_account(self.ledger.account_ids[row], value)
+        self.add_to_category(self.ledger.category_ids[row], value)
+
+    def row_added(self, ledger : Ledger, row : int):
+        self.apply(row, 1)
+
+    def row_released(self, ledger : Ledger, row : int):
+        self.apply(row, -1)
+
+    def row_restored(self, ledger : Ledger, row : int):
+        self.apply(row, 1)
+
+    def row_changed(self, ledger : Ledger, row : int, column : str, old_value):
+        if not ledger.alive[row]:
+            return
+        if column == 'amounts':
+            delta = self.signed_amount(row) - self.signed_amount(row, old_value)
+            self.add_to_account(ledger.account_ids[row], delta)
+            self.add_to_category(ledger.category_ids[row], delta)
+        elif column == 'account_ids':
+            value = self.signed_amount(row)
+            self.add_to_account(old_value, -value)
+            self.add_to_account(ledger.account_ids[row], value)
+        elif column == 'category_ids':
+            value = self.signed_amount(row)
+            self.add_to_category(old_value, -value)
+            self.add_to_category(ledger.category_ids[row], value)
+
+    def ledger_compacted(self, ledger : Ledger, rows):
+        self.rebuild()
+
+    def account_owner_changed(self, ledger : Ledger, account, old_owner):
+        account_id = account.account_id
+        if account_id not in self.owners:
+            return
+        total = self.account_totals.get(account_id, 0)
+        previous = self.owners[account_id]
+        if previous is not None:
+            self.person_totals[previous] = self.person_totals.get(previous, 0) - total
+        new_owner = account.get_account_owner()
+        self.owners[account_id] = new_owner
+        if new_owner is not None:
+            self.person_totals[new_owner] = self.person_totals.get(new_owner, 0) + total
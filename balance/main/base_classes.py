@@ -1,3 +1,8 @@
+from .dates import MAX_DAY, TransactionDate
+from .indexes import NameIndex
+from .ledger import Change, Ledger, TransactionKind, NO_ACCOUNT, NO_CATEGORY, RECURRING
+from .money import Money, to_minor
+
 class Account():
     def __init__(self, account_name : str, account_owner : 'Person'):
         """Constructor.
@@ -9,10 +14,42 @@ class Account():
         """
         self.account_name = account_name
         self.account_owner = account_owner
+        self.ledger = account_owner.get_ledger() if account_owner is not None else Ledger()
+        self.account_id = self.ledger.register_account(self)
         self.incomes : list['Income'] = []
-        self.transfers_in = list['TransferIn']
-        self.transfers_out = list['TransferOut']
-        self.bills = list['Bill']
+        self.transfers_in : list['TransferIn'] = []
+        self.transfers_out : list['TransferOut'] = []
+        self.bills : list['Bill'] = []
+
+    def __getattr__(self, name : str):
+        # Only reached for missing attributes, i.e. collections deferred by defer_transactions.
+        if name in TRANSACTION_COLLECTIONS and 'deferred_rows' in self.__dict__:
+            self.load_transactions()
+            return getattr(self, name)
+        raise AttributeError(f"'Account' object has no attribute '{name}'")
+
+    def defer_transactions(self, rows : range):
+        """Leave the account's transactions as ledger rows until one of its collections is accessed.
+
+        :param rows: The ledger rows belonging to the account.
+        :type rows: range
+        """
+        for collection in TRANSACTION_COLLECTIONS:
+            self.__dict__.pop(collection, None)
+        self.deferred_rows = rows
+
+    def load_transactions(self):
+        """Create the views for rows deferred by :meth:`defer_transactions`."""
+        rows = self.__dict__.pop('deferred_rows', None)
+        if rows is None:
+            return
+        for collection in TRANSACTION_COLLECTIONS:
+            setattr(self, collection, [])
+        kinds = self.ledger.kinds
+        for row in rows:
+            view_class, collection = TRANSACTION_VIEWS.get(kinds[row], (None, None))
+            if view_class is not None:
+                getattr(self, collection).append(view_class.from_row(self.ledger, row))
     
     def get_account_name(self) -> str:
         """
@@ -26,7 +63,11 @@ class Account():
         :param name: Name to set for the account.
         :type name: str
         """
+        old_name = self.account_name
         self.account_name = name
+        if self.account_owner is not None:
+            self.account_owner.update_account_name_index(self, old_name)
+        self.ledger.notify_object_changed(self, Change.CHANGED)
     
     def get_account_owner(self) -> 'Person':
         """
@@ -40,7 +81,32 @@ class Account():
         :param Person: Owner of the account to set.
         :type Person: Person
         """
+        old_owner = self.account_owner
         self.account_owner = Person
+        if Person is not None and Person.get_ledger() is not self.ledger:
+            self.set_ledger(Person.get_ledger())
+        else:
+            self.ledger.notify_account_owner_changed(self, old_owner)
+
+    def get_ledger(self) -> Ledger:
+        """
+        :return: The ledger storing the account's transactions.
+        :rtype: Ledger
+        """
+        return self.ledger
+
+    def set_ledger(self, ledger : Ledger):
+        """Move the account, and all of its transactions, into another ledger.
+
+        :param ledger: The ledger to move to.
+        :type ledger: Ledger
+        """
+        if ledger is self.ledger:
+            return
+        self.ledger = ledger
+        self.account_id = ledger.register_account(self)
+        for transaction in self.get_transactions():
+            transaction.move_to_ledger(ledger)
 
     def add_income(self, name : str, amount : float, date : str):
         """Add a new income for the account.
@@ -48,7 +114,7 @@ class Account():
         :param name: Name of the income.
         :type name: str
         :param amount: Amount to assign to the income.
-        :type amount: float
+        :type amount: float or Money
         :param date: Value (e.g. 1, 31, TBD) which the income arrives.
         :type date: str
         """
@@ -60,6 +126,7 @@ class Account():
         :type income: Income
         """
         self.incomes.remove(income)
+        income.release()
 
     def get_incomes(self):
         """
@@ -68,80 +135,443 @@ class Account():
         """
         return self.incomes
 
+    def add_bill(self, name : str, amount : float, date : str, category : 'Category' = None) -> 'Bill':
+        """Add a new bill for the account.
+
+        :param name: Name of the bill.
+        :type name: str
+        :param amount: Amount of the bill.
+        :type amount: float or Money
+        :param date: Value (e.g. 1, 31, TBD) which the bill is due.
+        :type date: str
+        :param category: Category of the bill, defaults to None
+        :type category: Category, optional
+        :return: The bill.
+        :rtype: Bill
+        """
+        with self.ledger.batch():
+            bill = Bill(name, amount, date, self, category)
+        self.bills.append(bill)
+        return bill
+
+    def remove_bill(self, bill : 'Bill'):
+        """
+        :param bill: Bill to remove from the account.
+        :type bill: Bill
+        """
+        self.bills.remove(bill)
+        bill.release()
+
+    def get_bills(self) -> list['Bill']:
+        """
+        :return: List of bills associated with the account.
+        :rtype: list[Bill]
+        """
+        return self.bills
+
+    def add_transfer(self, name : str, amount : float, date : str, target_account : 'Account',
+                     period : int = RECURRING) -> tuple['TransferOut', 'TransferIn']:
+        """Transfer money from this account to another, recording both sides.
+
+        :param name: Name of the transfer.
+        :type name: str
+        :param amount: Amount transferred.
+        :type amount: float or Money
+        :param date: Value (e.g. 1, 31, TBD) which the transfer is made.
+        :type date: str
+        :param target_account: The account receiving the funds.
+        :type target_account: Account
+        :param period: Month of a one-off transfer as YYYYMM, defaults to RECURRING
+        :type period: int, optional
+        :return: The TransferOut on this account and the TransferIn on the target account.
+        :rtype: tuple[TransferOut, TransferIn]
+        """
+        with self.ledger.batch():
+            transfer_out = TransferOut(name, amount, date, self, target_account, period)
+            transfer_in = TransferIn(name, amount, date, target_account, self, period)
+        self.transfers_out.append(transfer_out)
+        target_account.transfers_in.append(transfer_in)
+        return transfer_out, transfer_in
+
+    def remove_transfer_out(self, transfer : 'TransferOut'):
+        """
+        :param transfer: Transfer out to remove from the account.
+        :type transfer: TransferOut
+        """
+        self.transfers_out.remove(transfer)
+        transfer.release()
+
+    def remove_transfer_in(self, transfer : 'TransferIn'):
+        """
+        :param transfer: Transfer in to remove from the account.
+        :type transfer: TransferIn
+        """
+        self.transfers_in.remove(transfer)
+        transfer.release()
+
+    def get_transfers_in(self) -> list['TransferIn']:
+        """
+        :return: List of transfers into the account.
+        :rtype: list[TransferIn]
+        """
+        return self.transfers_in
+
+    def get_transfers_out(self) -> list['TransferOut']:
+        """
+        :return: List of transfers out of the account.
+        :rtype: list[TransferOut]
+        """
+        return self.transfers_out
+
+    def attach_row(self, row : int):
+        """Add a view over a ledger row to the matching collection, unless it already has one.
+
+        :param row: A ledger row of the account.
+        :type row: int
+        """
+        view_class, collection = TRANSACTION_VIEWS.get(self.ledger.kinds[row], (None, None))
+        if view_class is None:
+            return
+        views = getattr(self, collection)
+        if not any(view.get_row() == row for view in views):
+            views.append(view_class.from_row(self.ledger, row))
+
+    def detach_row(self, row : int):
+        """Remove the view over a ledger row from the account's collections, leaving the row as it is.
+
+        :param row: A ledger row of the account.
+        :type row: int
+        """
+        view_class, collection = TRANSACTION_VIEWS.get(self.ledger.kinds[row], (None, None))
+        if view_class is None:
+            return
+        views = getattr(self, collection)
+        for index, view in enumerate(views):
+            if view.get_row() == row:
+                del views[index]
+                return
+
+    def remap_rows(self, rows):
+        """Point the account's views at the rows they moved to when the ledger was compacted.
+
+        :param rows: New number of each old row, or -1 for dropped rows, from :meth:`Ledger.compact`.
+        :type rows: array
+        """
+        deferred = self.__dict__.get('deferred_rows')
+        if deferred is not None:
+            # Compacting keeps the order of live rows, so a range of them stays contiguous.
+            kept = [rows[row] for row in deferred if rows[row] >= 0]
+            self.deferred_rows = range(kept[0], kept[-1] + 1) if kept else range(0)
+            return
+        for collection in TRANSACTION_COLLECTIONS:
+            views = getattr(self, collection)
+            views[:] = [view for view in views if rows[view._row] >= 0]
+            for view in views:
+                view._row = rows[view._row]
+
+    def get_views(self, rows) -> list['Transaction']:
+        """
+        :param rows: Ledger rows of the account.
+        :type rows: Iterable[int]
+        :return: A transaction view for each row.
+        :rtype: list[Transaction]
+        """
+        kinds = self.ledger.kinds
+        return [TRANSACTION_VIEWS.get(kinds[row], (Transaction, None))[0].from_row(self.ledger, row) for row in rows]
+
+    def get_transactions_due(self, first_day : int = 1, last_day : int = MAX_DAY,
+                             kind : TransactionKind = TransactionKind.BILL) -> list['Transaction']:
+        """Find transactions due between two days of the month using the ledger's day index.
+
+        :param first_day: First day of the month, defaults to 1
+        :type first_day: int, optional
+        :param last_day: Last day of the month, defaults to MAX_DAY
+        :type last_day: int, optional
+        :param kind: Kind of transaction, defaults to bills.
+        :type kind: TransactionKind, optional
+        :return: The transactions in day order.
+        :rtype: list[Transaction]
+        """
+        return self.get_views(self.ledger.get_index().get_rows_due(self.account_id, kind, first_day, last_day))
+
+    def get_bills_due(self, first_day : int = 1, last_day : int = MAX_DAY) -> list['Bill']:
+        """
+        :param first_day: First day of the month, defaults to 1
+        :type first_day: int, optional
+        :param last_day: Last day of the month, defaults to MAX_DAY
+        :type last_day: int, optional
+        :return: Bills due between the two days inclusive, in day order.
+        :rtype: list[Bill]
+        """
+        return self.get_transactions_due(first_day, last_day, TransactionKind.BILL)
+
+    def get_bills_in_category(self, category : 'Category') -> list['Bill']:
+        """
+        :param category: The category, or None for uncategorised bills.
+        :type category: Category
+        :return: The account's bills in the category.
+        :rtype: list[Bill]
+        """
+        category_id = self.ledger.find_category_code(category) if category is not None else NO_CATEGORY
+        if category is not None and category_id == NO_CATEGORY:
+            return []
+        return self.get_views(self.ledger.get_index().get_rows_in_category(
+            category_id, self.account_id, TransactionKind.BILL))
+
+    def get_transfers_to(self, account : 'Account') -> list['TransferOut']:
+        """
+        :param account: The receiving account.
+        :type account: Account
+        :return: Transfers out of this account into the other.
+        :rtype: list[TransferOut]
+        """
+        rows = self.ledger.get_index().get_rows_with_counterparty(self.account_id, account)
+        kinds = self.ledger.kinds
+        return self.get_views([row for row in rows if kinds[row] == TransactionKind.TRANSFER_OUT])
+
+    def get_transfers_from(self, account : 'Account') -> list['TransferIn']:
+        """
+        :param account: The paying account.
+        :type account: Account
+        :return: Transfers into this account from the other.
+        :rtype: list[TransferIn]
+        """
+        rows = self.ledger.get_index().get_rows_with_counterparty(self.account_id, account)
+        kinds = self.ledger.kinds
+        return self.get_views([row for row in rows if kinds[row] == TransactionKind.TRANSFER_IN])
+
+    def add_transactions(self, records) -> list['Transaction']:
+        """Add many transactions to the account in one ledger operation.
+
+        :param records: Iterable of (kind, name, amount, date, period) tuples, where kind is
+            INCOME, BILL, TRANSFER_IN or TRANSFER_OUT, amount is in minor units (see
+            :func:`balance.main.money.to_minor`) and period is RECURRING or a YYYYMM month.
+        :type records: Iterable[tuple]
+        :return: The added transactions.
+        :rtype: list[Transaction]
+        """
+        rows = self.ledger.extend(records, self.account_id)
+        kinds = self.ledger.kinds
+        added = []
+        for row in rows:
+            view_class, collection = TRANSACTION_VIEWS[kinds[row]]
+            transaction = view_class.from_row(self.ledger, row)
+            getattr(self, collection).append(transaction)
+            added.append(transaction)
+        return added
+
+    def get_transactions(self) -> list['Transaction']:
+        """
+        :return: Every transaction associated with the account.
+        :rtype: list[Transaction]
+        """
+        return self.incomes + self.transfers_in + self.transfers_out + self.bills
+
+    def get_transaction_rows(self) -> list[int]:
+        """Ledger rows of the account's transactions, without creating views for deferred rows.
+
+        :return: The rows, sorted by due date.
+        :rtype: list[int]
+        """
+        rows = self.__dict__.get('deferred_rows')
+        if rows is None:
+            rows = [transaction.get_row() for transaction in self.get_transactions()]
+        else:
+            alive = self.ledger.alive
+            rows = [row for row in rows if alive[row]]
+        return self.ledger.sort_rows_by_date(rows)
+
+    def get_total(self) -> Money:
+        """
+        :return: Net total of the account (money in less money out).
+        :rtype: Money
+        """
+        return self.ledger.get_balances().get_account_total(self)
+
 class Transaction():
-    def __init__(self, name : str, amount : float, date : str, account : Account):
+    """A transaction stored as a row of a :class:`Ledger`.
+
+    Instances only hold a reference to the ledger and their row, the values themselves live in
+    the ledger's columns.
+    """
+    __slots__ = ('_ledger', '_row')
+
+    kind = TransactionKind.TRANSACTION
+
+    def __init__(self, name : str, amount : float, date : str, account : Account, period : int = RECURRING):
         """
         Constructor.
         :param name: Description name for the transaction.
         :type name: str
-        :param amount: Amount for the transaction.
-        :type amount: float
+        :param amount: Amount for the transaction, in major units.
+        :type amount: float or Money
         :param date: Date of the transaction (e.g. "1", "31", "Variable", "As & When")
         :type date: str
+        :param period: Month of a one-off transaction as YYYYMM, defaults to RECURRING
+        :type period: int, optional
         """
         
-        self.name = name
-        self.amount = amount
-        self.date = date
-        self.account = account
+        if account is not None:
+            self._ledger = account.get_ledger()
+            account_id = account.account_id
+        else:
+            self._ledger = Ledger()
+            account_id = NO_ACCOUNT
+        self._row = self._ledger.append(self.kind, name, to_minor(amount), date, account_id, period=period)
+
+    @classmethod
+    def from_row(cls, ledger : Ledger, row : int) -> 'Transaction':
+        """Create a view over an existing ledger row.
+
+        :param ledger: The ledger holding the row.
+        :type ledger: Ledger
+        :param row: The row number.
+        :type row: int
+        :return: The transaction view.
+        :rtype: Transaction
+        """
+        transaction = cls.__new__(cls)
+        transaction._ledger = ledger
+        transaction._row = row
+        return transaction
+
+    def get_ledger(self) -> Ledger:
+        """
+        :return: The ledger storing the transaction.
+        :rtype: Ledger
+        """
+        return self._ledger
+
+    def get_row(self) -> int:
+        """
+        :return: The ledger row of the transaction.
+        :rtype: int
+        """
+        return self._row
+
+    def __eq__(self, other) -> bool:
+        # Views are created afresh by getters, so two views are the same transaction if they share a row.
+        if not isinstance(other, Transaction):
+            return NotImplemented
+        return self._ledger is other._ledger and self._row == other._row
+
+    def __hash__(self) -> int:
+        return hash((id(self._ledger), self._row))
 
     def get_name(self) -> str:
         """
         :return: The transaction name.
         :rtype: str
         """
-        return self.name
+        return self._ledger.get_name(self._row)
     
-    def get_amount(self)->float:
+    def get_amount(self)->Money:
         """
         :return: The transaction amount. 
-        :rtype: float
+        :rtype: Money
         """
-        return self.amount
+        return Money.from_minor(self._ledger.amounts[self._row], self._ledger.currency)
     
     def get_date(self) -> str:
         """
         :return: The transaction date.
         :rtype: str
         """
-        return self.date
+        return self._ledger.get_date(self._row)
+
+    def get_period(self) -> int:
+        """
+        :return: Month of a dated transaction as YYYYMM, or RECURRING for a monthly transaction.
+        :rtype: int
+        """
+        return self._ledger.periods[self._row]
+
+    def get_parsed_date(self) -> TransactionDate:
+        """
+        :return: The parsed transaction date.
+        :rtype: TransactionDate
+        """
+        return self._ledger.get_parsed_date(self._row)
     
     def get_account(self)->Account:
         """
         :return: The account owning the transaction.
         :rtype: Account
         """
-        return self.account
+        return self._ledger.account_at(self._ledger.account_ids[self._row])
     
     def set_name(self, new_name : str):
         """
         :param new_name: Name to set.
         :type new_name: str
         """
-        self.name = new_name
+        self._ledger.set_name(self._row, new_name)
     
     def set_amount(self, new_amount : float):
         """
-        :param new_amount: The amount to set for the transaction.
-        :type new_amount: float
+        :param new_amount: The amount to set for the transaction, in major units.
+        :type new_amount: float or Money
         """
-        self.amount = new_amount
+        self._ledger.set_amount(self._row, to_minor(new_amount))
     
     def set_date(self, new_date : str):
         """
         :param new_date: The new date to set for the transaction.
-        :type new_date: str
+        :type new_date: str or TransactionDate
         """
-        self.date = new_date
+        self._ledger.set_date(self._row, new_date)
     
     def set_account(self, Account : Account):
         """
         :param Account: The new account to assign.
         :type Account: Account
         """
-        self.account = Account
+        if Account is None:
+            self._ledger.set_account(self._row, NO_ACCOUNT)
+            return
+        self.move_to_ledger(Account.get_ledger())
+        self._ledger.set_account(self._row, Account.account_id)
+
+    name = property(get_name, set_name)
+    amount = property(get_amount, set_amount)
+    date = property(get_date, set_date)
+    account = property(get_account, set_account)
+
+    def release(self):
+        """Mark the transaction as removed in the ledger."""
+        self._ledger.release(self._row)
+
+    def restore(self):
+        """Mark a removed transaction as live again."""
+        self._ledger.restore(self._row)
+
+    def move_to_ledger(self, ledger : Ledger):
+        """Copy the transaction into another ledger and release the old row.
+
+        :param ledger: The ledger to move to.
+        :type ledger: Ledger
+        """
+        old_ledger, old_row = self._ledger, self._row
+        if ledger is old_ledger:
+            return
+        account = old_ledger.account_at(old_ledger.account_ids[old_row])
+        category = old_ledger.category_at(old_ledger.category_ids[old_row])
+        account_id = account.account_id if account is not None and account.get_ledger() is ledger else NO_ACCOUNT
+        self._ledger = ledger
+        self._row = ledger.append(old_ledger.kinds[old_row], old_ledger.get_name(old_row),
+                                  old_ledger.amounts[old_row], old_ledger.get_parsed_date(old_row),
+                                  account_id, ledger.category_code(category), old_ledger.periods[old_row])
+        if old_row in old_ledger.counterparties:
+            ledger.set_counterparty(self._row, old_ledger.counterparties[old_row])
+        if not old_ledger.alive[old_row]:
+            ledger.release(self._row)
+        old_ledger.release(old_row)
 
 class Income(Transaction):
+    __slots__ = ()
+
+    kind = TransactionKind.INCOME
+
     def __init__(self, name : str, amount : float, date : str, account : Account):
         """
         Constructor.
@@ -149,8 +579,13 @@ class Income(Transaction):
         super().__init__(name = name, amount = amount, date = date, account=account)
 
 class TransferOut(Transaction):
-    def __init__(self, name : str, amount : float, date : str, account : Account, target_account : 'Account'):
-        super().__init__(name = name, amount = amount, date = date, account=account)    
+    __slots__ = ()
+
+    kind = TransactionKind.TRANSFER_OUT
+
+    def __init__(self, name : str, amount : float, date : str, account : Account, target_account : 'Account',
+                 period : int = RECURRING):
+        super().__init__(name = name, amount = amount, date = date, account=account, period=period)    
         """
         Constructor.
         :param target_account: The account receiving the funds.
@@ -158,18 +593,59 @@ class TransferOut(Transaction):
         """
         self.target_account = target_account
 
+    def get_target_account(self) -> Account:
+        """
+        :return: The account receiving the funds.
+        :rtype: Account
+        """
+        return self._ledger.counterparties.get(self._row)
+
+    def set_target_account(self, target_account : Account):
+        """
+        :param target_account: The account receiving the funds.
+        :type target_account: Account
+        """
+        self._ledger.set_counterparty(self._row, target_account)
+
+    target_account = property(get_target_account, set_target_account)
+
 class TransferIn(Transaction):
-    def __init__(self, name : str, amount : float, date : str, account : Account, transferred_by : 'Account'):
+    __slots__ = ()
+
+    kind = TransactionKind.TRANSFER_IN
+
+    def __init__(self, name : str, amount : float, date : str, account : Account, transferred_by : 'Account',
+                 period : int = RECURRING):
         """
         Constructor.
         :param transferred_by: The account from which the funds were transferred.
         :type transferred_by: Account
         """
-        super().__init__(name = name, amount = amount, date = date, account=account)  
+        super().__init__(name = name, amount = amount, date = date, account=account, period=period)  
         
         self.transferred_by = transferred_by
 
+    def get_transferred_by(self) -> Account:
+        """
+        :return: The account from which the funds were transferred.
+        :rtype: Account
+        """
+        return self._ledger.counterparties.get(self._row)
+
+    def set_transferred_by(self, transferred_by : Account):
+        """
+        :param transferred_by: The account from which the funds were transferred.
+        :type transferred_by: Account
+        """
+        self._ledger.set_counterparty(self._row, transferred_by)
+
+    transferred_by = property(get_transferred_by, set_transferred_by)
+
 class Bill(Transaction):
+    __slots__ = ()
+
+    kind = TransactionKind.BILL
+
     def __init__(self, name : str, amount : float, date : str, account : Account, category : 'Category'):
         """
         :param category: The assigned category for the transaction
@@ -184,25 +660,42 @@ class Bill(Transaction):
         :return: The category assigned to the bill.
         :rtype: Category
         """
-        return self.category
+        return self._ledger.category_at(self._ledger.category_ids[self._row])
     
     def set_category(self, new_category : 'Category'):
         """
         :param new_category: The new category to assign to the bill.
         :type new_category: Category
         """
-        self.category = new_category
+        self._ledger.set_category(self._row, self._ledger.category_code(new_category))
+
+    category = property(get_category, set_category)
+
+TRANSACTION_COLLECTIONS = ('incomes', 'transfers_in', 'transfers_out', 'bills')
+
+TRANSACTION_VIEWS = {
+    TransactionKind.INCOME: (Income, 'incomes'),
+    TransactionKind.TRANSFER_IN: (TransferIn, 'transfers_in'),
+    TransactionKind.TRANSFER_OUT: (TransferOut, 'transfers_out'),
+    TransactionKind.BILL: (Bill, 'bills'),
+}
 
 class Person():
-    def __init__(self, name : str):
+    def __init__(self, name : str, ledger : Ledger = None):
         """Constructor.
         :param name: Name of the person.
         :type name: str
+        :param ledger: Ledger storing the transactions of the person's accounts, defaults to a new ledger.
+        :type ledger: Ledger, optional
         """
 
         # Attributes 
         self.name = name
-        self.accounts : list[Account] = []
+        self.person_id : int = None
+        self.manager : 'PersonManager' = None
+        self.accounts : dict[int, Account] = {}
+        self.account_names = NameIndex()
+        self.ledger = ledger if ledger is not None else Ledger()
     
     def get_name(self)->str:
         """
@@ -210,13 +703,20 @@ class Person():
         :rtype: str
         """
         return self.name
+
+    def get_person_id(self) -> int:
+        """
+        :return: Id assigned by the managing PersonManager, or None.
+        :rtype: int
+        """
+        return self.person_id
     
     def get_accounts(self) -> list['Account']:
         """
         :return: List of accounts owned by the person.
         :rtype: list[Account]
         """
-        return self.accounts
+        return list(self.accounts.values())
     
     def get_account_names(self) -> list[str]:
         """
@@ -224,7 +724,7 @@ class Person():
         :rtype: list[str]
         """
         account_names = []
-        for account in self.accounts:
+        for account in self.accounts.values():
             account_names.append(account.get_account_name())
         return account_names
     
@@ -236,17 +736,53 @@ class Person():
         :return: Returns the account matching the query, or None.
         :rtype: Account
         """
-        for account in self.accounts:
-            if account.get_account_name() == search_name:
-                return account
-        return None
+        return self.account_names.get(search_name)
+
+    def get_account_by_id(self, account_id : int) -> Account:
+        """
+        :param account_id: The ledger id of the account to retrieve.
+        :type account_id: int
+        :return: Returns the account matching the id, or None.
+        :rtype: Account
+        """
+        return self.accounts.get(account_id)
     
     def set_name(self, new_name : str):
         """
         :param new_name: New name to set for the person.
         :type new_name: str
         """
+        old_name = self.name
         self.name = new_name
+        if self.manager is not None:
+            self.manager.update_person_name_index(self, old_name)
+        self.ledger.notify_object_changed(self, Change.CHANGED)
+
+    def get_total(self) -> Money:
+        """
+        :return: Net total across every account owned by the person.
+        :rtype: Money
+        """
+        return self.ledger.get_balances().get_person_total(self)
+
+    def get_ledger(self) -> Ledger:
+        """
+        :return: The ledger storing the transactions of the person's accounts.
+        :rtype: Ledger
+        """
+        return self.ledger
+
+    def set_ledger(self, ledger : Ledger):
+        """Move the person's accounts, and their transactions, into another ledger.
+
+        :param ledger: The ledger to move to.
+        :type ledger: Ledger
+        """
+        self.ledger = ledger
+        accounts = self.accounts.values()
+        for account in accounts:
+            account.set_ledger(ledger)
+        self.accounts = {account.account_id: account for account in accounts}
     
     def create_account(self, account_name : str) -> Account:
         """Create a new account for the person.
@@ -257,19 +793,71 @@ class Person():
         :rtype: Account
         """
         new_account = Account(account_name, self)
-        self.accounts.append(new_account)
+        self.add_account(new_account)
         return new_account
 
+    def add_account(self, account : Account):
+        """Add an existing account to the person.
+
+        :param account: The account to add.
+        :type account: Account
+        """
+        if account.get_account_owner() is not self:
+            account.set_account_owner(self)
+        self.accounts[account.account_id] = account
+        self.account_names.add(account.get_account_name(), account)
+        self.ledger.notify_object_changed(account, Change.ADDED)
+
+    def remove_account(self, account : Account):
+        """Remove an account, and its transactions, from the person.
+
+        :param account: The account to remove.
+        :type account: Account
+        """
+        if account.account_id not in self.accounts:
+            return
+        with self.ledger.batch():
+            for transaction in account.get_transactions():
+                transaction.release()
+            self.detach_account(account)
+
+    def detach_account(self, account : Account):
+        """Remove an account from the person, leaving its transactions in the ledger as they are.
+
+        :param account: The account to remove.
+        :type account: Account
+        """
+        if self.accounts.pop(account.account_id, None) is None:
+            return
+        self.account_names.remove(account.get_account_name(), account)
+        self.ledger.notify_object_changed(account, Change.REMOVED)
+
+    def update_account_name_index(self, account : Account, old_name : str):
+        """Re-index an account after it has been renamed.
+
+        :param account: The renamed account.
+        :type account: Account
+        :param old_name: The name the account had before.
+        :type old_name: str
+        """
+        if account.account_id in self.accounts:
+            self.account_names.rename(old_name, account.get_account_name(), account)
+
 class PersonManager():
-    def __init__(self, people : list[Person] = []):
+    def __init__(self, people : list[Person] = None):
        """Constructor for the Person Manager class
 
-       :param people: List of people.
-       :type people: list[Person]
+       :param people: List of people, defaults to None
+       :type people: list[Person], optional
        """
 
        # Attributes
-       self.people = people
+       self.ledger = Ledger()
+       self.people : dict[int, Person] = {}
+       self.people_names = NameIndex()
+       self.next_person_id = 0
+       for person in people or ():
+           self.add_person(person)
    
     def get_people(self)->list[Person]:
         """Get the list of managed people.
@@ -277,7 +865,32 @@ class PersonManager():
         :return: List of People.
         :rtype: list[Person]
         """
-        return self.people
+        return list(self.people.values())
+
+    def get_ledger(self) -> Ledger:
+        """
+        :return: The ledger shared by every managed person.
+        :rtype: Ledger
+        """
+        return self.ledger
+
+    def get_totals_by_account(self) -> dict[Account, Money]:
+        """
+        :return: Net total of every account in the ledger.
+        :rtype: dict[Account, Money]
+        """
+        balances = self.ledger.get_balances()
+        return {account: balances.get_account_total(account)
+                for person in self.people.values() for account in person.get_accounts()}
+
+    def get_category_total(self, category : 'Category') -> Money:
+        """
+        :param category: The category.
+        :type category: Category
+        :return: Net total of the transactions assigned to the category.
+        :rtype: Money
+        """
+        return self.ledger.get_balances().get_category_total(category)
     
     def get_person_by_name(self, person_name : str):
         """Get a person from the manager by their name
@@ -287,9 +900,16 @@ class PersonManager():
         :return: Matched person.
         :rtype: Person
         """
-        for person in self.people:
-            if person.get_name() == person_name:
-                return person
+        return self.people_names.get(person_name)
+
+    def get_person_by_id(self, person_id : int):
+        """
+        :param person_id: Id of the person to retrieve.
+        :type person_id: int
+        :return: Matched person, or None.
+        :rtype: Person
+        """
+        return self.people.get(person_id)
     
     def add_person(self, Person):
         """Add an existing person to the manager.
@@ -297,7 +917,13 @@ class PersonManager():
         :param Person: Reference to the person.
         :type Person: Person
         """
-        self.people.append(Person)
+        Person.set_ledger(self.ledger)
+        Person.person_id = self.next_person_id
+        Person.manager = self
+        self.next_person_id += 1
+        self.people[Person.person_id] = Person
+        self.people_names.add(Person.get_name(), Person)
+        self.ledger.notify_object_changed(Person, Change.ADDED)
 
     def add_person_by_name(self, person_name : str):
        """Initialise a new person using the manager by providing their name.
@@ -305,17 +931,45 @@ class PersonManager():
        :param name: Name of the person to create.
        :type name: str
        """
-       person = Person(person_name)
-       self.people.append(person)
+       person = Person(person_name, self.ledger)
+       self.add_person(person)
        return person
 
     def remove_person(self, Person):
-        """Remove a person from the manager.
+        """Remove a person, and the transactions of their accounts, from the manager.
 
         :param Person: Reference to the person. 
         :type Person: Person
         """
-        self.people.remove(Person)
+        if self.people.get(Person.person_id) is not Person:
+            raise ValueError(f"{Person.get_name()} is not managed by this PersonManager")
+        with self.ledger.batch():
+            for account in Person.get_accounts():
+                for transaction in account.get_transactions():
+                    transaction.release()
+            del self.people[Person.person_id]
+            self.people_names.remove(Person.get_name(), Person)
+            Person.manager = None
+            Person.person_id = None
+            self.ledger.notify_object_changed(Person, Change.REMOVED)
+
+    def compact(self):
+        """Reclaim the memory of removed transactions by dropping them from the ledger.
+
+        The remaining rows are renumbered, so views held by accounts are updated, while other
+        views of the ledger's rows, and the undo history of a journal, are no longer valid.
+        """
+        if self.ledger.batch_depth:
+            raise RuntimeError("Cannot compact the ledger inside a batch")
+        with self.ledger.batch():
+            rows, _ = self.ledger.compact()
+            owners = set(self.people.values())
+            for account in self.ledger.accounts:
+                account.remap_rows(rows)
+                if account.get_account_owner() is not None:
+                    owners.add(account.get_account_owner())
+            for person in owners:
+                person.accounts = {account.account_id: account for account in person.accounts.values()}
 
     def remove_person_by_name(self, person_name : str):
         """Remove a person by their name
@@ -323,10 +977,19 @@ class PersonManager():
         :param person_name: The persons name.
         :type person_name: str
         """
-        for person in self.people:
-            if person.get_name() == person_name:
-                self.people.remove(person)
-                break
+        person = self.people_names.get(person_name)
+        if person is not None:
+            self.remove_person(person)
+
+    def update_person_name_index(self, person : Person, old_name : str):
+        """Re-index a person after they have been renamed.
+
+        :param person: The renamed person.
+        :type person: Person
+        :param old_name: The name the person had before.
+        :type old_name: str
+        """
+        self.people_names.rename(old_name, person.get_name(), person)
 
 class Category():
     def __init__(self, name : str, colour : tuple):
@@ -338,6 +1001,8 @@ class Category():
         """
         self.name = name
         self.colour = colour
+        self.category_id : int = None
+        self.manager : 'CategoryManager' = None
 
     def get_name(self):
         """
@@ -358,7 +1023,11 @@ class Category():
         :param new_name: The new name for the category.
         :type new_name: str
         """
+        old_name = self.name
         self.name = new_name
+        if self.manager is not None:
+            self.manager.update_category_name_index(self, old_name)
+            self.manager.notify_category_changed(self, Change.CHANGED)
     
     def set_colour(self, new_colour):
         """
@@ -366,10 +1035,34 @@ class Category():
         :type new_colour: tuple
         """
         self.colour = new_colour
+        if self.manager is not None:
+            self.manager.notify_category_changed(self, Change.CHANGED)
 
 class CategoryManager():
     def __init__(self):
-        self.categories : list[Category] = None
+        self.categories : dict[int, Category] = {}
+        self.category_names = NameIndex()
+        self.next_category_id = 0
+        self.ledgers : list[Ledger] = []
+
+    def add_ledger(self, ledger : Ledger):
+        """Report categories added, removed, renamed or recoloured to the listeners of a ledger.
+
+        :param ledger: A ledger whose transactions use the categories.
+        :type ledger: Ledger
+        """
+        if not any(known is ledger for known in self.ledgers):
+            self.ledgers.append(ledger)
+
+    def notify_category_changed(self, category : Category, change : Change):
+        """
+        :param category: The category.
+        :type category: Category
+        :param change: What happened to the category.
+        :type change: Change
+        """
+        for ledger in self.ledgers:
+            ledger.notify_object_changed(category, change)
 
     def add_category(self, name : str, colour : tuple):
         """
@@ -379,8 +1072,17 @@ class CategoryManager():
         :type name: str
         :param colour: Colour to assign to the category.
         :type colour: tuple
+        :return: The created category.
+        :rtype: Category
         """
-        self.categories.append(Category(name, colour))
+        category = Category(name, colour)
+        category.category_id = self.next_category_id
+        category.manager = self
+        self.next_category_id += 1
+        self.categories[category.category_id] = category
+        self.category_names.add(name, category)
+        self.notify_category_changed(category, Change.ADDED)
+        return category
     
     def remove_category(self, category : Category):
         """
@@ -389,12 +1091,45 @@ class CategoryManager():
         :param category: Category to remove.
         :type category: Category.
         """
-        self.categories.remove(category)
+        if self.categories.get(category.category_id) is not category:
+            raise ValueError(f"{category.get_name()} is not managed by this CategoryManager")
+        del self.categories[category.category_id]
+        self.category_names.remove(category.get_name(), category)
+        category.manager = None
+        category.category_id = None
+        self.notify_category_changed(category, Change.REMOVED)
 
     def get_categories(self) -> list[Category]:
         """
         :return: List of categories owned by the manager.
         :rtype: list[Category]
         """
-        return self.categories
+        return list(self.categories.values())
 
+    def get_category_by_name(self, name : str) -> Category:
+        """
+        :param name: Name of the category to retrieve.
+        :type name: str
+        :return: Matched category, or None.
+        :rtype: Category
+        """
+        return self.category_names.get(name)
+
+    def get_category_by_id(self, category_id : int) -> Category:
+        """
+        :param category_id: Id of the category to retrieve.
+        :type category_id: int
+        :return: Matched category, or None.
+        :rtype: Category
+        """
+        return self.categories.get(category_id)
+
+    def update_category_name_index(self, category : Category, old_name : str):
+        """Re-index a category after it has been renamed.
+
+        :param category: The renamed category.
+        :type category: Category
+        :param old_name: The name the category had before.
+        :type old_name: str
+        """
+        self.category_names.rename(old_name, category.get_name(), category)
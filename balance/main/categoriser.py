@@ -0,0 +1,284 @@
+import re
+from collections import deque
+from enum import Enum
+
+from .ledger import Ledger, TransactionKind, NO_CATEGORY
+
+class MatchType(Enum):
+    """How a rule pattern is matched against a transaction name. Matching ignores case."""
+    SUBSTRING = 'substring'
+    REGEX = 'regex'
+    PAYEE = 'payee'
+
+# Flags of a pattern without inline global flags such as (?x), which cannot be combined with others.
+DEFAULT_FLAGS = re.compile('').flags
+
+def wrap_expression(pattern : str, priority : int) -> str:
+    """
+    :param pattern: A regular expression rule pattern.
+    :type pattern: str
+    :param priority: Position of the rule.
+    :type priority: int
+    :return: The pattern as an optional lookahead from the start of a name, capturing as "rule<priority>".
+    :rtype: str
+    """
+    return f"(?=.*?(?P<rule{priority}>{pattern}))?"
+
+def is_combinable(pattern : str) -> bool:
+    """Whether a regular expression can be joined with others into one expression.
+
+    Patterns with capturing groups (whose numbers, and so backreferences, would shift) or inline
+    global flags (which would apply to every rule) must be matched on their own.
+
+    :param pattern: A valid regular expression.
+    :type pattern: str
+    :return: True if the pattern can be combined.
+    :rtype: bool
+    """
+    expression = re.compile(pattern)
+    if expression.groups or expression.flags != DEFAULT_FLAGS:
+        return False
+    try:
+        re.compile(wrap_expression(pattern, 0))
+    except re.error:
+        return False
+    return True
+
+class Rule():
+    def __init__(self, pattern : str, category, match_type : MatchType = MatchType.SUBSTRING):
+        """
+        :param pattern: Text to match.
+        :type pattern: str
+        :param category: Category assigned to matching transactions.
+        :type category: Category
+        :param match_type: How the pattern is matched, defaults to MatchType.SUBSTRING
+        :type match_type: MatchType, optional
+        """
+        self.pattern = pattern
+        self.category = category
+        self.match_type = match_type
+
+def normalise_payee(name : str) -> str:
+    """
+    :param name: A payee or transaction name.
+    :type name: str
+    :return: The name lower-cased with runs of whitespace collapsed.
+    :rtype: str
+    """
+    return ' '.join(name.lower().split())
+
+class SubstringAutomaton():
+    """Aho-Corasick automaton finding the best rule among many substrings in one pass over a name."""
+    def __init__(self, patterns : list[tuple[str, int]]):
+        """Constructor.
+
+        :param patterns: (substring, priority) pairs. Lower priorities win.
+        :type patterns: list[tuple[str, int]]
+        """
+        self.goto : list[dict[str, int]] = [{}]
+        self.fail : list[int] = [0]
+        self.best : list[int] = [None]
+
+        for pattern, priority in patterns:
+            state = 0
+            for character in pattern.lower():
+                next_state = self.goto[state].get(character)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][character] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.best.append(None)
+                state = next_state
+            if self.best[state] is None or priority < self.best[state]:
+                self.best[state] = priority
+
+        # Breadth first, so each state's fail target is final before its children are visited.
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for character, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and character not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(character, 0)
+                self.fail[child] = target if target != child else 0
+                inherited = self.best[self.fail[child]]
+                if inherited is not None and (self.best[child] is None or inherited < self.best[child]):
+                    self.best[child] = inherited
+
+        # Fold the fail links into a full transition table so searching never backtracks.
+        self.transitions : list[dict[str, int]] = [dict(self.goto[0])] + [None] * (len(self.goto) - 1)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            transitions = dict(self.transitions[self.fail[state]])
+            transitions.update(self.goto[state])
+            self.transitions[state] = transitions
+            queue.extend(self.goto[state].values())
+
+    def search(self, text : str) -> int:
+        """
+        :param text: Lower-cased text to search.
+        :type text: str
+        :return: The lowest priority of any pattern found in the text, or None.
+        :rtype: int
+        """
+        transitions, best = self.transitions, self.best
+        state = 0
+        found = None
+        for character in text:
+            state = transitions[state].get(character, 0)
+            priority = best[state]
+            if priority is not None and (found is None or priority < found):
+                found = priority
+        return found
+
+class Categoriser():
+    """Assigns categories to transactions from user-defined rules.
+
+    Rules are compiled into one Aho-Corasick automaton for substrings, one combined regular
+    expression and one payee lookup table, so each name is matched once whatever the number of
+    rules. Regular expressions with capturing groups or inline global flags cannot share the
+    combined expression and are matched one by one instead. When several rules match, the one added
+    first wins. Results are cached per distinct name, which ledgers store once each.
+    """
+    def __init__(self, rules : list[Rule] = None):
+        """Constructor.
+
+        :param rules: Initial rules, defaults to None
+        :type rules: list[Rule], optional
+        """
+        self.rules : list[Rule] = []
+        self.automaton : SubstringAutomaton = None
+        self.expression : re.Pattern = None
+        self.separate : list[tuple[int, re.Pattern]] = []
+        self.payees : dict[str, int] = {}
+        self.cache : dict[str, object] = {}
+        for rule in rules or ():
+            self.add_rule(rule.pattern, rule.category, rule.match_type)
+
+    def add_rule(self, pattern : str, category, match_type : MatchType = MatchType.SUBSTRING) -> Rule:
+        """
+        :param pattern: Text to match.
+        :type pattern: str
+        :param category: Category assigned to matching transactions.
+        :type category: Category
+        :param match_type: How the pattern is matched, defaults to MatchType.SUBSTRING
+        :type match_type: MatchType, optional
+        :return: The added rule.
+        :rtype: Rule
+        :raises re.error: If a regular expression pattern is invalid.
+        """
+        if match_type == MatchType.REGEX:
+            is_combinable(pattern)
+        rule = Rule(pattern, category, match_type)
+        self.rules.append(rule)
+        self.automaton = None
+        return rule
+
+    def remove_rule(self, rule : Rule):
+        """
+        :param rule: The rule to remove.
+        :type rule: Rule
+        """
+        self.rules.remove(rule)
+        self.automaton = None
+
+    def compile(self):
+        """Build the matchers. Called automatically after the rules change."""
+        substrings = []
+        expressions = []
+        self.separate = []
+        self.payees = {}
+        for priority, rule in enumerate(self.rules):
+            if rule.match_type == MatchType.SUBSTRING:
+                substrings.append((rule.pattern, priority))
+            elif rule.match_type == MatchType.REGEX and is_combinable(rule.pattern):
+                # Each rule is an optional lookahead from the start of the name, so a single match
+                # reports every rule that applies through its group.
+                expressions.append(wrap_expression(rule.pattern, priority))
+            elif rule.match_type == MatchType.REGEX:
+                self.separate.append((priority, re.compile(rule.pattern, re.IGNORECASE | re.DOTALL)))
+            else:
+                self.payees.setdefault(normalise_payee(rule.pattern), priority)
+        self.automaton = SubstringAutomaton(substrings)
+        self.expression = re.compile(''.join(expressions), re.IGNORECASE | re.DOTALL) if expressions else None
+        self.cache = {}
+
+    def match(self, name : str) -> Rule:
+        """
+        :param name: A transaction name.
+        :type name: str
+        :return: The winning rule, or None.
+        :rtype: Rule
+        """
+        if self.automaton is None:
+            self.compile()
+        candidates = []
+        found = self.automaton.search(name.lower())
+        if found is not None:
+            candidates.append(found)
+        if self.payees:
+            found = self.payees.get(normalise_payee(name))
+            if found is not None:
+                candidates.append(found)
+        if self.expression is not None:
+            groups = self.expression.match(name).groupdict()
+            candidates.extend(int(group[4:]) for group, value in groups.items() if value is not None)
+        for priority, expression in self.separate:
+            if expression.search(name):
+                candidates.append(priority)
+                break
+        return self.rules[min(candidates)] if candidates else None
+
+    def categorise(self, name : str):
+        """
+        :param name: A transaction name.
+        :type name: str
+        :return: The category of the winning rule, or None.
+        :rtype: Category
+        """
+        if self.automaton is None:
+            self.compile()
+        if name not in self.cache:
+            rule = self.match(name)
+            self.cache[name] = rule.category if rule is not None else None
+        return self.cache[name]
+
+    def categorise_ledger(self, ledger : Ledger, rows = None, kinds = (TransactionKind.BILL,),
+                          overwrite : bool = False) -> int:
+        """Assign categories to ledger rows.
+
+        :param ledger: The ledger.
+        :type ledger: Ledger
+        :param rows: Rows to categorise, defaults to every live row.
+        :type rows: Iterable[int], optional
+        :param kinds: Kinds of transaction to categorise, defaults to bills only.
+        :type kinds: tuple[TransactionKind], optional
+        :param overwrite: Replace categories already assigned, defaults to False
+        :type overwrite: bool, optional
+        :return: Number of rows assigned a category.
+        :rtype: int
+        """
+        if self.automaton is None:
+            self.compile()
+        kinds = set(kinds)
+        codes_by_name : dict[int, int] = {}
+        assigned = 0
+        # One batch, so listeners see a single change set rather than one per row.
+        with ledger.batch():
+            for row in (ledger.live_rows() if rows is None else rows):
+                if ledger.kinds[row] not in kinds:
+                    continue
+                if not overwrite and ledger.category_ids[row] != NO_CATEGORY:
+                    continue
+                name_id = ledger.name_ids[row]
+                code = codes_by_name.get(name_id)
+                if code is None:
+                    code = codes_by_name[name_id] = ledger.category_code(self.categorise(ledger.strings[name_id]))
+                if code != NO_CATEGORY and code != ledger.category_ids[row]:
+                    ledger.set_category(row, code)
+                    assigned += 1
+        return assigned
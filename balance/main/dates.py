@@ -0,0 +1,106 @@
+from enum import IntEnum
+from functools import lru_cache
+
+MAX_DAY = 31
+
+class Schedule(IntEnum):
+    """When a transaction falls due. Values also give the sort order after fixed days."""
+    DAY = 0
+    VARIABLE = 1
+    AS_AND_WHEN = 2
+    TBD = 3
+    OTHER = 4
+
+SCHEDULE_NAMES = {
+    'variable': Schedule.VARIABLE,
+    'as & when': Schedule.AS_AND_WHEN,
+    'as and when': Schedule.AS_AND_WHEN,
+    'as&when': Schedule.AS_AND_WHEN,
+    'tbd': Schedule.TBD,
+    'tbc': Schedule.TBD,
+    '': Schedule.TBD,
+}
+
+ORDINAL_SUFFIXES = ('st', 'nd', 'rd', 'th')
+
+class TransactionDate():
+    """A parsed transaction date: a day of the month, or a schedule without a fixed day.
+
+    Instances are immutable and cached by :func:`parse_date`, so transactions due on the same date
+    usually share one object and comparisons never touch the original text.
+    """
+    __slots__ = ('day', 'schedule', 'text', 'sort_key')
+
+    def __init__(self, day : int, schedule : Schedule, text : str):
+        """Constructor.
+
+        :param day: Day of the month (1-31), or 0 when the schedule is not Schedule.DAY.
+        :type day: int
+        :param schedule: The schedule.
+        :type schedule: Schedule
+        :param text: The text the date was parsed from.
+        :type text: str
+        """
+        self.day = day
+        self.schedule = schedule
+        self.text = text
+        self.sort_key = schedule * (MAX_DAY + 1) + day
+
+    def __repr__(self) -> str:
+        return f"TransactionDate({self.text!r})"
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, TransactionDate):
+            return NotImplemented
+        return self.sort_key == other.sort_key and self.text == other.text
+
+    def __lt__(self, other : 'TransactionDate') -> bool:
+        return self.sort_key < other.sort_key
+
+    def __hash__(self) -> int:
+        return hash((self.sort_key, self.text))
+
+    def is_fixed_day(self) -> bool:
+        """
+        :return: True if the date is a fixed day of the month.
+        :rtype: bool
+        """
+        return self.schedule == Schedule.DAY
+
+# Distinct date texts kept parsed. Ledgers use a few dozen, so this only bounds unusual input.
+PARSE_CACHE_SIZE = 4096
+
+def parse_date(text) -> TransactionDate:
+    """Parse a transaction date, returning a shared instance for recently parsed text.
+
+    :param text: Date of the transaction (e.g. "1", "31st", "Variable", "As & When"), or an
+        already parsed date.
+    :type text: str or TransactionDate
+    :return: The parsed date.
+    :rtype: TransactionDate
+    :raises TypeError: If text is neither a string nor a TransactionDate.
+    """
+    if isinstance(text, TransactionDate):
+        return text
+    if not isinstance(text, str):
+        raise TypeError(f"A transaction date must be a string, not {type(text).__name__}")
+    return parse_date_text(text)
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_date_text(text : str) -> TransactionDate:
+    """
+    :param text: Date of the transaction.
+    :type text: str
+    :return: The parsed date.
+    :rtype: TransactionDate
+    """
+    normalised = text.strip().lower()
+    digits = normalised
+    if digits.endswith(ORDINAL_SUFFIXES):
+        digits = digits[:-2]
+    if digits.isdigit() and 1 <= int(digits) <= MAX_DAY:
+        return TransactionDate(int(digits), Schedule.DAY, text)
+    return TransactionDate(0, SCHEDULE_NAMES.get(normalised, Schedule.OTHER), text)
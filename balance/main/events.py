@@ -0,0 +1,210 @@
+from types import MethodType
+from weakref import WeakMethod
+
+from .ledger import Change, Ledger, LedgerListener
+
+# Rows a ChangeSet lists one by one before it only records that rows changed.
+ROW_LIMIT = 10000
+
+class ChangeSet():
+    """Changes collected between two notifications of an :class:`EventBus`.
+
+    Changes to the same object or row are coalesced: an object added and then removed before the
+    set is delivered does not appear at all, and a row changed several times is listed once. Once
+    more than ``ROW_LIMIT`` rows are listed the row sets are emptied and :attr:`reset` is set
+    instead, so memory stays bounded however large a batch is; subscribers should then re-read
+    whatever they show. Accounts and columns touched are still recorded.
+    """
+    def __init__(self):
+        """Constructor."""
+        self.added : set = set()
+        self.removed : set = set()
+        self.changed : set = set()
+        self.rows_added : set[int] = set()
+        self.rows_removed : set[int] = set()
+        self.rows_changed : set[int] = set()
+        self.account_ids : set[int] = set()
+        self.columns : set[str] = set()
+        self.reset = False
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed or self.reset or
+                    self.rows_added or self.rows_removed or self.rows_changed)
+
+    def __repr__(self) -> str:
+        rows = "reset" if self.reset else \
+            f"+{len(self.rows_added)}/-{len(self.rows_removed)}/~{len(self.rows_changed)}"
+        return f"ChangeSet(objects=+{len(self.added)}/-{len(self.removed)}/~{len(self.changed)}, rows={rows})"
+
+    def record_object(self, item, change : Change):
+        """
+        :param item: The person, account or category.
+        :type item: object
+        :param change: What happened to the object.
+        :type change: Change
+        """
+        if change == Change.ADDED:
+            if item in self.removed:
+                self.removed.discard(item)
+                self.changed.add(item)
+            else:
+                self.added.add(item)
+        elif change == Change.REMOVED:
+            self.changed.discard(item)
+            if item in self.added:
+                self.added.discard(item)
+            else:
+                self.removed.add(item)
+        elif item not in self.added:
+            self.changed.add(item)
+
+    def record_row(self, row : int, change : Change):
+        """
+        :param row: The ledger row.
+        :type row: int
+        :param change: What happened to the row.
+        :type change: Change
+        """
+        if self.reset:
+            return
+        if change == Change.ADDED:
+            if row in self.rows_removed:
+                self.rows_removed.discard(row)
+                self.rows_changed.add(row)
+            else:
+                self.rows_added.add(row)
+        elif change == Change.REMOVED:
+            self.rows_changed.discard(row)
+            if row in self.rows_added:
+                self.rows_added.discard(row)
+            else:
+                self.rows_removed.add(row)
+        elif row not in self.rows_added:
+            self.rows_changed.add(row)
+        if len(self.rows_added) + len(self.rows_removed) + len(self.rows_changed) > ROW_LIMIT:
+            self.mark_reset()
+
+    def mark_reset(self):
+        """Stop listing rows one by one; subscribers should re-read every row they show."""
+        self.rows_added = set()
+        self.rows_removed = set()
+        self.rows_changed = set()
+        self.reset = True
+
+    def get_rows(self) -> set[int]:
+        """
+        :return: Every row added, removed or changed, empty if :attr:`reset` is set.
+        :rtype: set[int]
+        """
+        return self.rows_added | self.rows_removed | self.rows_changed
+
+class EventBus(LedgerListener):
+    """Delivers coalesced change sets for a ledger and the people, accounts and categories using it.
+
+    Changes are collected into a :class:`ChangeSet` and handed to subscribers when the outermost
+    :meth:`Ledger.batch` block finishes, or straight away when no batch is open. Bulk operations
+    such as :meth:`Ledger.extend` and statement imports run inside a batch, so they produce one
+    notification however many rows they add.
+
+    Bound methods are held weakly, so a subscribed widget or model can be deleted without
+    unsubscribing first.
+    """
+    def __init__(self, ledger : Ledger):
+        """Constructor.
+
+        :param ledger: The ledger to watch.
+        :type ledger: Ledger
+        """
+        self.ledger = ledger
+        self.subscribers : list = []
+        self.pending = ChangeSet()
+        ledger.subscribe(self)
+
+    def close(self):
+        """Stop watching the ledger."""
+        self.ledger.unsubscribe(self)
+        if self.ledger.events is self:
+            self.ledger.events = None
+
+    def subscribe(self, callback):
+        """
+        :param callback: Called with each :class:`ChangeSet`.
+        :type callback: Callable[[ChangeSet], None]
+        """
+        reference = WeakMethod(callback) if isinstance(callback, MethodType) else (lambda: callback)
+        self.subscribers.append(reference)
+
+    def unsubscribe(self, callback):
+        """
+        :param callback: A callback passed to :meth:`subscribe`.
+        :type callback: Callable[[ChangeSet], None]
+        """
+        self.subscribers = [reference for reference in self.subscribers
+                            if reference() is not None and reference() != callback]
+
+    def batch(self):
+        """
+        :return: A context manager grouping changes into one notification (see :meth:`Ledger.batch`).
+        :rtype: ContextManager
+        """
+        return self.ledger.batch()
+
+    def flush(self):
+        """Deliver the pending changes, if any."""
+        if not self.pending:
+            return
+        changes, self.pending = self.pending, ChangeSet()
+        live = []
+        for reference in self.subscribers:
+            callback = reference()
+            if callback is not None:
+                live.append(reference)
+                callback(changes)
+        self.subscribers = live
+
+    def record_row(self, row : int, change : Change, column : str = None):
+        """
+        :param row: The ledger row.
+        :type row: int
+        :param change: What happened to the row.
+        :type change: Change
+        :param column: Name of the changed column, defaults to None
+        :type column: str, optional
+        """
+        self.pending.record_row(row, change)
+        self.pending.account_ids.add(self.ledger.account_ids[row])
+        if column is not None:
+            self.pending.columns.add(column)
+        if self.ledger.batch_depth == 0:
+            self.flush()
+
+    def row_added(self, ledger : Ledger, row : int):
+        self.record_row(row, Change.ADDED)
+
+    def row_released(self, ledger : Ledger, row : int):
+        self.record_row(row, Change.REMOVED)
+
+    def row_restored(self, ledger : Ledger, row : int):
+        self.record_row(row, Change.ADDED)
+
+    def row_changed(self, ledger : Ledger, row : int, column : str, old_value):
+        if column == 'account_ids':
+            self.pending.account_ids.add(old_value)
+        self.record_row(row, Change.CHANGED, column)
+
+    def ledger_compacted(self, ledger : Ledger, rows):
+        self.pending.mark_reset()
+        self.pending.account_ids.update(range(len(ledger.accounts)))
+        if ledger.batch_depth == 0:
+            self.flush()
+
+    def account_owner_changed(self, ledger : Ledger, account, old_owner):
+        self.object_changed(ledger, account, Change.CHANGED)
+
+    def object_changed(self, ledger : Ledger, item, change : Change):
+        self.pending.record_object(item, change)
+        if ledger.batch_depth == 0:
+            self.flush()
+
+    def batch_finished(self, ledger : Ledger):
+        self.flush()
@@ -0,0 +1,420 @@
+import csv
+import datetime
+import re
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import NamedTuple
+
+from .ledger import TransactionKind
+from .money import to_minor
+
+CHUNK_SIZE = 10000
+
+class StatementRow(NamedTuple):
+    """One line of a bank statement. Money out has a negative amount, in minor units."""
+    date : datetime.date
+    name : str
+    amount : int
+    transaction_type : str = ''
+
+class ImportReport():
+    """Counts and timing for an import."""
+    def __init__(self):
+        """Constructor."""
+        self.rows = 0
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+
+    def update(self, rows : int):
+        """
+        :param rows: Number of rows imported since the last update.
+        :type rows: int
+        """
+        self.rows += rows
+        self.seconds = time.perf_counter() - self.started
+
+    def get_rows_per_second(self) -> float:
+        """
+        :return: Import throughput.
+        :rtype: float
+        """
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __repr__(self) -> str:
+        return (f"ImportReport(rows={self.rows}, seconds={self.seconds:.3f}, "
+                f"rows_per_second={self.get_rows_per_second():.0f})")
+
+class CsvFormat():
+    """Column layout of a bank's CSV export."""
+    def __init__(self, date_column : str = 'Date', name_column : str = 'Description',
+                 amount_column : str = 'Amount', debit_column : str = None, credit_column : str = None,
+                 type_column : str = None, date_format : str = '%d/%m/%Y', delimiter : str = ','):
+        """Constructor.
+
+        :param date_column: Header of the date column, defaults to 'Date'
+        :type date_column: str, optional
+        :param name_column: Header of the description column, defaults to 'Description'
+        :type name_column: str, optional
+        :param amount_column: Header of the signed amount column, defaults to 'Amount'
+        :type amount_column: str, optional
+        :param debit_column: Header of a money out column, used instead of amount_column, defaults to None
+        :type debit_column: str, optional
+        :param credit_column: Header of a money in column, used instead of amount_column, defaults to None
+        :type credit_column: str, optional
+        :param type_column: Header of a transaction type column (e.g. "TFR"), defaults to None
+        :type type_column: str, optional
+        :param date_format: strptime format of the dates, defaults to '%d/%m/%Y'
+        :type date_format: str, optional
+        :param delimiter: Field delimiter, defaults to ','
+        :type delimiter: str, optional
+        """
+        self.date_column = date_column
+        self.name_column = name_column
+        self.amount_column = amount_column
+        self.debit_column = debit_column
+        self.credit_column = credit_column
+        self.type_column = type_column
+        self.date_format = date_format
+        self.delimiter = delimiter
+
+TRANSFER_TYPES = {'XFER', 'TFR', 'TRANSFER', 'FT', 'SO', 'STO'}
+
+AMOUNT_NOISE = re.compile(r'[^\d.\-()]')
+
+def parse_amount(text : str) -> int:
+    """
+    :param text: An amount such as "-12.50", "£1,200.00" or "(3.99)".
+    :type text: str
+    :return: The amount in minor units, negative for text in brackets. Empty text is zero.
+    :rtype: int
+    """
+    text = AMOUNT_NOISE.sub('', text)
+    if not text:
+        return 0
+    if text.startswith('(') and text.endswith(')'):
+        return -to_minor(text[1:-1])
+    return to_minor(text)
+
+def open_text(source, encoding : str):
+    """
+    :param source: A path or an open text file.
+    :type source: str or TextIO
+    :param encoding: Encoding used when opening a path.
+    :type encoding: str
+    :return: A text file.
+    :rtype: TextIO
+    """
+    if isinstance(source, (str, bytes)) or hasattr(source, '__fspath__'):
+        return open(source, newline='', encoding=encoding, errors='replace')
+    return source
+
+def read_csv(source, csv_format : CsvFormat = None):
+    """Stream the rows of a CSV statement.
+
+    :param source: A path or an open text file.
+    :type source: str or TextIO
+    :param csv_format: Column layout, defaults to CsvFormat()
+    :type csv_format: CsvFormat, optional
+    :return: Generator of statement rows.
+    :rtype: Iterator[StatementRow]
+    """
+    csv_format = csv_format or CsvFormat()
+    file = open_text(source, 'utf-8-sig')
+    try:
+        reader = csv.reader(file, delimiter=csv_format.delimiter)
+        header = [column.strip() for column in next(reader, [])]
+
+        def column(name):
+            return header.index(name) if name in header else None
+
+        date_column = column(csv_format.date_column)
+        name_column = column(csv_format.name_column)
+        amount_column = column(csv_format.amount_column)
+        debit_column = column(csv_format.debit_column)
+        credit_column = column(csv_format.credit_column)
+        type_column = column(csv_format.type_column)
+        if date_column is None:
+            raise ValueError(f"Statement has no '{csv_format.date_column}' column")
+
+        def field(record, index):
+            return record[index].strip() if index is not None and index < len(record) else ''
+
+        # Statements repeat the same few thousand dates, so parse each once.
+        dates : dict[str, datetime.date] = {}
+        for record in reader:
+            date_text = field(record, date_column)
+            if not date_text:
+                continue
+            date = dates.get(date_text)
+            if date is None:
+                date = dates[date_text] = datetime.datetime.strptime(date_text, csv_format.date_format).date()
+            if debit_column is not None or credit_column is not None:
+                amount = parse_amount(field(record, credit_column)) - abs(parse_amount(field(record, debit_column)))
+            else:
+                amount = parse_amount(field(record, amount_column))
+            yield StatementRow(date, field(record, name_column), amount, field(record, type_column))
+    finally:
+        if file is not source:
+            file.close()
+
+OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+
+def read_ofx_tags(file, block_size : int = 1 << 16):
+    """Stream the (closing, tag, value) tokens of an OFX (SGML or XML) document.
+
+    :param file: An open text file.
+    :type file: TextIO
+    :param block_size: Characters read at a time, defaults to 65536
+    :type block_size: int, optional
+    :return: Generator of tokens.
+    :rtype: Iterator[tuple[bool, str, str]]
+    """
+    pending = ''
+    while True:
+        block = file.read(block_size)
+        pending += block
+        # Keep the last, possibly incomplete, tag for the next block.
+        cut = pending.rfind('<') if block else len(pending)
+        for match in OFX_TAG.finditer(pending, 0, cut):
+            yield match.group(1) == '/', match.group(2).upper(), match.group(3).strip()
+        pending = pending[cut:]
+        if not block:
+            return
+
+def read_ofx(source):
+    """Stream the transactions of an OFX statement.
+
+    :param source: A path or an open text file.
+    :type source: str or TextIO
+    :return: Generator of statement rows.
+    :rtype: Iterator[StatementRow]
+    """
+    file = open_text(source, 'latin-1')
+    try:
+        fields = None
+        for closing, tag, value in read_ofx_tags(file):
+            if tag == 'STMTTRN':
+                if not closing:
+                    fields = {}
+                elif fields is not None:
+                    posted = fields.get('DTPOSTED', '')[:8]
+                    if len(posted) == 8 and posted.isdigit():
+                        yield StatementRow(datetime.date(int(posted[:4]), int(posted[4:6]), int(posted[6:8])),
+                                           fields.get('NAME') or fields.get('PAYEE') or fields.get('MEMO', ''),
+                                           parse_amount(fields.get('TRNAMT', '')), fields.get('TRNTYPE', ''))
+                    fields = None
+            elif fields is not None and not closing and value:
+                fields[tag] = value
+    finally:
+        if file is not source:
+            file.close()
+
+def to_records(rows):
+    """Map statement rows to ledger records.
+
+    Money in becomes an income and money out a bill, or a transfer when the statement marks the row
+    as one. Amounts are stored unsigned in minor units, the kind carries the direction.
+
+    :param rows: Statement rows.
+    :type rows: Iterable[StatementRow]
+    :return: Generator of (kind, name, amount, date, period) records for Account.add_transactions.
+    :rtype: Iterator[tuple]
+    """
+    for row in rows:
+        transfer = row.transaction_type.upper() in TRANSFER_TYPES
+        if row.amount < 0:
+            kind = TransactionKind.TRANSFER_OUT if transfer else TransactionKind.BILL
+        else:
+            kind = TransactionKind.TRANSFER_IN if transfer else TransactionKind.INCOME
+        yield kind, row.name, abs(row.amount), str(row.date.day), row.date.year * 100 + row.date.month
+
+class StatementChunk():
+    """Records of a parsed statement held as columns, for cheap transfer between processes.
+
+    Names are stored once each in :attr:`names` and referenced by index, so a chunk pickles to a
+    few flat byte buffers rather than one object per transaction.
+    """
+    def __init__(self):
+        """Constructor."""
+        self.kinds = array('b')
+        self.amounts = array('q')
+        self.days = array('b')
+        self.periods = array('i')
+        self.name_ids = array('i')
+        self.names : list[str] = []
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    @classmethod
+    def from_records(cls, records) -> 'StatementChunk':
+        """
+        :param records: Records produced by :func:`to_records`.
+        :type records: Iterable[tuple]
+        :return: The chunk.
+        :rtype: StatementChunk
+        """
+        chunk = cls()
+        name_ids : dict[str, int] = {}
+        for kind, name, amount, date, period in records:
+            name_id = name_ids.get(name)
+            if name_id is None:
+                name_id = name_ids[name] = len(chunk.names)
+                chunk.names.append(name)
+            chunk.kinds.append(kind)
+            chunk.amounts.append(amount)
+            chunk.days.append(int(date))
+            chunk.periods.append(period)
+            chunk.name_ids.append(name_id)
+        return chunk
+
+    def records(self):
+        """
+        :return: Generator of (kind, name, amount, date, period) records.
+        :rtype: Iterator[tuple]
+        """
+        names = self.names
+        day_names = [str(day) for day in range(32)]
+        for kind, name_id, amount, day, period in zip(self.kinds, self.name_ids, self.amounts, self.days, self.periods):
+            yield TransactionKind(kind), names[name_id], amount, day_names[day], period
+
+def detect_format(source) -> str:
+    """
+    :param source: A path.
+    :type source: str
+    :return: "ofx" or "csv", from the file extension.
+    :rtype: str
+    """
+    return 'ofx' if str(source).lower().endswith(('.ofx', '.qfx')) else 'csv'
+
+def add_records(records, account, report : ImportReport, chunk_size : int = CHUNK_SIZE, progress = None):
+    """Bulk-insert records into an account, one ledger operation per chunk.
+
+    :param records: Records produced by :func:`to_records`.
+    :type records: Iterable[tuple]
+    :param account: The account receiving the transactions.
+    :type account: Account
+    :param report: The report counting the inserted records.
+    :type report: ImportReport
+    :param chunk_size: Records inserted at a time, defaults to CHUNK_SIZE
+    :type chunk_size: int, optional
+    :param progress: Called with the report after each chunk, defaults to None
+    :type progress: Callable[[ImportReport], None], optional
+    """
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            break
+        # Each chunk is its own ledger batch, so the changes listeners hold at once are bounded by
+        # the chunk size rather than the length of the statement.
+        account.add_transactions(chunk)
+        report.update(len(chunk))
+        if progress is not None:
+            progress(report)
+
+def import_rows(rows, account, chunk_size : int = CHUNK_SIZE, progress = None) -> ImportReport:
+    """Bulk-insert statement rows into an account, one ledger operation per chunk.
+
+    :param rows: Statement rows.
+    :type rows: Iterable[StatementRow]
+    :param account: The account receiving the transactions.
+    :type account: Account
+    :param chunk_size: Rows inserted at a time, defaults to CHUNK_SIZE
+    :type chunk_size: int, optional
+    :param progress: Called with the report after each chunk, defaults to None
+    :type progress: Callable[[ImportReport], None], optional
+    :return: The import report.
+    :rtype: ImportReport
+    """
+    report = ImportReport()
+    add_records(to_records(rows), account, report, chunk_size, progress)
+    report.update(0)
+    return report
+
+def import_statement(source, account, file_format : str = None, csv_format : CsvFormat = None,
+                     chunk_size : int = CHUNK_SIZE, progress = None) -> ImportReport:
+    """Import a CSV or OFX bank statement into an account.
+
+    The file is parsed by a generator pipeline and inserted in chunks, so memory use does not grow
+    with the size of the file beyond the transactions themselves.
+
+    :param source: A path or an open text file.
+    :type source: str or TextIO
+    :param account: The account receiving the transactions.
+    :type account: Account
+    :param file_format: "csv" or "ofx", defaults to detecting it from the file extension.
+    :type file_format: str, optional
+    :param csv_format: Column layout of a CSV file, defaults to CsvFormat()
+    :type csv_format: CsvFormat, optional
+    :param chunk_size: Rows inserted at a time, defaults to CHUNK_SIZE
+    :type chunk_size: int, optional
+    :param progress: Called with the report after each chunk, defaults to None
+    :type progress: Callable[[ImportReport], None], optional
+    :return: The import report.
+    :rtype: ImportReport
+    """
+    file_format = file_format or detect_format(getattr(source, 'name', source))
+    if file_format == 'ofx':
+        rows = read_ofx(source)
+    elif file_format == 'csv':
+        rows = read_csv(source, csv_format)
+    else:
+        raise ValueError(f"Unsupported statement format: {file_format}")
+    return import_rows(rows, account, chunk_size, progress)
+
+def parse_statement(path : str, file_format : str = None, csv_format : CsvFormat = None) -> StatementChunk:
+    """Parse a whole statement file into a chunk. Runs in worker processes.
+
+    :param path: The statement file.
+    :type path: str
+    :param file_format: "csv" or "ofx", defaults to detecting it from the file extension.
+    :type file_format: str, optional
+    :param csv_format: Column layout of a CSV file, defaults to CsvFormat()
+    :type csv_format: CsvFormat, optional
+    :return: The parsed records.
+    :rtype: StatementChunk
+    """
+    file_format = file_format or detect_format(path)
+    if file_format == 'ofx':
+        rows = read_ofx(path)
+    elif file_format == 'csv':
+        rows = read_csv(path, csv_format)
+    else:
+        raise ValueError(f"Unsupported statement format: {file_format}")
+    return StatementChunk.from_records(to_records(rows))
+
+def import_statements(statements, max_workers : int = None, file_format : str = None, csv_format : CsvFormat = None,
+                      chunk_size : int = CHUNK_SIZE, progress = None) -> ImportReport:
+    """Import many statement files, parsing them in parallel worker processes.
+
+    Workers return :class:`StatementChunk` columns. The main process adds them to their accounts
+    in the order the statements were given, so each account sees its files in order. As with
+    :func:`import_statement`, each chunk of a file is its own ledger batch, so a file which fails
+    to parse leaves the files before it imported and nothing of its own.
+
+    :param statements: Iterable of (path, account) pairs.
+    :type statements: Iterable[tuple[str, Account]]
+    :param max_workers: Number of worker processes, defaults to the number of CPUs.
+    :type max_workers: int, optional
+    :param file_format: "csv" or "ofx", defaults to detecting it from each file's extension.
+    :type file_format: str, optional
+    :param csv_format: Column layout of CSV files, defaults to CsvFormat()
+    :type csv_format: CsvFormat, optional
+    :param chunk_size: Rows inserted at a time, defaults to CHUNK_SIZE
+    :type chunk_size: int, optional
+    :param progress: Called with the report after each chunk, defaults to None
+    :type progress: Callable[[ImportReport], None], optional
+    :return: The import report.
+    :rtype: ImportReport
+    """
+    report = ImportReport()
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending = [(executor.submit(parse_statement, str(path), file_format, csv_format), account)
+                   for path, account in statements]
+        for future, account in pending:
+            add_records(future.result().records(), account, report, chunk_size, progress)
+    report.update(0)
+    return report
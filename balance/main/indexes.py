@@ -0,0 +1,259 @@
+from .dates import MAX_DAY
+from .ledger import Ledger, LedgerListener
+
+class NameIndex():
+    """Hash index from a name to the items carrying it.
+
+    Names are not required to be unique, so each name maps to an insertion ordered set of items
+    and lookups return the earliest item added under that name.
+    """
+    def __init__(self):
+        """Constructor."""
+        self.entries : dict[str, dict] = {}
+
+    def __contains__(self, name : str) -> bool:
+        return name in self.entries
+
+    def add(self, name : str, item):
+        """
+        :param name: The name to index the item under.
+        :type name: str
+        :param item: The item to index.
+        :type item: object
+        """
+        self.entries.setdefault(name, {})[item] = None
+
+    def remove(self, name : str, item):
+        """Remove an item from the index. Unknown items are ignored.
+
+        :param name: The name the item is indexed under.
+        :type name: str
+        :param item: The item to remove.
+        :type item: object
+        """
+        items = self.entries.get(name)
+        if items is None:
+            return
+        items.pop(item, None)
+        if not items:
+            del self.entries[name]
+
+    def rename(self, old_name : str, new_name : str, item):
+        """
+        :param old_name: The name the item is currently indexed under.
+        :type old_name: str
+        :param new_name: The name to index the item under.
+        :type new_name: str
+        :param item: The renamed item.
+        :type item: object
+        """
+        self.remove(old_name, item)
+        self.add(new_name, item)
+
+    def get(self, name : str):
+        """
+        :param name: The name to look up.
+        :type name: str
+        :return: The first item indexed under the name, or None.
+        :rtype: object
+        """
+        items = self.entries.get(name)
+        if not items:
+            return None
+        return next(iter(items))
+
+    def get_all(self, name : str) -> list:
+        """
+        :param name: The name to look up.
+        :type name: str
+        :return: Every item indexed under the name.
+        :rtype: list
+        """
+        return list(self.entries.get(name, ()))
+
+class RowIndex():
+    """Hash index from a key to the ledger rows filed under it, in insertion order."""
+    def __init__(self):
+        """Constructor."""
+        self.entries : dict[object, dict[int, None]] = {}
+
+    def add(self, key, row : int):
+        """
+        :param key: The key to file the row under.
+        :type key: object
+        :param row: The ledger row.
+        :type row: int
+        """
+        self.entries.setdefault(key, {})[row] = None
+
+    def remove(self, key, row : int):
+        """Remove a row from the index. Unknown rows are ignored.
+
+        :param key: The key the row is filed under.
+        :type key: object
+        :param row: The ledger row.
+        :type row: int
+        """
+        rows = self.entries.get(key)
+        if rows is None:
+            return
+        rows.pop(row, None)
+        if not rows:
+            del self.entries[key]
+
+    def get(self, key) -> list[int]:
+        """
+        :param key: The key to look up.
+        :type key: object
+        :return: The rows filed under the key.
+        :rtype: list[int]
+        """
+        return list(self.entries.get(key, ()))
+
+class TransactionIndex(LedgerListener):
+    """Secondary indexes over the live rows of a ledger, kept up to date from ledger notifications.
+
+    Rows are filed by (account, kind, day of month), by (account, kind, category), by category
+    alone and by (account, counterparty account), so due-date, category and transfer queries
+    only touch matching rows. Rows without a fixed day are filed under day 0.
+    """
+    def __init__(self, ledger : Ledger):
+        """Constructor.
+
+        :param ledger: The ledger to index.
+        :type ledger: Ledger
+        """
+        self.ledger = ledger
+        self.rebuild()
+        ledger.subscribe(self)
+
+    def rebuild(self):
+        """Index every live row of the ledger from scratch."""
+        self.by_day = RowIndex()
+        self.by_account_category = RowIndex()
+        self.by_category = RowIndex()
+        self.by_counterparty = RowIndex()
+        for row in self.ledger.live_rows():
+            self.add_row(row)
+
+    def close(self):
+        """Stop indexing the ledger."""
+        self.ledger.unsubscribe(self)
+        if self.ledger.index is self:
+            self.ledger.index = None
+
+    def file_row(self, file, row : int, account_id : int, day : int, category_id : int, counterparty):
+        """
+        :param file: RowIndex.add or RowIndex.remove, applied to every index.
+        :type file: Callable
+        :param row: The ledger row.
+        :type row: int
+        :param account_id: Account id the row is filed under.
+        :type account_id: int
+        :param day: Day of month the row is filed under.
+        :type day: int
+        :param category_id: Category id the row is filed under.
+        :type category_id: int
+        :param counterparty: Counterparty account the row is filed under, or None.
+        :type counterparty: Account
+        """
+        kind = self.ledger.kinds[row]
+        file(self.by_day, (account_id, kind, day), row)
+        file(self.by_account_category, (account_id, kind, category_id), row)
+        file(self.by_category, category_id, row)
+        if counterparty is not None:
+            file(self.by_counterparty, (account_id, counterparty), row)
+
+    def add_row(self, row : int):
+        """
+        :param row: A live row to index.
+        :type row: int
+        """
+        ledger = self.ledger
+        self.file_row(RowIndex.add, row, ledger.account_ids[row], ledger.days[row], ledger.category_ids[row],
+                      ledger.counterparties.get(row))
+
+    def remove_row(self, row : int):
+        """
+        :param row: A row to drop from the index.
+        :type row: int
+        """
+        ledger = self.ledger
+        self.file_row(RowIndex.remove, row, ledger.account_ids[row], ledger.days[row], ledger.category_ids[row],
+                      ledger.counterparties.get(row))
+
+    def get_rows_due(self, account_id : int, kind, first_day : int = 1, last_day : int = MAX_DAY) -> list[int]:
+        """
+        :param account_id: The account id.
+        :type account_id: int
+        :param kind: The kind of transaction.
+        :type kind: TransactionKind
+        :param first_day: First day of the month, defaults to 1
+        :type first_day: int, optional
+        :param last_day: Last day of the month, defaults to MAX_DAY
+        :type last_day: int, optional
+        :return: Rows due between the two days inclusive, in day order.
+        :rtype: list[int]
+        """
+        rows = []
+        for day in range(max(first_day, 0), min(last_day, MAX_DAY) + 1):
+            rows.extend(self.by_day.entries.get((account_id, kind, day), ()))
+        return rows
+
+    def get_rows_in_category(self, category_id : int, account_id : int = None, kind = None) -> list[int]:
+        """
+        :param category_id: The category id.
+        :type category_id: int
+        :param account_id: Restrict to an account, defaults to None
+        :type account_id: int, optional
+        :param kind: Restrict to a kind of transaction (requires account_id), defaults to None
+        :type kind: TransactionKind, optional
+        :return: Rows in the category.
+        :rtype: list[int]
+        """
+        if account_id is not None and kind is not None:
+            return self.by_account_category.get((account_id, kind, category_id))
+        rows = self.by_category.get(category_id)
+        if account_id is not None:
+            account_ids = self.ledger.account_ids
+            rows = [row for row in rows if account_ids[row] == account_id]
+        return rows
+
+    def get_rows_with_counterparty(self, account_id : int, counterparty) -> list[int]:
+        """
+        :param account_id: The account id.
+        :type account_id: int
+        :param counterparty: The other account of the transfers.
+        :type counterparty: Account
+        :return: Transfer rows of the account to or from the counterparty.
+        :rtype: list[int]
+        """
+        return self.by_counterparty.get((account_id, counterparty))
+
+    def row_added(self, ledger : Ledger, row : int):
+        self.add_row(row)
+
+    def row_released(self, ledger : Ledger, row : int):
+        self.remove_row(row)
+
+    def row_restored(self, ledger : Ledger, row : int):
+        self.add_row(row)
+
+    def ledger_compacted(self, ledger : Ledger, rows):
+        self.rebuild()
+
+    def row_changed(self, ledger : Ledger, row : int, column : str, old_value):
+        if not ledger.alive[row]:
+            return
+        old = {
+            'account_ids': ledger.account_ids[row],
+            'dates': ledger.days[row],
+            'category_ids': ledger.category_ids[row],
+            'counterparties': ledger.counterparties.get(row),
+        }
+        if column not in old:
+            return
+        old[column] = ledger.date_table[old_value].day if column == 'dates' else old_value
+        self.file_row(RowIndex.remove, row, old['account_ids'], old['dates'], old['category_ids'],
+                      old['counterparties'])
+        self.add_row(row)
@@ -0,0 +1,396 @@
+import cProfile
+import functools
+import io
+import json
+import math
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from importlib import import_module
+
+# Most recent durations kept per span, so a long session cannot grow memory without bound.
+SAMPLE_LIMIT = 10000
+
+# Domain hot paths timed while recording: (module in balance.main, class or None for module
+# functions, attribute names). Module functions are only timed when called through their module
+# (e.g. ``persistence.save`` or a name looked up inside the calling function), as a name bound by a
+# module-level ``from ... import`` keeps the original function.
+DOMAIN_SPANS = (
+    ('base_classes', 'Account', ('add_income', 'add_bill', 'add_transfer', 'remove_income', 'remove_bill',
+                                 'remove_transfer_out', 'remove_transfer_in', 'add_transactions')),
+    ('base_classes', 'Transaction', ('set_name', 'set_amount', 'set_date', 'set_account')),
+    ('base_classes', 'Bill', ('set_category',)),
+    ('base_classes', 'Person', ('set_name', 'create_account', 'add_account', 'remove_account')),
+    ('base_classes', 'PersonManager', ('add_person', 'remove_person')),
+    ('importer', None, ('import_rows', 'import_statement', 'import_statements')),
+    ('persistence', None, ('save', 'load')),
+    ('search', 'SearchIndex', ('search',)),
+)
+
+def swap_properties(owner, function, replacement):
+    """Rebuild the properties of a class which use a function as getter, setter or deleter.
+
+    A property keeps the functions it was built from, so ``amount = property(get_amount, set_amount)``
+    would still call the original setter on ``transaction.amount = 5`` after ``set_amount`` is
+    replaced on the class.
+
+    :param owner: Class or module holding the function.
+    :type owner: type or module
+    :param function: The function to replace.
+    :type function: Callable
+    :param replacement: The function used in its place.
+    :type replacement: Callable
+    """
+    if not isinstance(owner, type):
+        return
+    for name, value in list(vars(owner).items()):
+        if isinstance(value, property) and function in (value.fget, value.fset, value.fdel):
+            accessors = [replacement if accessor is function else accessor
+                         for accessor in (value.fget, value.fset, value.fdel)]
+            setattr(owner, name, property(*accessors, value.__doc__))
+
+class Recorder():
+    """Opt-in timing spans, counters and profiler capture for the running application.
+
+    Nothing is recorded until :meth:`enable` is called. Hot paths are timed by swapping the
+    registered methods for timing wrappers while recording, along with any properties built from
+    them, and putting the originals back on :meth:`disable`, so a disabled recorder adds no cost to
+    them at all. Coarse operations use
+    :meth:`span`, which only checks a flag when disabled.
+    """
+    def __init__(self, sample_limit : int = SAMPLE_LIMIT):
+        """Constructor.
+
+        :param sample_limit: Most recent durations kept per span, defaults to SAMPLE_LIMIT
+        :type sample_limit: int, optional
+        """
+        self.enabled = False
+        self.sample_limit = sample_limit
+        self.samples : dict[str, deque] = {}
+        self.calls : dict[str, int] = {}
+        self.counters : dict[str, int] = {}
+        self.lock = threading.Lock()
+
+        # (owner, attribute, span name, callback) of every instrumented callable.
+        self.registered : list[tuple[object, str, str, object]] = []
+        self.originals : dict[tuple[int, str], object] = {}
+        self.domain_registered = False
+
+        self.profiler : cProfile.Profile = None
+        self.profile_report = ""
+        self.memory_report : list[str] = []
+
+    def record(self, name : str, seconds : float):
+        """
+        :param name: Name of the span.
+        :type name: str
+        :param seconds: Duration of one call.
+        :type seconds: float
+        """
+        with self.lock:
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = deque(maxlen=self.sample_limit)
+            samples.append(seconds)
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    def count(self, name : str, delta : int = 1):
+        """Add to a counter. Ignored while disabled.
+
+        :param name: Name of the counter.
+        :type name: str
+        :param delta: Amount to add, defaults to 1
+        :type delta: int, optional
+        """
+        if self.enabled:
+            with self.lock:
+                self.counters[name] = self.counters.get(name, 0) + delta
+
+    @contextmanager
+    def timed(self, name : str):
+        """Time the body of a with statement unconditionally.
+
+        :param name: Name of the span.
+        :type name: str
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def span(self, name : str):
+        """
+        :param name: Name of the span.
+        :type name: str
+        :return: A context manager timing its body while recording, or doing nothing otherwise.
+        :rtype: ContextManager
+        """
+        return self.timed(name) if self.enabled else NULL_SPAN
+
+    def wrap(self, function, name : str, callback = None):
+        """
+        :param function: The function to time.
+        :type function: Callable
+        :param name: Name of the span.
+        :type name: str
+        :param callback: Called with the first argument (usually self) after each call, defaults to None
+        :type callback: Callable, optional
+        :return: A timing wrapper around the function.
+        :rtype: Callable
+        """
+        record = self.record
+        perf_counter = time.perf_counter
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            # A reference taken while recording can outlive disable().
+            if not self.enabled:
+                return function(*args, **kwargs)
+            started = perf_counter()
+            try:
+                result = function(*args, **kwargs)
+            finally:
+                record(name, perf_counter() - started)
+            if callback is not None and args:
+                callback(args[0])
+            return result
+        return wrapper
+
+    def instrument(self, owner, attribute : str, name : str = None, callback = None):
+        """Register a class method or module function to be timed while recording.
+
+        The callable is replaced on its owner, so calls through a class, an instance or the module
+        are timed. References bound elsewhere beforehand, such as a module-level
+        ``from module import function``, still call the original; time such call sites with
+        :meth:`span` instead.
+
+        :param owner: Class or module holding the callable.
+        :type owner: type or module
+        :param attribute: Name of the callable.
+        :type attribute: str
+        :param name: Name of the span, defaults to "Owner.attribute"
+        :type name: str, optional
+        :param callback: Called with the first argument after each call, defaults to None
+        :type callback: Callable, optional
+        """
+        if name is None:
+            name = f"{owner.__name__.rsplit('.', 1)[-1]}.{attribute}"
+        entry = (owner, attribute, name, callback)
+        self.registered.append(entry)
+        if self.enabled:
+            self.patch(entry)
+
+    def patch(self, entry : tuple):
+        """
+        :param entry: (owner, attribute, span name, callback) to swap for a timing wrapper.
+        :type entry: tuple
+        """
+        owner, attribute, name, callback = entry
+        key = (id(owner), attribute)
+        if key in self.originals:
+            return
+        # Read from __dict__ so an inherited method is not copied down onto a subclass.
+        original = vars(owner).get(attribute)
+        if original is None:
+            return
+        self.originals[key] = original
+        wrapper = self.wrap(original, name, callback)
+        setattr(owner, attribute, wrapper)
+        swap_properties(owner, original, wrapper)
+
+    def unpatch(self, entry : tuple):
+        """
+        :param entry: (owner, attribute, span name, callback) to restore.
+        :type entry: tuple
+        """
+        owner, attribute, _, _ = entry
+        original = self.originals.pop((id(owner), attribute), None)
+        if original is not None:
+            wrapper = vars(owner).get(attribute)
+            setattr(owner, attribute, original)
+            swap_properties(owner, wrapper, original)
+
+    def register_domain(self):
+        """Register :data:`DOMAIN_SPANS`, importing their modules on first use."""
+        if self.domain_registered:
+            return
+        self.domain_registered = True
+        for module_name, class_name, attributes in DOMAIN_SPANS:
+            module = import_module(f'.{module_name}', __package__)
+            owner = getattr(module, class_name) if class_name else module
+            for attribute in attributes:
+                name = f"{class_name}.{attribute}" if class_name else f"{module_name}.{attribute}"
+                self.instrument(owner, attribute, name)
+
+    def enable(self):
+        """Start recording spans and counters."""
+        if self.enabled:
+            return
+        self.register_domain()
+        self.enabled = True
+        for entry in self.registered:
+            self.patch(entry)
+
+    def disable(self):
+        """Stop recording and restore the original callables. Recorded data is kept."""
+        if not self.enabled:
+            return
+        self.enabled = False
+        for entry in self.registered:
+            self.unpatch(entry)
+
+    def reset(self):
+        """Forget every recorded span, counter and capture."""
+        with self.lock:
+            self.samples.clear()
+            self.calls.clear()
+            self.counters.clear()
+        self.profile_report = ""
+        self.memory_report = []
+
+    def start_profiling(self):
+        """Start capturing a cProfile profile of the GUI thread."""
+        if self.profiler is None:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def stop_profiling(self, limit : int = 30) -> str:
+        """
+        :param limit: Number of functions reported, defaults to 30
+        :type limit: int, optional
+        :return: The functions with the most cumulative time, as text.
+        :rtype: str
+        """
+        if self.profiler is None:
+            return self.profile_report
+        self.profiler.disable()
+        output = io.StringIO()
+        pstats.Stats(self.profiler, stream=output).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+        self.profiler = None
+        self.profile_report = output.getvalue()
+        return self.profile_report
+
+    def is_profiling(self) -> bool:
+        """
+        :return: True while a cProfile capture is running.
+        :rtype: bool
+        """
+        return self.profiler is not None
+
+    def start_memory_trace(self):
+        """Start tracing memory allocations with tracemalloc."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stop_memory_trace(self, limit : int = 20) -> list[str]:
+        """
+        :param limit: Number of allocation sites reported, defaults to 20
+        :type limit: int, optional
+        :return: The source lines holding the most memory, as text lines.
+        :rtype: list[str]
+        """
+        if not tracemalloc.is_tracing():
+            return self.memory_report
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        self.memory_report = [str(statistic) for statistic in snapshot.statistics('lineno')[:limit]]
+        return self.memory_report
+
+    def is_tracing_memory(self) -> bool:
+        """
+        :return: True while tracemalloc is tracing.
+        :rtype: bool
+        """
+        return tracemalloc.is_tracing()
+
+    def get_report(self) -> dict[str, dict]:
+        """
+        :return: Call count, p50, p99 and maximum (in seconds) of every span, by span name.
+        :rtype: dict[str, dict]
+        """
+        with self.lock:
+            samples = {name: sorted(durations) for name, durations in self.samples.items()}
+            calls = dict(self.calls)
+        return {name: {
+            'calls': calls[name],
+            'p50': percentile(durations, 50),
+            'p99': percentile(durations, 99),
+            'max': durations[-1],
+        } for name, durations in sorted(samples.items())}
+
+    def get_counters(self) -> dict[str, int]:
+        """
+        :return: Every counter, by name.
+        :rtype: dict[str, int]
+        """
+        with self.lock:
+            return dict(sorted(self.counters.items()))
+
+    def format_report(self) -> str:
+        """
+        :return: The spans and counters as a plain text table, latencies in milliseconds.
+        :rtype: str
+        """
+        lines = [f"{'span':40} {'calls':>8} {'p50 ms':>10} {'p99 ms':>10} {'max ms':>10}"]
+        for name, span in self.get_report().items():
+            lines.append(f"{name:40} {span['calls']:>8} {span['p50'] * 1000:>10.3f} "
+                         f"{span['p99'] * 1000:>10.3f} {span['max'] * 1000:>10.3f}")
+        counters = self.get_counters()
+        if counters:
+            lines.append("")
+            lines.append(f"{'counter':40} {'value':>8}")
+            lines.extend(f"{name:40} {value:>8}" for name, value in counters.items())
+        return "\n".join(lines)
+
+    def export(self, path : str):
+        """Write the spans, counters and any profiler captures to a JSON file.
+
+        :param path: File to write.
+        :type path: str
+        """
+        data = {
+            'spans': self.get_report(),
+            'counters': self.get_counters(),
+            'profile': self.profile_report,
+            'memory': self.memory_report,
+        }
+        with open(path, 'w') as file:
+            json.dump(data, file, indent=1)
+
+class NullSpan():
+    """Context manager which does nothing, returned by :meth:`Recorder.span` while disabled."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+NULL_SPAN = NullSpan()
+
+def percentile(ordered : list[float], rank : float) -> float:
+    """
+    :param ordered: Values in ascending order.
+    :type ordered: list[float]
+    :param rank: Percentile, between 0 and 100.
+    :type rank: float
+    :return: The nearest-rank percentile, or 0.0 for no values.
+    :rtype: float
+    """
+    if not ordered:
+        return 0.0
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(rank / 100 * len(ordered)) - 1))]
+
+recorder = Recorder()
+
+def get_recorder() -> Recorder:
+    """
+    :return: The application's recorder.
+    :rtype: Recorder
+    """
+    return recorder
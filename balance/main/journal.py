@@ -0,0 +1,687 @@
+import json
+import os
+import sys
+from collections import deque
+from weakref import WeakKeyDictionary
+
+from . import persistence
+from .base_classes import Account, Category, CategoryManager, Person, PersonManager
+from .ledger import Change, Ledger, LedgerListener, NO_ACCOUNT, NO_CATEGORY
+
+# Memory the undo and redo history may hold before the oldest steps are dropped.
+DEFAULT_MEMORY_BUDGET = 16 * 1024 * 1024
+
+# Steps written to the log between two snapshots, bounding how much a recovery has to replay.
+DEFAULT_CHECKPOINT_INTERVAL = 500
+
+# Delta kinds. A delta is a plain tuple starting with its kind:
+#   (ROW_ADDED, row), (ROW_RELEASED, row), (ROW_RESTORED, row),
+#   (ROW_CHANGED, row, column, old value, new value),
+#   (OBJECT_ADDED, item, owner), (OBJECT_REMOVED, item, owner),
+#   (RENAMED, item, old name, new name), (OWNER_CHANGED, account, old owner, new owner).
+# Column values are the ledger's own codes, so a delta costs a few machine words.
+ROW_ADDED = 0
+ROW_RELEASED = 1
+ROW_RESTORED = 2
+ROW_CHANGED = 3
+OBJECT_ADDED = 4
+OBJECT_REMOVED = 5
+RENAMED = 6
+OWNER_CHANGED = 7
+
+class Journal(LedgerListener):
+    """Undo and redo history of a :class:`PersonManager`, optionally kept as a write-ahead log on disk.
+
+    Every change reported by the ledger is recorded as a compact delta holding the old and new
+    value. A step is one outermost :meth:`Ledger.batch` (or one change made outside a batch), so
+    removing an account with all of its transactions undoes in one go. Undoing applies the
+    inverse of each delta in reverse order, which costs the same however deep in the history the
+    step is. The history is kept within a memory budget by dropping the oldest steps.
+
+    When given a log path, each step is also appended to a JSON lines log which refers to people,
+    accounts and rows by stable keys. Every ``checkpoint_interval`` steps the whole graph is
+    saved with :func:`balance.main.persistence.save` and the log starts afresh, so
+    :func:`recover` only replays the steps made since the last snapshot. Opening a journal on
+    an existing log starts it afresh, so recover from the log first to keep its changes.
+    """
+    def __init__(self, person_manager : PersonManager, category_manager : CategoryManager = None,
+                 memory_budget : int = DEFAULT_MEMORY_BUDGET, log_path : str = None,
+                 checkpoint_interval : int = DEFAULT_CHECKPOINT_INTERVAL, sync : bool = True):
+        """Constructor.
+
+        :param person_manager: The people to journal.
+        :type person_manager: PersonManager
+        :param category_manager: Categories saved with the snapshots, defaults to None
+        :type category_manager: CategoryManager, optional
+        :param memory_budget: Approximate bytes of history kept, defaults to DEFAULT_MEMORY_BUDGET
+        :type memory_budget: int, optional
+        :param log_path: Write-ahead log to keep, defaults to None for no log.
+        :type log_path: str, optional
+        :param checkpoint_interval: Steps logged between snapshots, defaults to DEFAULT_CHECKPOINT_INTERVAL
+        :type checkpoint_interval: int, optional
+        :param sync: Flush each logged step to disk before returning, defaults to True
+        :type sync: bool, optional
+        """
+        self.person_manager = person_manager
+        self.category_manager = category_manager
+        self.ledger = person_manager.get_ledger()
+        self.memory_budget = memory_budget
+
+        self.undo_steps : deque[tuple[list, int]] = deque()
+        self.redo_steps : deque[tuple[list, int]] = deque()
+        self.memory_usage = 0
+        self.pending : list[tuple] = []
+        self.applying = False
+
+        # Names before the latest rename, which the ledger does not report.
+        self.names = WeakKeyDictionary()
+        for person in person_manager.get_people():
+            self.names[person] = person.get_name()
+            for account in person.get_accounts():
+                self.names[account] = account.get_account_name()
+
+        self.log_path = log_path
+        self.log = None
+        self.sync = sync
+        self.checkpoint_interval = checkpoint_interval
+        self.steps_logged = 0
+        self.generation = 0
+        self.object_keys : dict[object, int] = {}
+        self.row_keys : dict[int, int] = {}
+        self.next_object_key = 0
+        self.next_row_key = 0
+        self.pending_records : list[list] = []
+        if log_path is not None:
+            if os.path.exists(log_path):
+                self.generation = read_log(log_path)[0][1]
+            self.checkpoint()
+
+        self.ledger.subscribe(self)
+
+    def close(self):
+        """Stop journaling and close the log."""
+        self.ledger.unsubscribe(self)
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+
+    def can_undo(self) -> bool:
+        """
+        :return: True if there is a step to undo.
+        :rtype: bool
+        """
+        return bool(self.undo_steps)
+
+    def can_redo(self) -> bool:
+        """
+        :return: True if there is an undone step to redo.
+        :rtype: bool
+        """
+        return bool(self.redo_steps)
+
+    def get_undo_count(self) -> int:
+        """
+        :return: Number of steps which can be undone.
+        :rtype: int
+        """
+        return len(self.undo_steps)
+
+    def get_redo_count(self) -> int:
+        """
+        :return: Number of steps which can be redone.
+        :rtype: int
+        """
+        return len(self.redo_steps)
+
+    def get_memory_usage(self) -> int:
+        """
+        :return: Approximate bytes held by the undo and redo history.
+        :rtype: int
+        """
+        return self.memory_usage
+
+    def clear(self):
+        """Forget the undo and redo history. The log is unaffected."""
+        self.undo_steps.clear()
+        self.redo_steps.clear()
+        self.memory_usage = 0
+
+    def undo(self) -> bool:
+        """Revert the most recent step.
+
+        :return: False if there was nothing to undo.
+        :rtype: bool
+        """
+        if not self.undo_steps:
+            return False
+        step = self.undo_steps.pop()
+        self.apply_step(step[0], undo=True)
+        self.redo_steps.append(step)
+        return True
+
+    def redo(self) -> bool:
+        """Apply the most recently undone step again.
+
+        :return: False if there was nothing to redo.
+        :rtype: bool
+        """
+        if not self.redo_steps:
+            return False
+        step = self.redo_steps.pop()
+        self.apply_step(step[0], undo=False)
+        self.undo_steps.append(step)
+        return True
+
+    def apply_step(self, deltas : list[tuple], undo : bool):
+        """
+        :param deltas: The deltas of one step, oldest first.
+        :type deltas: list[tuple]
+        :param undo: True to revert the deltas, False to apply them again.
+        :type undo: bool
+        """
+        if self.ledger.batch_depth:
+            raise RuntimeError("Cannot undo or redo inside a ledger batch")
+        self.applying = True
+        try:
+            with self.ledger.batch():
+                for delta in (reversed(deltas) if undo else deltas):
+                    self.apply(delta, undo)
+        finally:
+            self.applying = False
+
+    def apply(self, delta : tuple, undo : bool):
+        """
+        :param delta: The delta.
+        :type delta: tuple
+        :param undo: True to revert the delta, False to apply it again.
+        :type undo: bool
+        """
+        kind = delta[0]
+        if kind == ROW_CHANGED:
+            set_column(self.ledger, delta[1], delta[2], delta[3] if undo else delta[4])
+        elif kind == ROW_ADDED or kind == ROW_RESTORED:
+            set_row_alive(self.ledger, delta[1], not undo)
+        elif kind == ROW_RELEASED:
+            set_row_alive(self.ledger, delta[1], undo)
+        elif kind == OBJECT_ADDED or kind == OBJECT_REMOVED:
+            set_object_added(self.person_manager, delta[1], delta[2], (kind == OBJECT_ADDED) != undo)
+        elif kind == RENAMED:
+            set_object_name(delta[1], delta[2] if undo else delta[3])
+        elif kind == OWNER_CHANGED:
+            delta[1].set_account_owner(delta[2] if undo else delta[3])
+
+    def record(self, delta : tuple):
+        """
+        :param delta: A change reported by the ledger.
+        :type delta: tuple
+        """
+        self.pending.append(delta)
+        if self.log is not None:
+            self.encode(delta)
+        if self.ledger.batch_depth == 0:
+            self.commit()
+
+    def commit(self):
+        """Close the current step, logging it and adding it to the undo history."""
+        if self.pending_records:
+            records, self.pending_records = self.pending_records, []
+            self.write(records)
+        if not self.pending:
+            return
+        deltas, self.pending = self.pending, []
+        if self.applying:
+            return
+        size = sys.getsizeof(deltas) + sum(map(sys.getsizeof, deltas))
+        self.memory_usage -= sum(step[1] for step in self.redo_steps)
+        self.redo_steps.clear()
+        self.undo_steps.append((deltas, size))
+        self.memory_usage += size
+        while self.memory_usage > self.memory_budget and (self.undo_steps or self.redo_steps):
+            steps = self.undo_steps if self.undo_steps else self.redo_steps
+            self.memory_usage -= steps.popleft()[1]
+
+    def row_added(self, ledger : Ledger, row : int):
+        self.record((ROW_ADDED, row))
+
+    def row_released(self, ledger : Ledger, row : int):
+        self.record((ROW_RELEASED, row))
+
+    def row_restored(self, ledger : Ledger, row : int):
+        self.record((ROW_RESTORED, row))
+
+    def row_changed(self, ledger : Ledger, row : int, column : str, old_value):
+        if column == 'counterparties':
+            new_value = ledger.counterparties.get(row)
+            if new_value is old_value:
+                return
+        else:
+            new_value = getattr(ledger, column)[row]
+            if new_value == old_value:
+                return
+        self.record((ROW_CHANGED, row, column, old_value, new_value))
+
+    def ledger_compacted(self, ledger : Ledger, rows):
+        # Deltas refer to rows by number, which compacting changes.
+        self.clear()
+        self.pending.clear()
+        self.row_keys = {rows[row]: key for row, key in self.row_keys.items() if rows[row] >= 0}
+
+    def account_owner_changed(self, ledger : Ledger, account, old_owner):
+        self.record((OWNER_CHANGED, account, old_owner, account.get_account_owner()))
+
+    def object_changed(self, ledger : Ledger, item, change : Change):
+        if isinstance(item, Person):
+            name, owner = item.get_name(), None
+        elif isinstance(item, Account):
+            name, owner = item.get_account_name(), item.get_account_owner()
+        else:
+            return
+        old_name = self.names.get(item)
+        self.names[item] = name
+        if change == Change.ADDED:
+            self.record((OBJECT_ADDED, item, owner))
+        elif change == Change.REMOVED:
+            self.record((OBJECT_REMOVED, item, owner))
+        elif old_name is not None and old_name != name:
+            self.record((RENAMED, item, old_name, name))
+
+    def batch_finished(self, ledger : Ledger):
+        self.commit()
+
+    def checkpoint(self):
+        """Save a snapshot of the people and categories and start a new, empty log."""
+        if self.log_path is None:
+            raise RuntimeError("The journal has no log")
+        old_snapshot = snapshot_path(self.log_path, self.generation)
+        self.generation += 1
+        snapshot = snapshot_path(self.log_path, self.generation)
+        persistence.save(snapshot, self.person_manager, self.category_manager)
+        with open(snapshot, 'rb') as file:
+            os.fsync(file.fileno())
+        self.object_keys, self.row_keys = snapshot_keys(self.person_manager)
+        self.next_object_key = len(self.object_keys)
+        self.next_row_key = len(self.row_keys)
+
+        # The new log only replaces the old one once the snapshot it follows is safely written.
+        temporary = f"{self.log_path}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as file:
+            file.write(json.dumps({'snapshot': os.path.basename(snapshot), 'generation': self.generation}) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        if self.log is not None:
+            self.log.close()
+        os.replace(temporary, self.log_path)
+        self.log = open(self.log_path, 'a', encoding='utf-8')
+        self.steps_logged = 0
+        try:
+            os.remove(old_snapshot)
+        except OSError:
+            # Missing, or still mapped by the people recovered from it on some platforms.
+            pass
+
+    def write(self, records : list[list]):
+        """
+        :param records: Log records of one step.
+        :type records: list[list]
+        """
+        self.log.write(json.dumps(records, separators=(',', ':')) + "\n")
+        self.log.flush()
+        if self.sync:
+            os.fsync(self.log.fileno())
+        self.steps_logged += 1
+        if self.steps_logged >= self.checkpoint_interval:
+            self.checkpoint()
+
+    def encode(self, delta : tuple):
+        """Add the log records of a delta to the current step.
+
+        :param delta: The delta.
+        :type delta: tuple
+        """
+        kind = delta[0]
+        records = self.pending_records
+        if kind == ROW_ADDED:
+            self.row_key(delta[1])
+        elif kind == ROW_RELEASED or kind == ROW_RESTORED:
+            records.append(['released' if kind == ROW_RELEASED else 'restored', self.row_key(delta[1])])
+        elif kind == ROW_CHANGED:
+            _, row, column, _, new_value = delta
+            records.append(['changed', self.row_key(row), column, self.encode_value(column, new_value)])
+        elif kind == OBJECT_ADDED or kind == OBJECT_REMOVED:
+            records.append(['added' if kind == OBJECT_ADDED else 'removed', self.object_key(delta[1]),
+                            self.object_key(delta[2])])
+        elif kind == RENAMED:
+            records.append(['renamed', self.object_key(delta[1]), delta[3]])
+        elif kind == OWNER_CHANGED:
+            records.append(['owner', self.object_key(delta[1]), self.object_key(delta[3])])
+
+    def encode_value(self, column : str, value):
+        """
+        :param column: Name of the ledger column.
+        :type column: str
+        :param value: A value of the column.
+        :type value: object
+        :return: The value as written to the log.
+        :rtype: object
+        """
+        ledger = self.ledger
+        if column == 'name_ids':
+            return ledger.strings[value]
+        if column == 'dates':
+            return ledger.date_table[value].text
+        if column == 'account_ids':
+            return self.object_key(ledger.account_at(value))
+        if column == 'category_ids':
+            category = ledger.category_at(value)
+            return None if category is None else [category.get_name(), list(category.get_colour() or ())]
+        if column == 'counterparties':
+            return self.object_key(value)
+        return value
+
+    def object_key(self, item) -> int:
+        """Key of a person or account in the log, describing it first if the log does not know it yet.
+
+        :param item: The person or account, or None.
+        :type item: Person or Account
+        :return: The key, or None.
+        :rtype: int
+        """
+        if item is None:
+            return None
+        key = self.object_keys.get(item)
+        if key is not None:
+            return key
+        key = self.object_keys[item] = self.next_object_key
+        self.next_object_key += 1
+        records = self.pending_records
+        if isinstance(item, Person):
+            records.append(['person', key, item.get_name(), item.manager is self.person_manager])
+            for account in item.get_accounts():
+                self.object_key(account)
+        else:
+            owner = item.get_account_owner()
+            owned = owner is not None and owner.get_account_by_id(item.account_id) is item
+            records.append(['account', key, item.get_account_name(), self.object_key(owner), owned])
+            for row in self.ledger.rows_for_account(item.account_id):
+                self.row_key(row)
+        return key
+
+    def row_key(self, row : int) -> int:
+        """Key of a ledger row in the log, describing it first if the log does not know it yet.
+
+        :param row: The ledger row.
+        :type row: int
+        :return: The key.
+        :rtype: int
+        """
+        key = self.row_keys.get(row)
+        if key is not None:
+            return key
+        ledger = self.ledger
+        # Describing the account may describe its live rows, this one included.
+        account = self.object_key(ledger.account_at(ledger.account_ids[row]))
+        counterparty = self.object_key(ledger.counterparties.get(row))
+        key = self.row_keys.get(row)
+        if key is not None:
+            return key
+        key = self.row_keys[row] = self.next_row_key
+        self.next_row_key += 1
+        self.pending_records.append([
+            'row', key, int(ledger.kinds[row]), ledger.get_name(row), ledger.amounts[row], ledger.get_date(row),
+            account, self.encode_value('category_ids', ledger.category_ids[row]), ledger.periods[row],
+            counterparty, bool(ledger.alive[row])])
+        return key
+
+class Recovery():
+    """Replays a write-ahead log written by a :class:`Journal` on top of the snapshot it follows."""
+    def __init__(self, person_manager : PersonManager, category_manager : CategoryManager):
+        """Constructor.
+
+        :param person_manager: The people loaded from the snapshot.
+        :type person_manager: PersonManager
+        :param category_manager: The categories loaded from the snapshot.
+        :type category_manager: CategoryManager
+        """
+        self.person_manager = person_manager
+        self.category_manager = category_manager
+        self.ledger = person_manager.get_ledger()
+        object_keys, row_keys = snapshot_keys(person_manager)
+        self.objects : dict[int, object] = {key: item for item, key in object_keys.items()}
+        self.rows : dict[int, int] = {key: row for row, key in row_keys.items()}
+
+    def replay(self, records : list[list]):
+        """
+        :param records: Log records of one step.
+        :type records: list[list]
+        """
+        with self.ledger.batch():
+            for record in records:
+                self.apply(record)
+
+    def apply(self, record : list):
+        """
+        :param record: A log record.
+        :type record: list
+        """
+        ledger = self.ledger
+        operation = record[0]
+        if operation == 'row':
+            _, key, kind, name, amount, date, account, category, period, counterparty, alive = record
+            account = self.objects.get(account)
+            row = ledger.append(kind, name, amount, date, NO_ACCOUNT if account is None else account.account_id,
+                                self.category_code(category), period)
+            self.rows[key] = row
+            if counterparty is not None:
+                ledger.set_counterparty(row, self.objects[counterparty])
+            set_row_alive(ledger, row, alive)
+        elif operation == 'person':
+            _, key, name, managed = record
+            person = self.objects[key] = Person(name, ledger)
+            if managed:
+                self.person_manager.add_person(person)
+        elif operation == 'account':
+            _, key, name, owner, owned = record
+            owner = self.objects.get(owner)
+            account = self.objects[key] = Account(name, owner)
+            if owned:
+                owner.add_account(account)
+        elif operation == 'released' or operation == 'restored':
+            set_row_alive(ledger, self.rows[record[1]], operation == 'restored')
+        elif operation == 'changed':
+            _, key, column, value = record
+            set_column(ledger, self.rows[key], column, self.decode_value(column, value))
+        elif operation == 'added' or operation == 'removed':
+            set_object_added(self.person_manager, self.objects[record[1]], self.objects.get(record[2]),
+                             operation == 'added')
+        elif operation == 'renamed':
+            set_object_name(self.objects[record[1]], record[2])
+        elif operation == 'owner':
+            self.objects[record[1]].set_account_owner(self.objects.get(record[2]))
+        else:
+            raise ValueError(f"Unknown log record: {operation}")
+
+    def decode_value(self, column : str, value):
+        """
+        :param column: Name of the ledger column.
+        :type column: str
+        :param value: A value as written to the log.
+        :type value: object
+        :return: The value as the ledger's own code or object.
+        :rtype: object
+        """
+        ledger = self.ledger
+        if column == 'name_ids':
+            return ledger.strings.code(value)
+        if column == 'dates':
+            return ledger.date_code(value)
+        if column == 'account_ids':
+            return NO_ACCOUNT if value is None else self.objects[value].account_id
+        if column == 'category_ids':
+            return self.category_code(value)
+        if column == 'counterparties':
+            return self.objects.get(value)
+        return value
+
+    def category_code(self, value : list) -> int:
+        """
+        :param value: [name, colour] of a category as written to the log, or None.
+        :type value: list
+        :return: The category id in the ledger.
+        :rtype: int
+        """
+        if value is None:
+            return NO_CATEGORY
+        name, colour = value
+        category = self.category_manager.get_category_by_name(name)
+        if category is None:
+            category = next((known for known in self.ledger.categories
+                             if known is not None and known.get_name() == name), None)
+        if category is None:
+            category = Category(name, tuple(colour))
+        return self.ledger.category_code(category)
+
+def set_column(ledger : Ledger, row : int, column : str, value):
+    """Set a ledger value through the ledger's setters, so listeners are notified.
+
+    :param ledger: The ledger.
+    :type ledger: Ledger
+    :param row: The row.
+    :type row: int
+    :param column: Name of the column.
+    :type column: str
+    :param value: The ledger's own code (or account, for counterparties) to set.
+    :type value: object
+    """
+    if column == 'name_ids':
+        ledger.set_name(row, ledger.strings[value])
+    elif column == 'amounts':
+        ledger.set_amount(row, value)
+    elif column == 'dates':
+        ledger.set_date(row, ledger.date_table[value])
+    elif column == 'account_ids':
+        ledger.set_account(row, value)
+    elif column == 'category_ids':
+        ledger.set_category(row, value)
+    elif column == 'counterparties':
+        ledger.set_counterparty(row, value)
+
+def set_row_alive(ledger : Ledger, row : int, alive : bool):
+    """Restore or release a row, adding or removing its view from the owning account.
+
+    :param ledger: The ledger.
+    :type ledger: Ledger
+    :param row: The row.
+    :type row: int
+    :param alive: True to restore the row, False to release it.
+    :type alive: bool
+    """
+    account = ledger.account_at(ledger.account_ids[row])
+    if alive:
+        ledger.restore(row)
+        if account is not None:
+            account.attach_row(row)
+    else:
+        if account is not None:
+            account.detach_row(row)
+        ledger.release(row)
+
+def set_object_added(person_manager : PersonManager, item, owner, added : bool):
+    """Add or remove a person from the manager, or an account from its owner.
+
+    :param person_manager: The manager of the people.
+    :type person_manager: PersonManager
+    :param item: The person or account.
+    :type item: Person or Account
+    :param owner: The owner of an account.
+    :type owner: Person
+    :param added: True to add the item, False to remove it.
+    :type added: bool
+    """
+    if isinstance(item, Person):
+        if added and item.manager is None:
+            person_manager.add_person(item)
+        elif not added and item.manager is person_manager:
+            person_manager.remove_person(item)
+    elif owner is not None:
+        if added and owner.get_account_by_id(item.account_id) is not item:
+            owner.add_account(item)
+        elif not added:
+            owner.detach_account(item)
+
+def set_object_name(item, name : str):
+    """
+    :param item: The person or account.
+    :type item: Person or Account
+    :param name: Name to set.
+    :type name: str
+    """
+    if isinstance(item, Person):
+        item.set_name(name)
+    else:
+        item.set_account_name(name)
+
+def snapshot_keys(person_manager : PersonManager) -> tuple[dict[object, int], dict[int, int]]:
+    """Keys of the people, accounts and rows a snapshot holds, numbered in the order it is saved.
+
+    Loading the snapshot and calling this again gives the same keys to the loaded objects.
+
+    :param person_manager: The people.
+    :type person_manager: PersonManager
+    :return: Key of each person and account, and key of each row.
+    :rtype: tuple[dict[object, int], dict[int, int]]
+    """
+    people = person_manager.get_people()
+    accounts = [account for person in people for account in person.get_accounts()]
+    object_keys = {item: key for key, item in enumerate(people + accounts)}
+    rows_by_account = persistence.group_rows_by_account(person_manager.get_ledger())
+    rows = [row for account in accounts for row in rows_by_account.get(account.account_id, ())]
+    return object_keys, {row: key for key, row in enumerate(rows)}
+
+def snapshot_path(log_path : str, generation : int) -> str:
+    """
+    :param log_path: The write-ahead log.
+    :type log_path: str
+    :param generation: Number of the snapshot.
+    :type generation: int
+    :return: File holding the snapshot.
+    :rtype: str
+    """
+    return f"{log_path}.{generation}.baln"
+
+def read_log(log_path : str) -> tuple[tuple[str, int], list[list[list]]]:
+    """Read a write-ahead log. A final line cut short by a crash is ignored.
+
+    :param log_path: The write-ahead log.
+    :type log_path: str
+    :return: (snapshot file, generation) the log follows, and the records of each logged step.
+    :rtype: tuple[tuple[str, int], list[list[list]]]
+    """
+    with open(log_path, encoding='utf-8') as file:
+        lines = file.read().split("\n")
+    header = json.loads(lines[0])
+    snapshot = os.path.join(os.path.dirname(log_path), header['snapshot'])
+    steps = []
+    for number, line in enumerate(lines[1:], start=2):
+        if not line:
+            continue
+        try:
+            steps.append(json.loads(line))
+        except ValueError:
+            if any(lines[number:]):
+                raise ValueError(f"{log_path} is corrupt at line {number}") from None
+    return (snapshot, header['generation']), steps
+
+def recover(log_path : str) -> tuple[PersonManager, CategoryManager]:
+    """Rebuild people and categories from a write-ahead log and its snapshot.
+
+    :param log_path: The log written by a :class:`Journal`.
+    :type log_path: str
+    :return: The recovered people and categories.
+    :rtype: tuple[PersonManager, CategoryManager]
+    """
+    (snapshot, _), steps = read_log(log_path)
+    person_manager, category_manager = persistence.load(snapshot)
+    recovery = Recovery(person_manager, category_manager)
+    for records in steps:
+        recovery.replay(records)
+    return person_manager, category_manager
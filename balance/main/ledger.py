@@ -0,0 +1,721 @@
+from array import array
+from contextlib import contextmanager
+from enum import Enum, IntEnum
+from itertools import compress, repeat
+from operator import eq, mul
+
+from .dates import TransactionDate, parse_date
+from .money import DEFAULT_CURRENCY
+
+class TransactionKind(IntEnum):
+    """Kind of a ledger row. The value is stored in the ``kinds`` column."""
+    TRANSACTION = 0
+    INCOME = 1
+    BILL = 2
+    TRANSFER_IN = 3
+    TRANSFER_OUT = 4
+
+    @property
+    def sign(self) -> int:
+        """
+        :return: Multiplier applied to the amount when totalling (money in is positive).
+        :rtype: int
+        """
+        return KIND_SIGNS[self]
+
+# Indexed by kind value.
+KIND_SIGNS = (1, 1, -1, 1, -1)
+
+NO_ACCOUNT = -1
+NO_CATEGORY = -1
+
+# Columns rewritten by Ledger.compact, besides account_ids and alive.
+ROW_COLUMNS = ('kinds', 'amounts', 'dates', 'days', 'category_ids', 'name_ids', 'periods')
+
+# Period of a transaction which recurs every month. Dated transactions, such as those imported from
+# a bank statement, store their month as YYYYMM instead.
+RECURRING = 0
+
+class Change(Enum):
+    """What happened to a person, account or category reported by :meth:`Ledger.notify_object_changed`."""
+    ADDED = 'added'
+    REMOVED = 'removed'
+    CHANGED = 'changed'
+
+class LedgerListener():
+    """Base class for objects notified of ledger changes.
+
+    Subscribe an instance with :meth:`Ledger.subscribe` and override the methods of interest.
+    Notifications are sent after the ledger has been updated.
+    """
+    def row_added(self, ledger : 'Ledger', row : int):
+        """
+        :param ledger: The ledger.
+        :type ledger: Ledger
+        :param row: The new row.
+        :type row: int
+        """
+
+    def row_released(self, ledger : 'Ledger', row : int):
+        """
+        :param ledger: The ledger.
+        :type ledger: Ledger
+        :param row: The row marked as removed.
+        :type row: int
+        """
+
+    def row_restored(self, ledger : 'Ledger', row : int):
+        """
+        :param ledger: The ledger.
+        :type ledger: Ledger
+        :param row: The row marked as live again.
+        :type row: int
+        """
+
+    def row_changed(self, ledger : 'Ledger', row : int, column : str, old_value):
+        """
+        :param ledger: The ledger.
+        :type ledger: Ledger
+        :param row: The changed row.
+        :type row: int
+        :param column: Name of the changed column (e.g. "amounts", "account_ids"), or "counterparties"
+            when the other account of a transfer changed.
+        :type column: str
+        :param old_value: The value held by the column before the change.
+        :type old_value: object
+        """
+
+    def account_owner_changed(self, ledger : 'Ledger', account, old_owner):
+        """
+        :param ledger: The ledger.
+        :type ledger: Ledger
+        :param account: The account whose owner changed.
+        :type account: Account
+        :param old_owner: The previous owner.
+        :type old_owner: Person
+        """
+
+    def object_changed(self, ledger : 'Ledger', item, change : Change):
+        """
+        :param ledger: The ledger.
+        :type ledger: Ledger
+        :param item: The person, account or category.
+        :type item: object
+        :param change: What happened to the object.
+        :type change: Change
+        """
+
+    def ledger_compacted(self, ledger : 'Ledger', rows : array):
+        """Called after :meth:`Ledger.compact` has renumbered the rows and accounts.
+
+        :param ledger: The ledger.
+        :type ledger: Ledger
+        :param rows: New number of each old row, or -1 for rows which were dropped.
+        :type rows: array
+        """
+
+    def batch_started(self, ledger : 'Ledger'):
+        """Called when the outermost :meth:`Ledger.batch` block is entered.
+
+        :param ledger: The ledger.
+        :type ledger: Ledger
+        """
+
+    def batch_finished(self, ledger : 'Ledger'):
+        """Called when the outermost :meth:`Ledger.batch` block is left.
+
+        :param ledger: The ledger.
+        :type ledger: Ledger
+        """
+
+class StringTable():
+    """Interned strings referenced by integer code."""
+    def __init__(self):
+        """Constructor."""
+        self.strings : list[str] = []
+        self.codes : dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def __getitem__(self, code : int) -> str:
+        return self.strings[code]
+
+    def code(self, string : str) -> int:
+        """
+        :param string: The string to intern.
+        :type string: str
+        :return: The code of the string, added to the table if new.
+        :rtype: int
+        """
+        code = self.codes.get(string)
+        if code is None:
+            code = len(self.strings)
+            self.strings.append(string)
+            self.codes[string] = code
+        return code
+
+class Ledger():
+    """Columnar store for transactions.
+
+    Every transaction is a row spread across typed arrays, so a ledger holding years
+    of history costs a handful of machine words per row rather than a Python object with a
+    ``__dict__``. ``Transaction`` objects are thin views holding a reference to the ledger
+    and their row number.
+
+    Rows are not moved once written; removing a transaction clears its ``alive`` flag so
+    existing views stay valid and the row can be restored later. :meth:`compact` reclaims the
+    removed rows when they are no longer needed.
+
+    Amounts are stored as whole minor units (pence, cents) of :attr:`currency` in a 64-bit
+    integer column, so totals over any number of rows are exact.
+
+    The columns of a ledger loaded by :func:`persistence.load` are views of the mapped file until
+    rows are first added, when they are copied into arrays (see :meth:`own_columns`).
+    """
+    def __init__(self):
+        """Constructor."""
+
+        # Columns, one entry per row.
+        self.kinds = array('b')
+        self.amounts = array('q')
+        self.dates = array('i')
+        self.days = array('b')
+        self.account_ids = array('i')
+        self.category_ids = array('i')
+        self.alive = array('b')
+        self.name_ids = array('i')
+        self.periods = array('i')
+
+        # Side tables referenced by the columns.
+        self.strings = StringTable()
+        self.date_table : list[TransactionDate] = []
+        self._date_codes : dict[TransactionDate, int] = {}
+        self.accounts : list = []
+        self.categories : list = []
+        self._category_codes : dict = {}
+        self.counterparties : dict[int, object] = {}
+        self.currency = DEFAULT_CURRENCY
+
+        # True while columns are views of a file loaded by persistence.load rather than arrays.
+        self.mapped = False
+
+        self.listeners : list[LedgerListener] = []
+        self.balances = None
+        self.index = None
+        self.cube = None
+        self.events = None
+        self.batch_depth = 0
+
+    def __len__(self) -> int:
+        """
+        :return: Number of rows, including removed rows.
+        :rtype: int
+        """
+        return len(self.kinds)
+
+    def subscribe(self, listener : LedgerListener):
+        """
+        :param listener: Listener to notify of changes.
+        :type listener: LedgerListener
+        """
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener : LedgerListener):
+        """
+        :param listener: Listener to stop notifying.
+        :type listener: LedgerListener
+        """
+        self.listeners.remove(listener)
+
+    def get_balances(self) -> 'BalanceEngine':
+        """Get the running totals for the ledger, creating them on first use.
+
+        :return: The balance engine subscribed to the ledger.
+        :rtype: BalanceEngine
+        """
+        if self.balances is None:
+            from .balances import BalanceEngine
+            self.balances = BalanceEngine(self)
+        return self.balances
+
+    def get_index(self) -> 'TransactionIndex':
+        """Get the secondary indexes for the ledger, building them on first use.
+
+        :return: The transaction index subscribed to the ledger.
+        :rtype: TransactionIndex
+        """
+        if self.index is None:
+            from .indexes import TransactionIndex
+            self.index = TransactionIndex(self)
+        return self.index
+
+    def get_cube(self) -> 'AggregationCube':
+        """Get the reporting totals for the ledger, building them on first use.
+
+        :return: The aggregation cube subscribed to the ledger.
+        :rtype: AggregationCube
+        """
+        if self.cube is None:
+            from .reports import AggregationCube
+            self.cube = AggregationCube(self)
+        return self.cube
+
+    def get_events(self) -> 'EventBus':
+        """Get the change events for the ledger and the objects using it, creating them on first use.
+
+        :return: The event bus subscribed to the ledger.
+        :rtype: EventBus
+        """
+        if self.events is None:
+            from .events import EventBus
+            self.events = EventBus(self)
+        return self.events
+
+    @contextmanager
+    def batch(self):
+        """Group changes so listeners can treat them as one. Blocks may be nested."""
+        self.batch_depth += 1
+        if self.batch_depth == 1:
+            for listener in self.listeners:
+                listener.batch_started(self)
+        try:
+            yield self
+        finally:
+            self.batch_depth -= 1
+            if self.batch_depth == 0:
+                for listener in self.listeners:
+                    listener.batch_finished(self)
+
+    def own_columns(self):
+        """Copy columns which are views of a loaded file into arrays, so that rows can be added."""
+        if not self.mapped:
+            return
+        for column in ROW_COLUMNS + ('account_ids', 'alive'):
+            values = getattr(self, column)
+            if not isinstance(values, array):
+                owned = array(values.format)
+                owned.frombytes(values.cast('B'))
+                setattr(self, column, owned)
+        self.mapped = False
+
+    def register_account(self, account) -> int:
+        """Register an account with the ledger.
+
+        :param account: The account to register.
+        :type account: Account
+        :return: The id used for the account in the ``account_ids`` column.
+        :rtype: int
+        """
+        self.accounts.append(account)
+        return len(self.accounts) - 1
+
+    def account_at(self, account_id : int):
+        """
+        :param account_id: Id returned by :meth:`register_account`.
+        :type account_id: int
+        :return: The registered account, or None.
+        :rtype: Account
+        """
+        if account_id == NO_ACCOUNT:
+            return None
+        return self.accounts[account_id]
+
+    def category_code(self, category) -> int:
+        """Get the id used for a category, registering it on first use.
+
+        :param category: The category, or None.
+        :type category: Category
+        :return: The id used for the category in the ``category_ids`` column.
+        :rtype: int
+        """
+        if category is None:
+            return NO_CATEGORY
+        code = self._category_codes.get(category)
+        if code is None:
+            code = len(self.categories)
+            self.categories.append(category)
+            self._category_codes[category] = code
+        return code
+
+    def find_category_code(self, category) -> int:
+        """
+        :param category: The category.
+        :type category: Category
+        :return: The id used for the category, or NO_CATEGORY if it has never been used.
+        :rtype: int
+        """
+        return self._category_codes.get(category, NO_CATEGORY)
+
+    def category_at(self, category_id : int):
+        """
+        :param category_id: Id returned by :meth:`category_code`.
+        :type category_id: int
+        :return: The category, or None.
+        :rtype: Category
+        """
+        if category_id == NO_CATEGORY:
+            return None
+        return self.categories[category_id]
+
+    def date_code(self, date) -> int:
+        """Parse and intern a date.
+
+        :param date: Date of the transaction (e.g. "1", "31", "Variable"), or a parsed date.
+        :type date: str or TransactionDate
+        :return: The id used for the date in the ``dates`` column.
+        :rtype: int
+        """
+        date = parse_date(date)
+        code = self._date_codes.get(date)
+        if code is None:
+            code = len(self.date_table)
+            self.date_table.append(date)
+            self._date_codes[date] = code
+        return code
+
+    def append(self, kind : TransactionKind, name : str, amount : int, date : str,
+               account_id : int = NO_ACCOUNT, category_id : int = NO_CATEGORY, period : int = RECURRING) -> int:
+        """Append a new row.
+
+        :param kind: The kind of transaction.
+        :type kind: TransactionKind
+        :param name: Description name for the transaction.
+        :type name: str
+        :param amount: Amount for the transaction in minor units.
+        :type amount: int
+        :param date: Date of the transaction.
+        :type date: str or TransactionDate
+        :param account_id: Id of the owning account, defaults to NO_ACCOUNT
+        :type account_id: int, optional
+        :param category_id: Id of the category, defaults to NO_CATEGORY
+        :type category_id: int, optional
+        :param period: Month of a dated transaction as YYYYMM, defaults to RECURRING
+        :type period: int, optional
+        :return: The row number.
+        :rtype: int
+        """
+        if self.mapped:
+            self.own_columns()
+        self.kinds.append(kind)
+        self.amounts.append(amount)
+        date_code = self.date_code(date)
+        self.dates.append(date_code)
+        self.days.append(self.date_table[date_code].day)
+        self.account_ids.append(account_id)
+        self.category_ids.append(category_id)
+        self.alive.append(1)
+        self.name_ids.append(self.strings.code(name))
+        self.periods.append(period)
+        row = len(self.kinds) - 1
+        for listener in self.listeners:
+            listener.row_added(self, row)
+        return row
+
+    def extend(self, records, account_id : int = NO_ACCOUNT, category_id : int = NO_CATEGORY) -> range:
+        """Append many rows for one account.
+
+        :param records: Iterable of (kind, name, amount, date, period) tuples, amounts in minor units.
+        :type records: Iterable[tuple]
+        :param account_id: Id of the owning account, defaults to NO_ACCOUNT
+        :type account_id: int, optional
+        :param category_id: Id of the category, defaults to NO_CATEGORY
+        :type category_id: int, optional
+        :return: The new row numbers.
+        :rtype: range
+        """
+        self.own_columns()
+        first = len(self.kinds)
+        date_code = self.date_code
+        string_code = self.strings.code
+        date_days = self.date_table
+        for kind, name, amount, date, period in records:
+            code = date_code(date)
+            self.amounts.append(amount)
+            self.kinds.append(kind)
+            self.dates.append(code)
+            self.days.append(date_days[code].day)
+            self.name_ids.append(string_code(name))
+            self.periods.append(period)
+        added = len(self.kinds) - first
+        self.account_ids.extend(repeat(account_id, added))
+        self.category_ids.extend(repeat(category_id, added))
+        self.alive.extend(repeat(1, added))
+        rows = range(first, first + added)
+        with self.batch():
+            for listener in self.listeners:
+                for row in rows:
+                    listener.row_added(self, row)
+        return rows
+
+    def get_name(self, row : int) -> str:
+        """
+        :param row: The row number.
+        :type row: int
+        :return: The name of the row.
+        :rtype: str
+        """
+        return self.strings[self.name_ids[row]]
+
+    def get_date(self, row : int) -> str:
+        """
+        :param row: The row number.
+        :type row: int
+        :return: The date string for the row.
+        :rtype: str
+        """
+        return self.date_table[self.dates[row]].text
+
+    def get_parsed_date(self, row : int) -> TransactionDate:
+        """
+        :param row: The row number.
+        :type row: int
+        :return: The parsed date for the row.
+        :rtype: TransactionDate
+        """
+        return self.date_table[self.dates[row]]
+
+    def set_name(self, row : int, name : str):
+        """
+        :param row: The row number.
+        :type row: int
+        :param name: The name to set.
+        :type name: str
+        """
+        old_value = self.name_ids[row]
+        self.name_ids[row] = self.strings.code(name)
+        for listener in self.listeners:
+            listener.row_changed(self, row, 'name_ids', old_value)
+
+    def set_amount(self, row : int, amount : int):
+        """
+        :param row: The row number.
+        :type row: int
+        :param amount: The amount to set in minor units.
+        :type amount: int
+        """
+        old_value = self.amounts[row]
+        self.amounts[row] = amount
+        for listener in self.listeners:
+            listener.row_changed(self, row, 'amounts', old_value)
+
+    def set_date(self, row : int, date : str):
+        """
+        :param row: The row number.
+        :type row: int
+        :param date: The date to set.
+        :type date: str or TransactionDate
+        """
+        old_value = self.dates[row]
+        self.dates[row] = self.date_code(date)
+        self.days[row] = self.date_table[self.dates[row]].day
+        for listener in self.listeners:
+            listener.row_changed(self, row, 'dates', old_value)
+
+    def set_account(self, row : int, account_id : int):
+        """
+        :param row: The row number.
+        :type row: int
+        :param account_id: Id of the account to set.
+        :type account_id: int
+        """
+        old_value = self.account_ids[row]
+        self.account_ids[row] = account_id
+        for listener in self.listeners:
+            listener.row_changed(self, row, 'account_ids', old_value)
+
+    def set_category(self, row : int, category_id : int):
+        """
+        :param row: The row number.
+        :type row: int
+        :param category_id: Id of the category to set.
+        :type category_id: int
+        """
+        old_value = self.category_ids[row]
+        self.category_ids[row] = category_id
+        for listener in self.listeners:
+            listener.row_changed(self, row, 'category_ids', old_value)
+
+    def set_counterparty(self, row : int, account):
+        """
+        :param row: The row number of a transfer.
+        :type row: int
+        :param account: The other account of the transfer, or None.
+        :type account: Account
+        """
+        old_value = self.counterparties.get(row)
+        if account is None:
+            self.counterparties.pop(row, None)
+        else:
+            self.counterparties[row] = account
+        for listener in self.listeners:
+            listener.row_changed(self, row, 'counterparties', old_value)
+
+    def release(self, row : int):
+        """Mark a row as removed. The row data is kept so that views remain readable.
+
+        :param row: The row number.
+        :type row: int
+        """
+        if not self.alive[row]:
+            return
+        self.alive[row] = 0
+        for listener in self.listeners:
+            listener.row_released(self, row)
+
+    def restore(self, row : int):
+        """Mark a previously released row as live again.
+
+        :param row: The row number.
+        :type row: int
+        """
+        if self.alive[row]:
+            return
+        self.alive[row] = 1
+        for listener in self.listeners:
+            listener.row_restored(self, row)
+
+    def notify_account_owner_changed(self, account, old_owner):
+        """Tell listeners an account registered with the ledger has a new owner.
+
+        :param account: The account whose owner changed.
+        :type account: Account
+        :param old_owner: The previous owner.
+        :type old_owner: Person
+        """
+        for listener in self.listeners:
+            listener.account_owner_changed(self, account, old_owner)
+
+    def notify_object_changed(self, item, change : Change):
+        """Tell listeners a person, account or category using the ledger has changed.
+
+        :param item: The person, account or category.
+        :type item: object
+        :param change: What happened to the object.
+        :type change: Change
+        """
+        for listener in self.listeners:
+            listener.object_changed(self, item, change)
+
+    def compact(self) -> tuple[array, list[int]]:
+        """Drop removed rows, and the slots of accounts since registered with another ledger.
+
+        Live rows keep their order but are renumbered, and the accounts still registered here get
+        new ids. Listeners are told through :meth:`LedgerListener.ledger_compacted`. Transaction
+        views and the people indexing accounts by id are not updated; use
+        :meth:`PersonManager.compact`, which does, rather than calling this directly. Strings,
+        dates and categories are kept.
+
+        :return: New number of each old row, or -1 for dropped rows, and new id of each old
+            account slot, or NO_ACCOUNT for dropped slots.
+        :rtype: tuple[array, list[int]]
+        """
+        self.own_columns()
+        account_map = []
+        accounts = []
+        for account_id, account in enumerate(self.accounts):
+            if account.get_ledger() is self and account.account_id == account_id:
+                account_map.append(len(accounts))
+                accounts.append(account)
+            else:
+                account_map.append(NO_ACCOUNT)
+        for account_id, account in enumerate(accounts):
+            account.account_id = account_id
+        self.accounts = accounts
+
+        alive = self.alive
+        rows = array('i', repeat(-1, len(alive)))
+        for new_row, row in enumerate(self.live_rows()):
+            rows[row] = new_row
+        for column in ROW_COLUMNS:
+            values = getattr(self, column)
+            setattr(self, column, array(values.typecode, compress(values, alive)))
+        self.account_ids = array('i', (NO_ACCOUNT if account_id == NO_ACCOUNT else account_map[account_id]
+                                       for account_id in compress(self.account_ids, alive)))
+        self.counterparties = {rows[row]: account for row, account in self.counterparties.items() if rows[row] >= 0}
+        self.alive = array('b', bytes([1])) * len(self.kinds)
+
+        for listener in self.listeners:
+            listener.ledger_compacted(self, rows)
+        return rows, account_map
+
+    def live_rows(self):
+        """
+        :return: Iterator of the row numbers not marked as removed.
+        :rtype: Iterator[int]
+        """
+        return compress(range(len(self.kinds)), self.alive)
+
+    def signed_amounts(self):
+        """
+        :return: Iterator of amounts in minor units with the kind sign applied, and zero for removed rows.
+        :rtype: Iterator[int]
+        """
+        signs = map(KIND_SIGNS.__getitem__, self.kinds)
+        return map(mul, map(mul, self.amounts, signs), self.alive)
+
+    def total_for_account(self, account_id : int) -> int:
+        """
+        :param account_id: Id of the account.
+        :type account_id: int
+        :return: Net total of all live rows for the account, in minor units.
+        :rtype: int
+        """
+        selector = map(eq, self.account_ids, repeat(account_id))
+        return sum(compress(self.signed_amounts(), selector))
+
+    def totals_by_account(self) -> dict[int, int]:
+        """
+        :return: Net total of all live rows in minor units, keyed by account id.
+        :rtype: dict[int, int]
+        """
+        totals : dict[int, int] = {}
+        for account_id, amount in zip(self.account_ids, self.signed_amounts()):
+            totals[account_id] = totals.get(account_id, 0) + amount
+        return totals
+
+    def rows_for_account(self, account_id : int, kind : TransactionKind = None) -> list[int]:
+        """
+        :param account_id: Id of the account.
+        :type account_id: int
+        :param kind: Restrict to a kind of transaction, defaults to None
+        :type kind: TransactionKind, optional
+        :return: Live row numbers for the account.
+        :rtype: list[int]
+        """
+        selector = map(eq, self.account_ids, repeat(account_id))
+        rows = compress(range(len(self.kinds)), map(mul, selector, self.alive))
+        if kind is None:
+            return list(rows)
+        kinds = self.kinds
+        return [row for row in rows if kinds[row] == kind]
+
+    def sort_rows_by_date(self, rows = None) -> list[int]:
+        """Sort rows by due date: fixed days first, then each schedule in :class:`Schedule` order.
+
+        :param rows: Rows to sort, defaults to every live row.
+        :type rows: Iterable[int], optional
+        :return: The sorted rows.
+        :rtype: list[int]
+        """
+        if rows is None:
+            rows = self.live_rows()
+        keys = [date.sort_key for date in self.date_table]
+        dates = self.dates
+        return sorted(rows, key=lambda row: keys[dates[row]])
+
+    def group_rows_by_day(self, rows = None) -> dict[int, list[int]]:
+        """Bucket rows by day of the month.
+
+        :param rows: Rows to group, defaults to every live row.
+        :type rows: Iterable[int], optional
+        :return: Rows keyed by day (1-31). Rows without a fixed day are under 0.
+        :rtype: dict[int, list[int]]
+        """
+        if rows is None:
+            rows = self.live_rows()
+        days = self.days
+        grouped : dict[int, list[int]] = {}
+        for row in rows:
+            grouped.setdefault(days[row], []).append(row)
+        return grouped
@@ -1,7 +1,18 @@
+import time
+
+# Taken before the Qt and domain imports so that they count towards the startup metrics.
+STARTED = time.perf_counter()
+
+import json
+import os
 import sys
-from PySide6 import QtCore, QtWidgets
-from PySide6.QtGui import QColor
-from base_classes import Person, PersonManager, Account
+from collections import OrderedDict
+from PySide6 import QtCore, QtGui, QtWidgets
+from .base_classes import Person, PersonManager, Account
+from .instrumentation import get_recorder
+from .journal import Journal
+from .models import AccountListModel, PersonListModel, TransactionTableModel
+from .search import SearchIndex, SearchResult, ACCOUNT, PERSON, TRANSACTION
 
 class Toolbar(QtWidgets.QWidget):
     def __init__(self):
@@ -15,6 +26,79 @@ class Toolbar(QtWidgets.QWidget):
         button = ToolbarButton(display_text)
         self.toolbar_layout.addWidget(button)
         return button
+
+    def create_page_button(self, display_text : str, pages : 'PageStack', factory) -> QtWidgets.QPushButton:
+        """Add a button showing a page which is only built the first time the button is clicked.
+
+        :param display_text: Text of the button, also used as the page name.
+        :type display_text: str
+        :param pages: The stack holding the page.
+        :type pages: PageStack
+        :param factory: Called with no arguments to build the page.
+        :type factory: Callable[[], QWidget]
+        :return: The button.
+        :rtype: QPushButton
+        """
+        pages.register_page(display_text, factory)
+        button = self.create_toolbar_button(display_text)
+        button.clicked.connect(lambda: pages.show_page(display_text))
+        return button
+
+class PageStack(QtWidgets.QStackedWidget):
+    """Stacked widget whose pages are built on first use."""
+    def __init__(self, parent : QtWidgets.QWidget = None):
+        """
+        :param parent: Parent widget, defaults to None
+        :type parent: QWidget, optional
+        """
+        super().__init__(parent)
+        self.factories : dict[str, object] = {}
+        self.pages : dict[str, QtWidgets.QWidget] = {}
+        self.build_seconds : dict[str, float] = {}
+
+    def register_page(self, name : str, factory):
+        """
+        :param name: Name of the page.
+        :type name: str
+        :param factory: Called with no arguments to build the page.
+        :type factory: Callable[[], QWidget]
+        """
+        self.factories[name] = factory
+
+    def get_page(self, name : str) -> QtWidgets.QWidget:
+        """
+        :param name: Name of a registered page.
+        :type name: str
+        :return: The page, built and added to the stack if this is the first request.
+        :rtype: QWidget
+        """
+        page = self.pages.get(name)
+        if page is None:
+            started = time.perf_counter()
+            page = self.pages[name] = self.factories[name]()
+            self.addWidget(page)
+            self.build_seconds[name] = time.perf_counter() - started
+        return page
+
+    def is_built(self, name : str) -> bool:
+        """
+        :param name: Name of a registered page.
+        :type name: str
+        :return: True if the page has been built.
+        :rtype: bool
+        """
+        return name in self.pages
+
+    def show_page(self, name : str) -> QtWidgets.QWidget:
+        """
+        :param name: Name of a registered page.
+        :type name: str
+        :return: The page now shown.
+        :rtype: QWidget
+        """
+        page = self.get_page(name)
+        self.setCurrentWidget(page)
+        return page
     
 class ToolbarButton(QtWidgets.QPushButton):
     def __init__(self, text : str):
@@ -42,68 +126,172 @@ class WidgetItemPersonDetailsPanel(QtWidgets.QWidget):
         
         self.person = person
         self.main_layout = QtWidgets.QVBoxLayout(self)
-        name_layout = QtWidgets.QHBoxLayout(self)
+        name_layout = QtWidgets.QHBoxLayout()
         label_name = QtWidgets.QLabel(self.person.get_name())
         self.label_name_val = QtWidgets.QLabel("")
         name_layout.addWidget(label_name)
         name_layout.addWidget(self.label_name_val)
 
-        layout_account_details = QtWidgets.QVBoxLayout(self)
-        layout_add_new_account = QtWidgets.QHBoxLayout(self)
+        layout_account_details = QtWidgets.QVBoxLayout()
+        layout_add_new_account = QtWidgets.QHBoxLayout()
         self.input_new_account = QtWidgets.QLineEdit(placeholderText="Enter Account Name")
         self.input_new_account.setFixedWidth(300)
         self.btn_new_account = QtWidgets.QPushButton("+")
         self.btn_new_account.setFixedSize(30, 30)
         self.btn_new_account.clicked.connect(lambda: self.create_account(self.input_new_account.text()))
+        self.btn_remove_account = QtWidgets.QPushButton("-")
+        self.btn_remove_account.setFixedSize(30, 30)
+        self.btn_remove_account.clicked.connect(self.remove_account)
         
         layout_add_new_account.addWidget(self.input_new_account)
         layout_add_new_account.addWidget(self.btn_new_account)
+        layout_add_new_account.addWidget(self.btn_remove_account)
         layout_account_details.addLayout(layout_add_new_account)
 
         label_accounts = QtWidgets.QLabel("Accounts")
-        self.layout_account_list = QtWidgets.QVBoxLayout(self)
-        self.layout_account_list.setAlignment(QtCore.Qt.AlignmentFlag.AlignTop)
+        self.account_model = AccountListModel(self.person)
+        self.account_list = QtWidgets.QListView()
+        self.account_list.setModel(self.account_model)
+        self.account_list.setUniformItemSizes(True)
+        self.account_list.selectionModel().currentChanged.connect(self.show_account)
+
+        label_transactions = QtWidgets.QLabel("Transactions")
+        self.transaction_model = TransactionTableModel()
+        self.transaction_table = QtWidgets.QTableView()
+        self.transaction_table.setModel(self.transaction_model)
+        self.transaction_table.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.Fixed)
+        self.transaction_table.horizontalHeader().setStretchLastSection(True)
         
         layout_account_details.addWidget(label_accounts)
-        layout_account_details.addLayout(self.layout_account_list)
-
-        self.load_person()
+        layout_account_details.addWidget(self.account_list)
+        layout_account_details.addWidget(label_transactions)
+        layout_account_details.addWidget(self.transaction_table)
+
+        layout_import = QtWidgets.QHBoxLayout()
+        self.btn_import = QtWidgets.QPushButton("Import Statement")
+        self.btn_import.clicked.connect(self.choose_statement)
+        self.import_progress = QtWidgets.QProgressBar()
+        self.import_progress.hide()
+        self.btn_cancel_import = QtWidgets.QPushButton("Cancel")
+        self.btn_cancel_import.hide()
+        layout_import.addWidget(self.btn_import)
+        layout_import.addWidget(self.import_progress)
+        layout_import.addWidget(self.btn_cancel_import)
+        layout_account_details.addLayout(layout_import)
+        self.import_task : 'Task' = None
         
         self.main_layout.addLayout(name_layout)
         self.main_layout.addLayout(layout_account_details)
     
-    def create_account(self, account_name : str):
-        new_account = self.person.create_account(account_name)
-        new_widget = WidgetItemAccount(new_account)
-        new_widget.btn_remove.clicked.connect(lambda: self.remove_account(self.remove_account(new_widget)))
-        self.layout_account_list.addWidget(new_widget)
+    def create_account(self, account_name : str) -> Account:
+        """
+        :param account_name: Name of the account to create.
+        :type account_name: str
+        :return: The created account.
+        :rtype: Account
+        """
+        return self.account_model.create_account(account_name)
 
-    def add_account_widget(self, account : Account):
-        new_widget = WidgetItemAccount(account)
-        new_widget.btn_remove.clicked.connect(lambda: self.remove_account(self.remove_account(new_widget)))
-        self.layout_account_list.addWidget(new_widget)
+    def show_account(self, index : QtCore.QModelIndex):
+        """
+        :param index: Index of the account whose transactions are shown.
+        :type index: QModelIndex
+        """
+        self.transaction_model.set_account(self.account_model.get_account(index))
 
-    def load_person(self):
-        for account in self.person.get_accounts():
-            self.add_account_widget(account)
+    def select_account(self, account : Account):
+        """
+        :param account: One of the person's accounts to select and show.
+        :type account: Account
+        """
+        if account in self.account_model.accounts:
+            self.account_list.setCurrentIndex(self.account_model.index(self.account_model.accounts.index(account)))
 
-    def remove_account(self, widget_account : 'WidgetItemAccount'):
-        # Delete account 
-        self.layout_account_list.removeWidget(widget_account)
-        widget_account.deleteLater()
+    def load_person(self):
+        """Re-read the person's accounts."""
+        self.account_model.reload()
+        self.transaction_model.set_account(None)
+
+    def choose_statement(self):
+        """Ask for a statement file and import it into the selected account."""
+        account = self.account_model.get_account(self.account_list.currentIndex())
+        if account is None or self.import_task is not None:
+            return
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Import Statement", "",
+                                                        "Statements (*.csv *.ofx *.qfx);;All Files (*)")
+        if path:
+            self.import_statement(path, account)
+
+    def import_statement(self, path : str, account : Account) -> 'Task':
+        """Parse a statement on a worker thread, then add it to the account on the GUI thread.
+
+        :param path: The statement file.
+        :type path: str
+        :param account: The account receiving the transactions.
+        :type account: Account
+        :return: The parsing task.
+        :rtype: Task
+        """
+        # Imported here: the importer and its worker pool are not needed until the first statement.
+        from .tasks import get_scheduler, parse_statement_task
+        task = get_scheduler().submit(parse_statement_task, path, name=f"Import {path}")
+        task.progress.connect(self.show_import_progress)
+        task.succeeded.connect(lambda chunk: account.add_transactions(chunk.records()))
+        task.failed.connect(lambda error: QtWidgets.QMessageBox.warning(self, "Import Failed", str(error)))
+        task.finished.connect(self.finish_import)
+        self.btn_cancel_import.clicked.connect(task.cancel)
+
+        self.import_task = task
+        self.btn_import.setEnabled(False)
+        self.import_progress.setRange(0, 0)
+        self.import_progress.show()
+        self.btn_cancel_import.show()
+        return task
+
+    def show_import_progress(self, done : int, total : int):
+        """
+        :param done: Rows parsed so far.
+        :type done: int
+        :param total: Rows in total, or 0 when unknown.
+        :type total: int
+        """
+        self.import_progress.setRange(0, total)
+        self.import_progress.setValue(done)
+        self.import_progress.setFormat(f"{done} rows" if not total else "%p%")
+
+    def finish_import(self):
+        """Reset the import controls once the task has ended."""
+        self.btn_cancel_import.clicked.disconnect(self.import_task.cancel)
+        self.import_task = None
+        self.btn_import.setEnabled(True)
+        self.import_progress.hide()
+        self.btn_cancel_import.hide()
+
+    def remove_account(self):
+        """Remove the selected account."""
+        index = self.account_list.currentIndex()
+        if self.account_model.get_account(index) is self.transaction_model.account:
+            self.transaction_model.set_account(None)
+        self.account_model.remove_account(index)
    
 class WidgetItemPersonPanel(QtWidgets.QWidget):
-    def __init__(self):
+    def __init__(self, person_model : PersonListModel):
+        """
+        :param person_model: The people to list.
+        :type person_model: PersonListModel
+        """
         super().__init__()
         
         self.setFixedWidth(400)
         self.main_panel = QtWidgets.QVBoxLayout(self)
         self.main_panel.setAlignment(QtCore.Qt.AlignmentFlag.AlignTop)
-        new_person_dialog = QtWidgets.QHBoxLayout(self)
+        new_person_dialog = QtWidgets.QHBoxLayout()
         self.main_panel.addLayout(new_person_dialog)
 
-        self.person_list = QtWidgets.QVBoxLayout(self)
-        self.main_panel.addLayout(self.person_list)
+        self.person_list = QtWidgets.QListView()
+        self.person_list.setModel(person_model)
+        self.person_list.setUniformItemSizes(True)
+        self.main_panel.addWidget(self.person_list)
 
         self.input_dialog = QtWidgets.QLineEdit(placeholderText="Add New Person")
         self.input_dialog.setFixedHeight(30)
@@ -115,79 +303,199 @@ class WidgetItemPersonPanel(QtWidgets.QWidget):
         
         new_person_dialog.addWidget(self.btn_add_person)
 
+        self.btn_remove_person = QtWidgets.QPushButton("-")
+        self.btn_remove_person.setFixedHeight(30)
+        self.btn_remove_person.setFixedWidth(60)
+
+        new_person_dialog.addWidget(self.btn_remove_person)
+
+class WidgetSearch(QtWidgets.QWidget):
+    result_activated = QtCore.Signal(object)
+
+    def __init__(self, search_index : SearchIndex, limit : int = 50):
+        """
+        :param search_index: The index searched as the user types.
+        :type search_index: SearchIndex
+        :param limit: Most results listed, defaults to 50
+        :type limit: int, optional
+        """
+        super().__init__()
+
+        self.search_index = search_index
+        self.limit = limit
+        self.results : list[SearchResult] = []
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.input_search = QtWidgets.QLineEdit(placeholderText="Search people, accounts and transactions")
+        self.input_search.setFixedHeight(30)
+        self.input_search.setClearButtonEnabled(True)
+        self.input_search.textChanged.connect(self.search)
+        self.result_list = QtWidgets.QListWidget()
+        self.result_list.setUniformItemSizes(True)
+        self.result_list.itemActivated.connect(lambda item: self.activate(self.result_list.row(item)))
+        self.result_list.itemClicked.connect(lambda item: self.activate(self.result_list.row(item)))
+        self.result_list.hide()
+        layout.addWidget(self.input_search)
+        layout.addWidget(self.result_list)
+
+    def search(self, text : str):
+        """
+        :param text: The text typed so far.
+        :type text: str
+        """
+        self.results = self.search_index.search(text, limit=self.limit)
+        self.result_list.clear()
+        for result in self.results:
+            suffix = f" ({result.count})" if result.kind == TRANSACTION else ""
+            self.result_list.addItem(f"{result.kind.capitalize()}: {result.name}{suffix}")
+        self.result_list.setVisible(bool(self.results))
+
+    def activate(self, row : int):
+        """
+        :param row: Row of the chosen result in the list.
+        :type row: int
+        """
+        if 0 <= row < len(self.results):
+            self.result_activated.emit(self.results[row])
+
 class WidgetPeopleManager(QtWidgets.QWidget):
-    def __init__(self):
+    def __init__(self, panel_cache_size : int = 8):
+        """
+        :param panel_cache_size: Number of detail panels kept alive for quick switching, defaults to 8
+        :type panel_cache_size: int, optional
+        """
         super().__init__()
         
         self.person_manager = PersonManager()
+        self.person_model = PersonListModel(self.person_manager)
+        self.journal = Journal(self.person_manager)
+        self.search_index = SearchIndex(self.person_manager)
+        QtGui.QShortcut(QtGui.QKeySequence.StandardKey.Undo, self).activated.connect(self.journal.undo)
+        QtGui.QShortcut(QtGui.QKeySequence.StandardKey.Redo, self).activated.connect(self.journal.redo)
 
         self.master_container = QtWidgets.QHBoxLayout(self)
         
-        self.user_panel = WidgetItemPersonPanel()
+        self.user_panel = WidgetItemPersonPanel(self.person_model)
         self.user_panel.btn_add_person.clicked.connect(lambda : self.add_person(self.user_panel.input_dialog.text()))
+        self.user_panel.btn_remove_person.clicked.connect(self.remove_person)
+        self.user_panel.person_list.clicked.connect(
+            lambda index: self.load_person(self.person_model.get_person(index)))
+        self.search = WidgetSearch(self.search_index)
+        self.search.result_activated.connect(self.show_result)
+        self.user_panel.main_panel.insertWidget(0, self.search)
         self.master_container.addWidget(self.user_panel)
 
+        # Detail panels live in a stack so switching person only changes the visible page.
+        self.details_stack = QtWidgets.QStackedWidget()
+        self.details_stack.hide()
+        self.master_container.addWidget(self.details_stack)
+
         self.details : WidgetItemPersonDetailsPanel = None
+        self.panel_cache_size = panel_cache_size
+        self.panels : OrderedDict[Person, WidgetItemPersonDetailsPanel] = OrderedDict()
 
         self.master_container.setAlignment(QtCore.Qt.AlignmentFlag.AlignTop)
         self.master_container.addStretch(1)
     
     def load_person(self, person : 'Person'):
-        
-        if self.details:
-            self.master_container.removeWidget(self.details)
-            self.details.deleteLater()
-        
-        self.details = WidgetItemPersonDetailsPanel(person)
-        self.master_container.insertWidget(1, self.details)
-        
-    def add_person(self, name : str):
-        
-        new_person = self.person_manager.add_person_by_name(name)
-        new_person_widget = WidgetItemPerson(new_person)
-        
-        self.user_panel.person_list.addWidget(new_person_widget)
-
-        new_person_widget.btn.clicked.connect(lambda: self.load_person(new_person))
-        new_person_widget.btn_remove.clicked.connect(lambda: self.remove_person(new_person_widget))
-
-        return new_person_widget
-    
-    def remove_person(self, widget : 'WidgetItemPerson'):
-        
-        self.widget = widget
-        self.person_manager.remove_person(widget.person)
-        self.user_panel.person_list.removeWidget(self.widget)
-        widget.deleteLater()
-
-class WidgetItem(QtWidgets.QWidget):
-    def __init__(self): 
-        super().__init__()
-        
-        layout = QtWidgets.QHBoxLayout(self)
-        layout.setAlignment(QtCore.Qt.AlignmentFlag.AlignLeft)
-        
-        self.btn = QtWidgets.QPushButton("")
-        self.btn.setMinimumWidth(100)
-
-        self.btn_remove = QtWidgets.QPushButton("-")
+        """Show the details of a person, reusing a cached panel when there is one.
 
-        layout.addWidget(self.btn)
-        layout.addWidget(self.btn_remove)
-
-class WidgetItemPerson(WidgetItem):
-    def __init__(self, person : Person):
-        super().__init__()
+        :param person: The person to show, or None to hide the details.
+        :type person: Person
+        """
+        if person is None:
+            self.details = None
+            self.details_stack.hide()
+            return
+
+        panel = self.panels.get(person)
+        if panel is None:
+            panel = WidgetItemPersonDetailsPanel(person)
+            self.panels[person] = panel
+            self.details_stack.addWidget(panel)
+            self.trim_panel_cache(keep=person)
+        else:
+            self.panels.move_to_end(person)
+
+        self.details = panel
+        self.details_stack.setCurrentWidget(panel)
+        self.details_stack.show()
+
+    def show_result(self, result : SearchResult):
+        """Show the person, and account, holding a search result.
+
+        :param result: The chosen result.
+        :type result: SearchResult
+        """
+        account = None
+        if result.kind == PERSON:
+            person = result.item
+        elif result.kind == ACCOUNT:
+            account = result.item
+        elif result.kind == TRANSACTION:
+            transactions = self.search_index.get_transactions(result.item)
+            account = transactions[0].get_account() if transactions else None
+        if account is not None:
+            person = account.get_account_owner()
+        elif result.kind != PERSON:
+            return
+        if person is None or person.manager is not self.person_manager:
+            return
+        self.load_person(person)
+        if account is not None:
+            self.details.select_account(account)
+
+    def set_panel_cache_size(self, size : int):
+        """
+        :param size: Number of detail panels to keep, at least one.
+        :type size: int
+        """
+        self.panel_cache_size = max(1, size)
+        self.trim_panel_cache(keep=self.details.person if self.details else None)
 
-        self.person = person
-        self.btn.setText(self.person.get_name())
+    def trim_panel_cache(self, keep : Person = None):
+        """Discard the least recently shown panels beyond the cache size.
 
-class WidgetItemAccount(WidgetItem):
-    def __init__(self, account : Account):
-        super().__init__()
+        :param keep: A person whose panel must not be discarded, defaults to None
+        :type keep: Person, optional
+        """
+        for person in list(self.panels):
+            if len(self.panels) <= self.panel_cache_size:
+                break
+            if person is not keep:
+                self.evict_panel(person)
 
-        self.account = account
-        self.btn.setText(self.account.get_account_name())
+    def evict_panel(self, person : Person):
+        """
+        :param person: The person whose cached panel is discarded.
+        :type person: Person
+        """
+        panel = self.panels.pop(person, None)
+        if panel is None:
+            return
+        if panel is self.details:
+            self.load_person(None)
+        self.details_stack.removeWidget(panel)
+        panel.deleteLater()
+        
+    def add_person(self, name : str) -> Person:
+        """
+        :param name: Name of the person to create.
+        :type name: str
+        :return: The created person.
+        :rtype: Person
+        """
+        return self.person_model.add_person(name)
+    
+    def remove_person(self):
+        """Remove the selected person."""
+        index = self.user_panel.person_list.currentIndex()
+        person = self.person_model.get_person(index)
+        if person is None:
+            return
+        self.evict_panel(person)
+        self.person_model.remove_person(index)
 
 class WidgetSettings(QtWidgets.QWidget):
     def __init__(self):
@@ -197,15 +505,118 @@ class WidgetSettings(QtWidgets.QWidget):
         title = QtWidgets.QLabel("Settings")
         layout.addWidget(title)        
 
+        recorder = get_recorder()
+        label_instrumentation = QtWidgets.QLabel("Performance")
+        layout.addWidget(label_instrumentation)
+        self.check_record = QtWidgets.QCheckBox("Record timings and widget counts")
+        self.check_record.setChecked(recorder.enabled)
+        self.check_record.toggled.connect(self.set_recording)
+        self.check_profile = QtWidgets.QCheckBox("Profile with cProfile")
+        self.check_profile.setChecked(recorder.is_profiling())
+        self.check_profile.toggled.connect(self.set_profiling)
+        self.check_memory = QtWidgets.QCheckBox("Trace memory allocations with tracemalloc")
+        self.check_memory.setChecked(recorder.is_tracing_memory())
+        self.check_memory.toggled.connect(self.set_memory_tracing)
+        layout.addWidget(self.check_record)
+        layout.addWidget(self.check_profile)
+        layout.addWidget(self.check_memory)
+
+        layout_buttons = QtWidgets.QHBoxLayout()
+        self.btn_refresh = QtWidgets.QPushButton("Refresh")
+        self.btn_refresh.clicked.connect(self.refresh_report)
+        self.btn_reset = QtWidgets.QPushButton("Reset")
+        self.btn_reset.clicked.connect(self.reset_report)
+        self.btn_export = QtWidgets.QPushButton("Export...")
+        self.btn_export.clicked.connect(self.choose_export)
+        layout_buttons.addWidget(self.btn_refresh)
+        layout_buttons.addWidget(self.btn_reset)
+        layout_buttons.addWidget(self.btn_export)
+        layout_buttons.addStretch(1)
+        layout.addLayout(layout_buttons)
+
+        self.report = QtWidgets.QPlainTextEdit()
+        self.report.setReadOnly(True)
+        self.report.setFont(QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.SystemFont.FixedFont))
+        layout.addWidget(self.report)
+
+        # Refresh the report once a second while recording, and only then.
+        self.refresh_timer = QtCore.QTimer(self)
+        self.refresh_timer.setInterval(1000)
+        self.refresh_timer.timeout.connect(self.refresh_report)
+        if recorder.enabled:
+            self.refresh_timer.start()
+        self.refresh_report()
+
+    def set_recording(self, enabled : bool):
+        """
+        :param enabled: Start recording spans and counters, or stop.
+        :type enabled: bool
+        """
+        if enabled:
+            get_recorder().enable()
+            self.refresh_timer.start()
+        else:
+            get_recorder().disable()
+            self.refresh_timer.stop()
+        self.refresh_report()
+
+    def set_profiling(self, enabled : bool):
+        """
+        :param enabled: Start a cProfile capture, or stop it and show the result.
+        :type enabled: bool
+        """
+        if enabled:
+            get_recorder().start_profiling()
+        else:
+            get_recorder().stop_profiling()
+        self.refresh_report()
+
+    def set_memory_tracing(self, enabled : bool):
+        """
+        :param enabled: Start tracing allocations, or stop and show the largest allocation sites.
+        :type enabled: bool
+        """
+        if enabled:
+            get_recorder().start_memory_trace()
+        else:
+            get_recorder().stop_memory_trace()
+        self.refresh_report()
+
+    def refresh_report(self):
+        """Show the latest p50/p99 latencies, counters and profiler captures."""
+        recorder = get_recorder()
+        sections = [recorder.format_report()]
+        if recorder.profile_report:
+            sections.append(recorder.profile_report)
+        if recorder.memory_report:
+            sections.append("\n".join(recorder.memory_report))
+        self.report.setPlainText("\n\n".join(sections))
+
+    def reset_report(self):
+        """Forget everything recorded so far."""
+        get_recorder().reset()
+        self.refresh_report()
+
+    def choose_export(self):
+        """Ask for a file and export the report to it as JSON."""
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Export Timings", "timings.json",
+                                                        "JSON (*.json);;All Files (*)")
+        if path:
+            get_recorder().export(path)
+
 class MainAppWidget(QtWidgets.QWidget):
     """Main application widget.
 
     :param QtWidgets: Parent widget.
     :type QtWidgets: QWidget
     """
+    first_painted = QtCore.Signal(dict)
+
     def __init__(self):
         """Constructor for MyWidget."""
         super().__init__()
+        constructing = time.perf_counter()
+        self.startup_metrics : dict[str, object] = {"import_seconds": constructing - STARTED}
         
         # Window settings
         self.setWindowTitle("Balance") 
@@ -214,6 +625,7 @@ class MainAppWidget(QtWidgets.QWidget):
 
         # Interface creation.
         self.create_user_interface()
+        self.startup_metrics["construct_seconds"] = time.perf_counter() - constructing
         
 
     def create_user_interface(self):
@@ -227,20 +639,38 @@ class MainAppWidget(QtWidgets.QWidget):
         toolbar = Toolbar()
         master_container.addWidget(toolbar)
 
-        content_stack = QtWidgets.QStackedWidget(self)
-        master_container.addWidget(content_stack)
-        
-        homepage = WidgetHomepage()
-        toolbar_btn_homepage = toolbar.create_toolbar_button("Home")
-        toolbar_btn_homepage.clicked.connect(lambda: content_stack.setCurrentIndex(0))
-        content_stack.addWidget(homepage)
-        
-        settings = WidgetSettings()
-        toolbar_btn_settings = toolbar.create_toolbar_button("Settings")
-        toolbar_btn_settings.clicked.connect(lambda: content_stack.setCurrentIndex(1))
-        content_stack.addWidget(settings)
+        self.pages = PageStack(self)
+        master_container.addWidget(self.pages)
         
+        toolbar.create_page_button("Home", self.pages, WidgetHomepage)
+        toolbar.create_page_button("Settings", self.pages, WidgetSettings)
+        self.pages.show_page("Home")
+
+    def paintEvent(self, event):
+        """Record the time to first paint on the first call."""
+        super().paintEvent(event)
+        if "first_paint_seconds" not in self.startup_metrics:
+            self.startup_metrics["first_paint_seconds"] = time.perf_counter() - STARTED
+            self.record_startup_metrics()
+
+    def record_startup_metrics(self):
+        """Publish the startup metrics through :attr:`first_painted`, and append them as a JSON line
+        to the file named by the BALANCE_STARTUP_METRICS environment variable when it is set."""
+        self.startup_metrics["page_build_seconds"] = dict(self.pages.build_seconds)
+        self.first_painted.emit(self.startup_metrics)
+        path = os.environ.get("BALANCE_STARTUP_METRICS")
+        if path:
+            with open(path, 'a') as file:
+                file.write(json.dumps(self.startup_metrics) + "\n")
     
+    def closeEvent(self, event):
+        """Cancel background tasks before the window closes."""
+        # No task can have started unless the tasks module was imported.
+        tasks = sys.modules.get(f"{__package__}.tasks")
+        if tasks is not None:
+            tasks.get_scheduler().shutdown(wait=False)
+        super().closeEvent(event)
+
     def apply_minimum_dimensions(self, width : int = 1280, height : int = 720):
         """
         :param width: Minimum width to set, defaults to 1280
@@ -251,6 +681,28 @@ class MainAppWidget(QtWidgets.QWidget):
         self.setMinimumWidth(width)
         self.setMinimumHeight(height)
     
+def track_widget(widget : QtWidgets.QWidget):
+    """Count a widget as created, and as destroyed when Qt deletes it.
+
+    :param widget: A widget which has just been constructed.
+    :type widget: QWidget
+    """
+    recorder = get_recorder()
+    name = type(widget).__name__
+    recorder.count(f"widgets.created.{name}")
+    widget.destroyed.connect(lambda: recorder.count(f"widgets.destroyed.{name}"))
+
+# Widget builds and panel loads timed while recording (see WidgetSettings).
+for widget_class in (WidgetHomepage, WidgetItemPersonDetailsPanel, WidgetItemPersonPanel, WidgetPeopleManager,
+                     WidgetSettings):
+    get_recorder().instrument(widget_class, '__init__', f"{widget_class.__name__}.build", track_widget)
+get_recorder().instrument(WidgetPeopleManager, 'load_person', "WidgetPeopleManager.load_person")
+get_recorder().instrument(WidgetSearch, 'search', "WidgetSearch.search")
+get_recorder().instrument(WidgetItemPersonDetailsPanel, 'show_account', "WidgetItemPersonDetailsPanel.show_account")
+get_recorder().instrument(PageStack, 'get_page', "PageStack.get_page")
+if os.environ.get("BALANCE_INSTRUMENTATION"):
+    get_recorder().enable()
+
 if __name__ == "__main__":
     app = QtWidgets.QApplication([])
     widget = MainAppWidget()
@@ -0,0 +1,258 @@
+from PySide6 import QtCore
+
+from .base_classes import Account, Person, PersonManager
+from .events import ChangeSet
+from .ledger import TransactionKind
+from .money import format_minor
+
+class PersonListModel(QtCore.QAbstractListModel):
+    """List model over the people of a PersonManager."""
+    def __init__(self, person_manager : PersonManager):
+        """
+        :param person_manager: The managed people.
+        :type person_manager: PersonManager
+        """
+        super().__init__()
+        self.person_manager = person_manager
+        self.people : list[Person] = person_manager.get_people()
+        person_manager.get_ledger().get_events().subscribe(self.apply_changes)
+
+    def rowCount(self, parent = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.people)
+
+    def data(self, index : QtCore.QModelIndex, role : int = QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        person = self.people[index.row()]
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            return person.get_name()
+        if role == QtCore.Qt.ItemDataRole.UserRole:
+            return person
+        return None
+
+    def get_person(self, index : QtCore.QModelIndex) -> Person:
+        """
+        :param index: Index of a row.
+        :type index: QModelIndex
+        :return: The person displayed in the row, or None.
+        :rtype: Person
+        """
+        return self.people[index.row()] if index.isValid() else None
+
+    def add_person(self, name : str) -> Person:
+        """
+        :param name: Name of the person to create.
+        :type name: str
+        :return: The created person.
+        :rtype: Person
+        """
+        return self.person_manager.add_person_by_name(name)
+
+    def remove_person(self, index : QtCore.QModelIndex):
+        """
+        :param index: Index of the row to remove.
+        :type index: QModelIndex
+        """
+        if index.isValid():
+            self.person_manager.remove_person(self.people[index.row()])
+
+    def reload(self):
+        """Re-read the people from the manager."""
+        self.beginResetModel()
+        self.people = self.person_manager.get_people()
+        self.endResetModel()
+
+    def apply_changes(self, changes : ChangeSet):
+        """
+        :param changes: Changes reported by the ledger's event bus.
+        :type changes: ChangeSet
+        """
+        if any(isinstance(item, Person) for item in changes.added | changes.removed | changes.changed):
+            sync_rows(self, self.people, self.person_manager.get_people(), changes.changed)
+
+class AccountListModel(QtCore.QAbstractListModel):
+    """List model over the accounts of a Person."""
+    def __init__(self, person : Person):
+        """
+        :param person: The person owning the accounts.
+        :type person: Person
+        """
+        super().__init__()
+        self.person = person
+        self.accounts : list[Account] = person.get_accounts()
+        person.get_ledger().get_events().subscribe(self.apply_changes)
+
+    def rowCount(self, parent = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.accounts)
+
+    def data(self, index : QtCore.QModelIndex, role : int = QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        account = self.accounts[index.row()]
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            return account.get_account_name()
+        if role == QtCore.Qt.ItemDataRole.UserRole:
+            return account
+        return None
+
+    def get_account(self, index : QtCore.QModelIndex) -> Account:
+        """
+        :param index: Index of a row.
+        :type index: QModelIndex
+        :return: The account displayed in the row, or None.
+        :rtype: Account
+        """
+        return self.accounts[index.row()] if index.isValid() else None
+
+    def create_account(self, name : str) -> Account:
+        """
+        :param name: Name of the account to create.
+        :type name: str
+        :return: The created account.
+        :rtype: Account
+        """
+        return self.person.create_account(name)
+
+    def remove_account(self, index : QtCore.QModelIndex):
+        """
+        :param index: Index of the row to remove.
+        :type index: QModelIndex
+        """
+        if index.isValid():
+            self.person.remove_account(self.accounts[index.row()])
+
+    def reload(self):
+        """Re-read the accounts from the person."""
+        self.beginResetModel()
+        self.accounts = self.person.get_accounts()
+        self.endResetModel()
+
+    def apply_changes(self, changes : ChangeSet):
+        """
+        :param changes: Changes reported by the ledger's event bus.
+        :type changes: ChangeSet
+        """
+        shown = set(self.accounts)
+        for item in changes.added | changes.removed | changes.changed:
+            if isinstance(item, Account) and (item in shown or item.get_account_owner() is self.person):
+                sync_rows(self, self.accounts, self.person.get_accounts(), changes.changed)
+                return
+
+def sync_rows(model : QtCore.QAbstractListModel, shown : list, current : list, changed = ()):
+    """Bring the rows of a list model up to date, inserting and removing only what differs.
+
+    :param model: The model.
+    :type model: QAbstractListModel
+    :param shown: The items the model displays, updated in place.
+    :type shown: list
+    :param current: The items the model should display.
+    :type current: list
+    :param changed: Items whose display may have changed, e.g. renamed, defaults to ()
+    :type changed: Iterable, optional
+    """
+    keep = set(current)
+    for row in reversed(range(len(shown))):
+        if shown[row] not in keep:
+            model.beginRemoveRows(QtCore.QModelIndex(), row, row)
+            del shown[row]
+            model.endRemoveRows()
+    known = set(shown)
+    added = [item for item in current if item not in known]
+    if added:
+        row = len(shown)
+        model.beginInsertRows(QtCore.QModelIndex(), row, row + len(added) - 1)
+        shown.extend(added)
+        model.endInsertRows()
+    changed = set(changed)
+    if changed:
+        for row, item in enumerate(shown):
+            if item in changed:
+                model.dataChanged.emit(model.index(row), model.index(row))
+
+KIND_LABELS = {
+    TransactionKind.TRANSACTION: "Transaction",
+    TransactionKind.INCOME: "Income",
+    TransactionKind.BILL: "Bill",
+    TransactionKind.TRANSFER_IN: "Transfer In",
+    TransactionKind.TRANSFER_OUT: "Transfer Out",
+}
+
+class TransactionTableModel(QtCore.QAbstractTableModel):
+    """Table model over the transactions of an Account.
+
+    Cells are read straight from the ledger columns when the view asks for them, so only the rows
+    on screen cost anything and no Transaction objects are created.
+    """
+    COLUMNS = ("Name", "Amount", "Date", "Type", "Category")
+
+    def __init__(self, account : Account = None):
+        """
+        :param account: The account to show, defaults to None
+        :type account: Account, optional
+        """
+        super().__init__()
+        self.account = None
+        self.rows : list[int] = []
+        self.set_account(account)
+
+    def set_account(self, account : Account):
+        """
+        :param account: The account to show, or None.
+        :type account: Account
+        """
+        self.beginResetModel()
+        if account is not None and (self.account is None or account.get_ledger() is not self.account.get_ledger()):
+            account.get_ledger().get_events().subscribe(self.apply_changes)
+        self.account = account
+        self.rows = account.get_transaction_rows() if account is not None else []
+        self.endResetModel()
+
+    def refresh(self):
+        """Re-read the rows of the current account."""
+        self.set_account(self.account)
+
+    def apply_changes(self, changes : ChangeSet):
+        """
+        :param changes: Changes reported by the ledger's event bus.
+        :type changes: ChangeSet
+        """
+        if self.account is None or self.account.account_id not in changes.account_ids:
+            return
+        if (changes.reset or changes.rows_added or changes.rows_removed or
+                not changes.columns.isdisjoint(('account_ids', 'dates'))):
+            self.refresh()
+            return
+        positions = {row: position for position, row in enumerate(self.rows)}
+        for row in changes.rows_changed:
+            position = positions.get(row)
+            if position is not None:
+                self.dataChanged.emit(self.index(position, 0), self.index(position, len(self.COLUMNS) - 1))
+
+    def rowCount(self, parent = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section : int, orientation : QtCore.Qt.Orientation,
+                   role : int = QtCore.Qt.ItemDataRole.DisplayRole):
+        if role == QtCore.Qt.ItemDataRole.DisplayRole and orientation == QtCore.Qt.Orientation.Horizontal:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index : QtCore.QModelIndex, role : int = QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != QtCore.Qt.ItemDataRole.DisplayRole:
+            return None
+        ledger = self.account.get_ledger()
+        row = self.rows[index.row()]
+        column = index.column()
+        if column == 0:
+            return ledger.get_name(row)
+        if column == 1:
+            return format_minor(ledger.amounts[row])
+        if column == 2:
+            return ledger.get_date(row)
+        if column == 3:
+            return KIND_LABELS[ledger.kinds[row]]
+        category = ledger.category_at(ledger.category_ids[row])
+        return category.get_name() if category is not None else ""
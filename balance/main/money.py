@@ -0,0 +1,249 @@
+import math
+import operator
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+# Minor units (pence, cents) in one major unit. Ledger amounts are whole numbers of minor units.
+MINOR_UNITS = 100
+DEFAULT_CURRENCY = 'GBP'
+
+MINOR_EXPONENT = Decimal(1) / MINOR_UNITS
+
+# Plain numbers Money compares with, by exact value as Decimal does.
+NUMBER_TYPES = (int, float, Decimal)
+
+def to_exact(number) -> Decimal:
+    """
+    :param number: A number, floats being taken from their shortest representation.
+    :type number: float, int, str or Decimal
+    :return: The number as an exact Decimal.
+    :rtype: Decimal
+    :raises ValueError: If a string is not a number.
+    """
+    if isinstance(number, float):
+        number = repr(number)
+    try:
+        return Decimal(number)
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {number!r}") from None
+
+def round_half_up(value : Decimal) -> int:
+    """
+    :param value: The value to round.
+    :type value: Decimal
+    :return: The nearest whole number, halves rounding away from zero.
+    :rtype: int
+    """
+    return int(value.quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+def to_minor(amount) -> int:
+    """Convert an amount in major units to a whole number of minor units, rounding half away from zero.
+
+    Floats are converted from their shortest representation, so 2.675 gives 268 as written rather
+    than rounding the binary value just below it; strings and Decimals are converted exactly.
+
+    :param amount: The amount, e.g. 12.5, "12.50", Decimal("12.50") or a Money.
+    :type amount: float, int, str, Decimal or Money
+    :return: The amount in minor units.
+    :rtype: int
+    :raises ValueError: If a string is not a number.
+    """
+    if isinstance(amount, Money):
+        return amount.minor
+    if isinstance(amount, int):
+        return amount * MINOR_UNITS
+    return round_half_up(to_exact(amount) * MINOR_UNITS)
+
+def to_decimal(minor : int) -> Decimal:
+    """
+    :param minor: An amount in minor units.
+    :type minor: int
+    :return: The exact amount in major units.
+    :rtype: Decimal
+    """
+    return (Decimal(minor) / MINOR_UNITS).quantize(MINOR_EXPONENT)
+
+def format_minor(minor : int) -> str:
+    """
+    :param minor: An amount in minor units.
+    :type minor: int
+    :return: The amount in major units with two decimal places, e.g. "-12.50".
+    :rtype: str
+    """
+    sign = '-' if minor < 0 else ''
+    major, remainder = divmod(abs(minor), MINOR_UNITS)
+    return f"{sign}{major}.{remainder:02d}"
+
+class Money():
+    """An exact amount of money, held as a whole number of minor units and a currency.
+
+    Money adds, subtracts and compares exactly with Money of the same currency and with plain
+    numbers (taken as major units). Mixing currencies raises ValueError. Numbers compare by exact
+    value, as with Decimal, so Money("0.10") equals Decimal("0.1") but not the float 0.1, and
+    equal Money and numbers hash alike.
+    """
+    __slots__ = ('minor', 'currency')
+
+    def __init__(self, amount = 0, currency : str = DEFAULT_CURRENCY):
+        """Constructor.
+
+        :param amount: Amount in major units, defaults to 0
+        :type amount: float, int, str or Decimal, optional
+        :param currency: ISO 4217 currency code, defaults to DEFAULT_CURRENCY
+        :type currency: str, optional
+        """
+        self.minor = to_minor(amount)
+        self.currency = currency
+
+    @classmethod
+    def from_minor(cls, minor : int, currency : str = DEFAULT_CURRENCY) -> 'Money':
+        """
+        :param minor: Amount in minor units.
+        :type minor: int
+        :param currency: ISO 4217 currency code, defaults to DEFAULT_CURRENCY
+        :type currency: str, optional
+        :return: The money.
+        :rtype: Money
+        """
+        money = cls.__new__(cls)
+        money.minor = int(minor)
+        money.currency = currency
+        return money
+
+    def get_minor(self) -> int:
+        """
+        :return: The amount in minor units.
+        :rtype: int
+        """
+        return self.minor
+
+    def get_currency(self) -> str:
+        """
+        :return: The ISO 4217 currency code.
+        :rtype: str
+        """
+        return self.currency
+
+    def to_decimal(self) -> Decimal:
+        """
+        :return: The exact amount in major units.
+        :rtype: Decimal
+        """
+        return to_decimal(self.minor)
+
+    def other_minor(self, other) -> int:
+        """
+        :param other: Money or a number of major units.
+        :type other: Money, float, int, str or Decimal
+        :return: The other amount in minor units.
+        :rtype: int
+        """
+        if isinstance(other, Money):
+            if other.currency != self.currency:
+                raise ValueError(f"Cannot combine {self.currency} and {other.currency}")
+            return other.minor
+        return to_minor(other)
+
+    def allocate(self, weights) -> list['Money']:
+        """Split the amount in proportion to weights without losing or creating a penny.
+
+        The weights are scaled to whole numbers so the shares are found by integer division; the
+        minor units left over go one each to the largest remainders, earlier weights winning ties.
+
+        :param weights: Non-negative weights, at least one positive. Floats are taken as written.
+        :type weights: Iterable[float, int or Decimal]
+        :return: One Money per weight, summing exactly to this amount.
+        :rtype: list[Money]
+        """
+        exact = [to_exact(weight).as_integer_ratio() for weight in weights]
+        if any(numerator < 0 for numerator, _ in exact):
+            raise ValueError("Cannot allocate by negative weights")
+        common = math.lcm(*(denominator for _, denominator in exact)) if exact else 1
+        weights = [numerator * (common // denominator) for numerator, denominator in exact]
+        total = sum(weights)
+        if total <= 0:
+            raise ValueError("Cannot allocate by weights which sum to zero")
+        shares, remainders = zip(*(divmod(self.minor * weight, total) for weight in weights))
+        shares = list(shares)
+        leftover = self.minor - sum(shares)
+        by_remainder = sorted(range(len(weights)), key=lambda index: remainders[index], reverse=True)
+        for index in by_remainder[:leftover]:
+            shares[index] += 1
+        return [Money.from_minor(share, self.currency) for share in shares]
+
+    def __add__(self, other) -> 'Money':
+        return Money.from_minor(self.minor + self.other_minor(other), self.currency)
+
+    __radd__ = __add__
+
+    def __sub__(self, other) -> 'Money':
+        return Money.from_minor(self.minor - self.other_minor(other), self.currency)
+
+    def __rsub__(self, other) -> 'Money':
+        return Money.from_minor(self.other_minor(other) - self.minor, self.currency)
+
+    def __mul__(self, factor) -> 'Money':
+        if isinstance(factor, int):
+            return Money.from_minor(self.minor * factor, self.currency)
+        # Exact, rounding half away from zero as to_minor does; round() would round halves to even.
+        return Money.from_minor(round_half_up(self.minor * to_exact(factor)), self.currency)
+
+    __rmul__ = __mul__
+
+    def __neg__(self) -> 'Money':
+        return Money.from_minor(-self.minor, self.currency)
+
+    def __abs__(self) -> 'Money':
+        return Money.from_minor(abs(self.minor), self.currency)
+
+    def __bool__(self) -> bool:
+        return self.minor != 0
+
+    def __float__(self) -> float:
+        return self.minor / MINOR_UNITS
+
+    def compare(self, other, comparison) -> bool:
+        """
+        :param other: Money of the same currency or a number of major units.
+        :type other: Money, float, int or Decimal
+        :param comparison: The comparison, e.g. operator.lt.
+        :type comparison: Callable[[object, object], bool]
+        :return: The result of comparing this amount with the other.
+        :rtype: bool
+        """
+        if isinstance(other, Money):
+            return comparison(self.minor, self.other_minor(other))
+        if isinstance(other, NUMBER_TYPES):
+            return comparison(self.to_decimal(), other)
+        return NotImplemented
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Money):
+            return self.minor == other.minor and self.currency == other.currency
+        return self.compare(other, operator.eq)
+
+    def __lt__(self, other) -> bool:
+        return self.compare(other, operator.lt)
+
+    def __le__(self, other) -> bool:
+        return self.compare(other, operator.le)
+
+    def __gt__(self, other) -> bool:
+        return self.compare(other, operator.gt)
+
+    def __ge__(self, other) -> bool:
+        return self.compare(other, operator.ge)
+
+    def __hash__(self) -> int:
+        # Equal to the hash of the equal Decimal, int or float.
+        return hash(self.to_decimal())
+
+    def __format__(self, spec : str) -> str:
+        if not spec:
+            return format_minor(self.minor)
+        return format(self.to_decimal(), spec)
+
+    def __str__(self) -> str:
+        return f"{format_minor(self.minor)} {self.currency}"
+
+    def __repr__(self) -> str:
+        return f"Money('{format_minor(self.minor)}', '{self.currency}')"
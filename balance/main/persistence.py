@@ -0,0 +1,342 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from .base_classes import Account, Category, CategoryManager, PersonManager
+from .ledger import Ledger, StringTable, NO_CATEGORY
+from .money import to_minor
+
+MAGIC = b'BALN'
+VERSION = 4
+
+# Sections in file order, with the array typecode used to store them. "strings_blob" is raw
+# UTF-8; every other section is a little-endian array.
+SECTIONS = (
+    ('strings_offsets', 'q'),
+    ('strings_blob', 'B'),
+    ('date_strings', 'i'),
+    ('people_names', 'i'),
+    ('account_owners', 'i'),
+    ('account_names', 'i'),
+    ('account_row_counts', 'i'),
+    ('category_names', 'i'),
+    ('category_managed', 'b'),
+    ('category_colour_lengths', 'b'),
+    ('category_colours', 'd'),
+    ('kinds', 'b'),
+    ('amounts', 'q'),
+    ('dates', 'i'),
+    ('days', 'b'),
+    ('account_ids', 'i'),
+    ('category_ids', 'i'),
+    ('name_ids', 'i'),
+    ('periods', 'i'),
+    ('counterparty_rows', 'i'),
+    ('counterparty_accounts', 'i'),
+    ('currency', 'i'),
+)
+
+# Versions 2 and 3 did not store days, which are derived from the date table when loaded. Version 2
+# also stored amounts as float64 major units and had no currency; its amounts are converted to minor
+# units when loaded.
+LEGACY_SECTIONS = {
+    2: tuple((name, 'd' if name == 'amounts' else typecode) for name, typecode in SECTIONS
+             if name not in ('days', 'currency')),
+    3: tuple((name, typecode) for name, typecode in SECTIONS if name != 'days'),
+}
+
+HEADER = struct.Struct('<4sHH')
+SECTION_ENTRY = struct.Struct('<QQ')
+
+# Sections start on a multiple of this many bytes, so mapped columns are aligned for their typecode.
+SECTION_ALIGNMENT = 8
+
+class LazyStringTable(StringTable):
+    """String table decoded on demand from the UTF-8 blob of a saved file.
+
+    Strings saved in the file are decoded the first time their code is read. Strings added after
+    loading are appended after the saved ones. The first string interned after loading decodes every
+    saved string, so that a saved name typed again gets its saved code rather than a second one.
+    """
+    def __init__(self, blob : memoryview, offsets):
+        """Constructor.
+
+        :param blob: The saved strings, UTF-8 encoded end to end.
+        :type blob: memoryview
+        :param offsets: Offset of each saved string within the blob, plus the end offset.
+        :type offsets: memoryview or array
+        """
+        super().__init__()
+        self.blob = blob
+        self.offsets = offsets
+        self.saved_count = len(offsets) - 1
+        self.decoded : dict[int, str] = {}
+        self.seeded = False
+
+    def __len__(self) -> int:
+        return self.saved_count + len(self.strings)
+
+    def __getitem__(self, code : int) -> str:
+        if code >= self.saved_count:
+            return self.strings[code - self.saved_count]
+        string = self.decoded.get(code)
+        if string is None:
+            string = self.decoded[code] = str(self.blob[self.offsets[code]:self.offsets[code + 1]], 'utf-8')
+        return string
+
+    def seed(self):
+        """Add the saved strings to the codes, keeping the first code of any string saved twice."""
+        for code in range(self.saved_count):
+            self.codes.setdefault(self[code], code)
+        self.seeded = True
+
+    def code(self, string : str) -> int:
+        code = self.codes.get(string)
+        if code is None and not self.seeded:
+            self.seed()
+            code = self.codes.get(string)
+        if code is None:
+            code = len(self)
+            self.strings.append(string)
+            self.codes[string] = code
+        return code
+
+def to_little_endian(values : array) -> bytes:
+    """
+    :param values: The array to serialise.
+    :type values: array
+    :return: The array contents in little-endian byte order.
+    :rtype: bytes
+    """
+    if sys.byteorder == 'big' and values.itemsize > 1:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+def from_little_endian(typecode : str, data) -> array:
+    """
+    :param typecode: The array typecode.
+    :type typecode: str
+    :param data: Little-endian bytes.
+    :type data: bytes-like
+    :return: The decoded array.
+    :rtype: array
+    """
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big' and values.itemsize > 1:
+        values.byteswap()
+    return values
+
+def map_section(mapping : mmap.mmap, typecode : str, start : int, length : int):
+    """
+    :param mapping: The mapped file.
+    :type mapping: mmap.mmap
+    :param typecode: The array typecode of the section.
+    :type typecode: str
+    :param start: Offset of the section in the file.
+    :type start: int
+    :param length: Length of the section in bytes.
+    :type length: int
+    :return: A view of the section, or a copy on machines whose byte order differs from the file's.
+    :rtype: memoryview or array
+    """
+    view = memoryview(mapping)[start:start + length]
+    if sys.byteorder == 'big' and array(typecode).itemsize > 1:
+        return from_little_endian(typecode, view)
+    return view.cast(typecode)
+
+def group_rows_by_account(ledger : Ledger) -> dict[int, list[int]]:
+    """
+    :param ledger: The ledger.
+    :type ledger: Ledger
+    :return: Live rows by account id, in the order :func:`save` writes them.
+    :rtype: dict[int, list[int]]
+    """
+    rows_by_account : dict[int, list[int]] = {}
+    for row in ledger.live_rows():
+        rows_by_account.setdefault(ledger.account_ids[row], []).append(row)
+    return rows_by_account
+
+def save(path : str, person_manager : PersonManager, category_manager : CategoryManager = None):
+    """Save people, accounts, categories and transactions to a binary file.
+
+    Only live rows of accounts owned by managed people are written. Rows are grouped by account so
+    that each account's transactions can be loaded as a contiguous range. The file is written under
+    a temporary name which is synced to disk and then replaces ``path``, so an interrupted save
+    leaves the old file intact and a file still mapped by :func:`load` is never truncated.
+
+    :param path: File to write.
+    :type path: str
+    :param person_manager: The people to save.
+    :type person_manager: PersonManager
+    :param category_manager: The categories to save, defaults to None
+    :type category_manager: CategoryManager, optional
+    """
+    ledger = person_manager.get_ledger()
+    strings = StringTable()
+    sections = {name: array(typecode) for name, typecode in SECTIONS}
+
+    people = person_manager.get_people()
+    owned_accounts = [(index, account) for index, person in enumerate(people) for account in person.get_accounts()]
+    account_index = {account: index for index, (_, account) in enumerate(owned_accounts)}
+
+    categories = category_manager.get_categories() if category_manager is not None else []
+    category_index = {category: index for index, category in enumerate(categories)}
+    sections['category_managed'].extend([1] * len(categories))
+    for category in ledger.categories:
+        if category not in category_index:
+            category_index[category] = len(categories)
+            categories.append(category)
+            sections['category_managed'].append(0)
+
+    rows_by_account = group_rows_by_account(ledger)
+
+    date_index = {}
+    for person in people:
+        sections['people_names'].append(strings.code(person.get_name()))
+    for category in categories:
+        sections['category_names'].append(strings.code(category.get_name()))
+        colour = tuple(category.get_colour() or ())
+        sections['category_colour_lengths'].append(len(colour))
+        sections['category_colours'].extend(colour)
+
+    for owner, account in owned_accounts:
+        sections['account_owners'].append(owner)
+        sections['account_names'].append(strings.code(account.get_account_name()))
+        rows = rows_by_account.get(account.account_id, ())
+        sections['account_row_counts'].append(len(rows))
+        for row in rows:
+            date = ledger.get_parsed_date(row)
+            if date not in date_index:
+                date_index[date] = len(date_index)
+                sections['date_strings'].append(strings.code(date.text))
+            category = ledger.category_at(ledger.category_ids[row])
+            counterparty = ledger.counterparties.get(row)
+            if counterparty in account_index:
+                sections['counterparty_rows'].append(len(sections['kinds']))
+                sections['counterparty_accounts'].append(account_index[counterparty])
+            sections['kinds'].append(ledger.kinds[row])
+            sections['amounts'].append(ledger.amounts[row])
+            sections['dates'].append(date_index[date])
+            sections['days'].append(ledger.days[row])
+            sections['account_ids'].append(account_index[account])
+            sections['category_ids'].append(NO_CATEGORY if category is None else category_index[category])
+            sections['name_ids'].append(strings.code(ledger.get_name(row)))
+            sections['periods'].append(ledger.periods[row])
+    sections['currency'].append(strings.code(ledger.currency))
+
+    blob = bytearray()
+    offsets = sections['strings_offsets']
+    for string in strings.strings:
+        offsets.append(len(blob))
+        blob += string.encode('utf-8')
+    offsets.append(len(blob))
+    sections['strings_blob'] = array('B', blob)
+
+    position = HEADER.size + SECTION_ENTRY.size * len(SECTIONS)
+    table = []
+    payloads = []
+    for name, _ in SECTIONS:
+        padding = -position % SECTION_ALIGNMENT
+        payload = to_little_endian(sections[name])
+        table.append(SECTION_ENTRY.pack(position + padding, len(payload)))
+        payloads.append(bytes(padding))
+        payloads.append(payload)
+        position += padding + len(payload)
+
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(SECTIONS)))
+        file.writelines(table)
+        file.writelines(payloads)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+def load(path : str) -> tuple[PersonManager, CategoryManager]:
+    """Load a file written by :func:`save`.
+
+    The file is memory-mapped copy-on-write, so loading costs the same however many transactions it
+    holds. The ledger's columns are views of the mapping until rows are first added (see
+    :meth:`Ledger.own_columns`); edits to existing rows stay in memory and never reach the file.
+    Names are decoded from the string blob on first use, and the transaction objects of each account
+    are only created when its collections are first accessed.
+
+    :param path: File to read.
+    :type path: str
+    :return: The loaded people and categories.
+    :rtype: tuple[PersonManager, CategoryManager]
+    """
+    with open(path, 'rb') as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    magic, version, section_count = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a Balance file")
+    layout = SECTIONS if version == VERSION else LEGACY_SECTIONS.get(version)
+    if layout is None or section_count != len(layout):
+        raise ValueError(f"{path} uses unsupported format version {version}")
+
+    sections = {}
+    for index, (name, typecode) in enumerate(layout):
+        start, length = SECTION_ENTRY.unpack_from(buffer, HEADER.size + SECTION_ENTRY.size * index)
+        if name == 'strings_blob':
+            blob = memoryview(buffer)[start:start + length]
+        else:
+            sections[name] = map_section(buffer, typecode, start, length)
+
+    strings = LazyStringTable(blob, sections['strings_offsets'])
+
+    person_manager = PersonManager()
+    ledger = person_manager.get_ledger()
+    ledger.strings = strings
+
+    category_manager = CategoryManager()
+    colours = iter(sections['category_colours'])
+    for name_id, managed, colour_length in zip(sections['category_names'], sections['category_managed'],
+                                               sections['category_colour_lengths']):
+        colour = tuple(next(colours) for _ in range(colour_length))
+        if managed:
+            category = category_manager.add_category(strings[name_id], colour)
+        else:
+            category = Category(strings[name_id], colour)
+        ledger.category_code(category)
+
+    for date_string in sections['date_strings']:
+        ledger.date_code(strings[date_string])
+
+    people = [person_manager.add_person_by_name(strings[name_id]) for name_id in sections['people_names']]
+
+    row = 0
+    for owner, name_id, row_count in zip(sections['account_owners'], sections['account_names'],
+                                          sections['account_row_counts']):
+        account = Account(strings[name_id], people[owner])
+        people[owner].add_account(account)
+        account.defer_transactions(range(row, row + row_count))
+        row += row_count
+
+    ledger.kinds = sections['kinds']
+    if 'currency' in sections:
+        ledger.amounts = sections['amounts']
+        ledger.currency = strings[sections['currency'][0]]
+    else:
+        ledger.amounts = array('q', map(to_minor, sections['amounts']))
+    ledger.dates = sections['dates']
+    if 'days' in sections:
+        ledger.days = sections['days']
+    else:
+        date_days = [date.day for date in ledger.date_table]
+        ledger.days = array('b', map(date_days.__getitem__, ledger.dates))
+    ledger.account_ids = sections['account_ids']
+    ledger.category_ids = sections['category_ids']
+    ledger.name_ids = sections['name_ids']
+    ledger.periods = sections['periods']
+    ledger.alive = array('b', bytes([1])) * len(ledger.kinds)
+    ledger.mapped = True
+    for counterparty_row, account_id in zip(sections['counterparty_rows'], sections['counterparty_accounts']):
+        ledger.counterparties[counterparty_row] = ledger.account_at(account_id)
+
+    return person_manager, category_manager
@@ -0,0 +1,158 @@
+import calendar
+import datetime
+from array import array
+from itertools import accumulate
+
+from .dates import MAX_DAY
+from .ledger import Ledger, NO_ACCOUNT, RECURRING
+from .money import Money, to_minor
+
+class Projection():
+    """Daily running balances for every account of a ledger over a run of whole months.
+
+    Recurring transactions with a fixed day of month recur on that day every month, clamped to the
+    last day of shorter months. Dated transactions, such as imported statement history, are not
+    projected. Transactions without a fixed day ("Variable", "As & When", "TBD") cannot be
+    placed on a day and are reported per month in :attr:`unscheduled` instead.
+
+    Balances are held in minor units, as in the ledger.
+    """
+    def __init__(self, start : datetime.date, months : int, balances : dict[int, array],
+                 unscheduled : dict[int, int], ledger : Ledger):
+        """Constructor.
+
+        :param start: First day of the projection.
+        :type start: datetime.date
+        :param months: Number of months projected.
+        :type months: int
+        :param balances: Closing balance of each day in minor units, keyed by account id.
+        :type balances: dict[int, array]
+        :param unscheduled: Monthly net total of unscheduled transactions in minor units, keyed by account id.
+        :type unscheduled: dict[int, int]
+        :param ledger: The projected ledger.
+        :type ledger: Ledger
+        """
+        self.start = start
+        self.months = months
+        self.days = sum(month_lengths(start, months))
+        self.balances = balances
+        self.unscheduled = unscheduled
+        self.ledger = ledger
+
+    def get_days(self) -> int:
+        """
+        :return: Number of days in the projection.
+        :rtype: int
+        """
+        return self.days
+
+    def get_dates(self) -> list[datetime.date]:
+        """
+        :return: Date of every projected day.
+        :rtype: list[datetime.date]
+        """
+        return [self.start + datetime.timedelta(days=offset) for offset in range(self.get_days())]
+
+    def get_account_balances(self, account) -> array:
+        """
+        :param account: The account.
+        :type account: Account
+        :return: Closing balance of each projected day for the account, in minor units.
+        :rtype: array
+        """
+        return self.balances.get(account.account_id, array('q', bytes(8 * self.get_days())))
+
+    def get_balance_on(self, account, day : datetime.date) -> Money:
+        """
+        :param account: The account.
+        :type account: Account
+        :param day: The day to look up, within the projection.
+        :type day: datetime.date
+        :return: Closing balance of the account on the day.
+        :rtype: Money
+        """
+        offset = (day - self.start).days
+        if not 0 <= offset < self.get_days():
+            raise ValueError(f"{day} is outside the projection")
+        return Money.from_minor(self.get_account_balances(account)[offset], self.ledger.currency)
+
+    def get_lowest_balance(self, account) -> tuple[datetime.date, Money]:
+        """
+        :param account: The account.
+        :type account: Account
+        :return: The first day on which the account is at its lowest, and that balance.
+        :rtype: tuple[datetime.date, Money]
+        """
+        balances = self.get_account_balances(account)
+        lowest = min(balances)
+        return (self.start + datetime.timedelta(days=balances.index(lowest)),
+                Money.from_minor(lowest, self.ledger.currency))
+
+def month_lengths(start : datetime.date, months : int) -> list[int]:
+    """
+    :param start: A day in the first month.
+    :type start: datetime.date
+    :param months: Number of months.
+    :type months: int
+    :return: Number of days in each month.
+    :rtype: list[int]
+    """
+    lengths = []
+    year, month = start.year, start.month
+    for _ in range(months):
+        lengths.append(calendar.monthrange(year, month)[1])
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return lengths
+
+def project(ledger : Ledger, months : int, start : datetime.date = None,
+            opening_balances : dict = None) -> Projection:
+    """Project daily running balances for every account of a ledger.
+
+    The ledger is read once to sum each account's transactions into 31 day-of-month buckets. A
+    daily template is then built for each distinct month length, so the cost of the projection
+    depends on the number of accounts and days rather than the number of transactions.
+
+    :param ledger: The ledger to project.
+    :type ledger: Ledger
+    :param months: Number of whole months to project, at least one.
+    :type months: int
+    :param start: A day in the first projected month, defaults to today.
+    :type start: datetime.date, optional
+    :param opening_balances: Balance of each account before the first day, keyed by account, defaults to zero.
+    :type opening_balances: dict[Account, Money or float], optional
+    :return: The projection.
+    :rtype: Projection
+    :raises ValueError: If months is less than one.
+    """
+    if months < 1:
+        raise ValueError(f"Cannot project {months} months")
+    start = (start or datetime.date.today()).replace(day=1)
+    opening = {account.account_id: to_minor(balance) for account, balance in (opening_balances or {}).items()}
+    buckets : dict[int, array] = {}
+    unscheduled : dict[int, int] = {}
+    rows = zip(ledger.account_ids, ledger.days, ledger.periods, ledger.signed_amounts())
+    for account_id, day, period, amount in rows:
+        if account_id == NO_ACCOUNT or period != RECURRING or not amount:
+            continue
+        if not day:
+            unscheduled[account_id] = unscheduled.get(account_id, 0) + amount
+            continue
+        if account_id not in buckets:
+            buckets[account_id] = array('q', bytes(8 * (MAX_DAY + 1)))
+        buckets[account_id][day] += amount
+
+    lengths = month_lengths(start, months)
+    balances : dict[int, array] = {}
+    for account_id in buckets.keys() | opening.keys() | unscheduled.keys():
+        bucket = buckets.get(account_id, array('q', bytes(8 * (MAX_DAY + 1))))
+        templates = {}
+        for length in set(lengths):
+            template = bucket[1:length + 1]
+            template[-1] += sum(bucket[length + 1:])
+            templates[length] = template
+        deltas = array('q')
+        for length in lengths:
+            deltas.extend(templates[length])
+        balances[account_id] = array('q', accumulate(deltas, initial=opening.get(account_id, 0)))[1:]
+
+    return Projection(start, months, balances, unscheduled, ledger)
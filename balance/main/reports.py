@@ -0,0 +1,298 @@
+from .ledger import Ledger, LedgerListener, TransactionKind, KIND_SIGNS, NO_CATEGORY, RECURRING
+from .money import Money
+
+DIMENSIONS = ('person', 'account', 'category', 'kind', 'period')
+
+def month_range(first : int, last : int) -> list[int]:
+    """
+    :param first: First month as YYYYMM.
+    :type first: int
+    :param last: Last month as YYYYMM.
+    :type last: int
+    :return: Every month from first to last inclusive as YYYYMM, empty if last is before first.
+    :rtype: list[int]
+    """
+    months = []
+    year, month = divmod(first, 100)
+    while year * 100 + month <= last:
+        months.append(year * 100 + month)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+class AggregationCube(LedgerListener):
+    """Totals of a ledger over (account, category, kind, period), kept up to date from ledger notifications.
+
+    The cube is sparse: one cell per combination that has transactions, holding the net total in
+    minor units (incomes and transfers in positive, bills and transfers out negative) and the
+    number of rows.
+    The person dimension is resolved through account owners when queried, so moving an account
+    to another person needs no update. Cells are also indexed by period, so a query over a range
+    of months only reads the cells of those months and the recurring cells, never the ledger rows.
+
+    Recurring rows are stored once under RECURRING. A query without a period range counts them
+    once, as a monthly amount; a query over a range of months counts them in every month of it.
+    """
+    def __init__(self, ledger : Ledger):
+        """Constructor.
+
+        :param ledger: The ledger to aggregate.
+        :type ledger: Ledger
+        """
+        self.ledger = ledger
+        self.rebuild()
+        ledger.subscribe(self)
+
+    def rebuild(self):
+        """Total every live row of the ledger from scratch."""
+        self.cells : dict[tuple[int, int, int, int], list] = {}
+        self.period_keys : dict[int, set[tuple[int, int, int, int]]] = {}
+        for row in self.ledger.live_rows():
+            self.apply(row, 1)
+
+    def close(self):
+        """Stop tracking the ledger."""
+        self.ledger.unsubscribe(self)
+        if self.ledger.cube is self:
+            self.ledger.cube = None
+
+    def add(self, key : tuple[int, int, int, int], value : int, count : int):
+        """
+        :param key: (account id, category id, kind, period) of the cell.
+        :type key: tuple[int, int, int, int]
+        :param value: Signed amount to add, in minor units.
+        :type value: int
+        :param count: Number of rows to add (negative to remove).
+        :type count: int
+        """
+        cell = self.cells.get(key)
+        if cell is None:
+            cell = self.cells[key] = [0, 0]
+            self.period_keys.setdefault(key[3], set()).add(key)
+        cell[0] += value
+        cell[1] += count
+        if cell[1] <= 0:
+            del self.cells[key]
+            keys = self.period_keys[key[3]]
+            keys.discard(key)
+            if not keys:
+                del self.period_keys[key[3]]
+
+    def key(self, row : int, account_id : int = None, category_id : int = None) -> tuple[int, int, int, int]:
+        """
+        :param row: The ledger row.
+        :type row: int
+        :param account_id: Account id to use instead of the row's, defaults to None
+        :type account_id: int, optional
+        :param category_id: Category id to use instead of the row's, defaults to None
+        :type category_id: int, optional
+        :return: The cell of the row.
+        :rtype: tuple[int, int, int, int]
+        """
+        ledger = self.ledger
+        return (ledger.account_ids[row] if account_id is None else account_id,
+                ledger.category_ids[row] if category_id is None else category_id,
+                ledger.kinds[row], ledger.periods[row])
+
+    def apply(self, row : int, direction : int):
+        """
+        :param row: The ledger row.
+        :type row: int
+        :param direction: 1 to add the row, -1 to remove it.
+        :type direction: int
+        """
+        ledger = self.ledger
+        self.add(self.key(row), direction * KIND_SIGNS[ledger.kinds[row]] * ledger.amounts[row], direction)
+
+    def row_added(self, ledger : Ledger, row : int):
+        self.apply(row, 1)
+
+    def row_released(self, ledger : Ledger, row : int):
+        self.apply(row, -1)
+
+    def row_restored(self, ledger : Ledger, row : int):
+        self.apply(row, 1)
+
+    def ledger_compacted(self, ledger : Ledger, rows):
+        self.rebuild()
+
+    def row_changed(self, ledger : Ledger, row : int, column : str, old_value):
+        if not ledger.alive[row]:
+            return
+        sign = KIND_SIGNS[ledger.kinds[row]]
+        if column == 'amounts':
+            self.add(self.key(row), sign * (ledger.amounts[row] - old_value), 0)
+        elif column in ('account_ids', 'category_ids'):
+            value = sign * ledger.amounts[row]
+            if column == 'account_ids':
+                old_key = self.key(row, account_id=old_value)
+            else:
+                old_key = self.key(row, category_id=old_value)
+            self.add(old_key, -value, -1)
+            self.add(self.key(row), value, 1)
+
+    def cell_filter(self, person = None, account = None, category = None, kind : TransactionKind = None):
+        """Predicate over cell keys for the filters other than the period, which :meth:`select` slices by.
+
+        :param person: Restrict to a person's accounts, defaults to None
+        :type person: Person, optional
+        :param account: Restrict to an account, defaults to None
+        :type account: Account, optional
+        :param category: Restrict to a category, defaults to None
+        :type category: Category, optional
+        :param kind: Restrict to a kind of transaction, defaults to None
+        :type kind: TransactionKind, optional
+        :return: A predicate over cell keys, or None when the filters match nothing.
+        :rtype: Callable[[tuple], bool]
+        """
+        account_ids = None
+        if person is not None:
+            account_ids = {owned.account_id for owned in person.get_accounts() if owned.get_ledger() is self.ledger}
+        if account is not None:
+            account_ids = {account.account_id} if account_ids is None else account_ids & {account.account_id}
+        category_id = None
+        if category is not None:
+            category_id = self.ledger.find_category_code(category)
+            if category_id == NO_CATEGORY:
+                return None
+
+        def matches(key : tuple[int, int, int, int]) -> bool:
+            account_id, cell_category, cell_kind, _ = key
+            return ((account_ids is None or account_id in account_ids) and
+                    (category_id is None or cell_category == category_id) and
+                    (kind is None or cell_kind == kind))
+        return matches
+
+    def get_months(self, first_period : int = None, last_period : int = None) -> list[int]:
+        """
+        :param first_period: First month as YYYYMM, defaults to None for the earliest dated month.
+        :type first_period: int, optional
+        :param last_period: Last month as YYYYMM, defaults to None for the latest dated month.
+        :type last_period: int, optional
+        :return: The months of the range, or None when neither end is given.
+        :rtype: list[int]
+        """
+        if not first_period and not last_period:
+            return None
+        dated = [period for period in self.period_keys if period != RECURRING]
+        first = first_period or min(dated, default=last_period)
+        last = last_period or max(dated, default=first_period)
+        return month_range(first, last)
+
+    def select(self, person = None, account = None, category = None, kind : TransactionKind = None,
+               first_period : int = None, last_period : int = None):
+        """Cells of a slice of the cube. Omitted filters include everything.
+
+        :param person: Restrict to a person's accounts, defaults to None
+        :type person: Person, optional
+        :param account: Restrict to an account, defaults to None
+        :type account: Account, optional
+        :param category: Restrict to a category, defaults to None
+        :type category: Category, optional
+        :param kind: Restrict to a kind of transaction, defaults to None
+        :type kind: TransactionKind, optional
+        :param first_period: First month as YYYYMM, defaults to None
+        :type first_period: int, optional
+        :param last_period: Last month as YYYYMM, defaults to None
+        :type last_period: int, optional
+        :return: Generator of (key, cell, months) triples, where months are the periods the cell
+            counts towards: its own period for dated cells, and every month of the range for
+            recurring cells (RECURRING when no range is given).
+        :rtype: Iterator[tuple[tuple, list, list[int]]]
+        """
+        matches = self.cell_filter(person, account, category, kind)
+        if matches is None:
+            return
+        months = self.get_months(first_period, last_period)
+        if months is None:
+            periods = list(self.period_keys)
+        elif months:
+            periods = [period for period in self.period_keys if months[0] <= period <= months[-1]]
+            if RECURRING in self.period_keys:
+                periods.append(RECURRING)
+        else:
+            periods = []
+        for period in periods:
+            spread = months if period == RECURRING and months is not None else [period]
+            for key in self.period_keys[period]:
+                if matches(key):
+                    yield key, self.cells[key], spread
+
+    def get_total(self, person = None, account = None, category = None, kind : TransactionKind = None,
+                  first_period : int = None, last_period : int = None) -> Money:
+        """Net total of a slice of the cube. Omitted filters include everything.
+
+        :param person: Restrict to a person's accounts, defaults to None
+        :type person: Person, optional
+        :param account: Restrict to an account, defaults to None
+        :type account: Account, optional
+        :param category: Restrict to a category, defaults to None
+        :type category: Category, optional
+        :param kind: Restrict to a kind of transaction, defaults to None
+        :type kind: TransactionKind, optional
+        :param first_period: First month as YYYYMM, defaults to None
+        :type first_period: int, optional
+        :param last_period: Last month as YYYYMM, defaults to None
+        :type last_period: int, optional
+        :return: The net total, with recurring rows counted once per month of a given range.
+        :rtype: Money
+        """
+        cells = self.select(person, account, category, kind, first_period, last_period)
+        return Money.from_minor(sum(cell[0] * len(months) for _, cell, months in cells), self.ledger.currency)
+
+    def group_by(self, dimension : str, person = None, account = None, category = None,
+                 kind : TransactionKind = None, first_period : int = None, last_period : int = None) -> dict:
+        """Net totals of a slice of the cube, broken down along one dimension.
+
+        Filters are those of :meth:`get_total`. Grouped by period, recurring rows are totalled in
+        each month of a given range.
+
+        :param dimension: One of "person", "account", "category", "kind" or "period".
+        :type dimension: str
+        :return: Net total for each value of the dimension. Categories and people are None for
+            uncategorised rows and unowned accounts.
+        :rtype: dict[object, Money]
+        """
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Unknown dimension: {dimension}")
+        ledger = self.ledger
+        totals = {}
+        for key, cell, months in self.select(person, account, category, kind, first_period, last_period):
+            account_id, category_id, cell_kind, _ = key
+            if dimension == 'period':
+                for month in months:
+                    totals[month] = totals.get(month, 0) + cell[0]
+                continue
+            if dimension == 'person':
+                owner = ledger.account_at(account_id)
+                value = owner.get_account_owner() if owner is not None else None
+            elif dimension == 'account':
+                value = ledger.account_at(account_id)
+            elif dimension == 'category':
+                value = ledger.category_at(category_id)
+            else:
+                value = TransactionKind(cell_kind)
+            totals[value] = totals.get(value, 0) + cell[0] * len(months)
+        currency = ledger.currency
+        return {value: Money.from_minor(total, currency) for value, total in totals.items()}
+
+    def get_category_breakdown(self, kind : TransactionKind = TransactionKind.BILL, person = None,
+                               first_period : int = None, last_period : int = None) -> list[tuple]:
+        """Data for a pie or bar chart of spending by category.
+
+        :param kind: Kind of transaction, defaults to bills.
+        :type kind: TransactionKind, optional
+        :param person: Restrict to a person's accounts, defaults to None
+        :type person: Person, optional
+        :param first_period: First month as YYYYMM, defaults to None
+        :type first_period: int, optional
+        :param last_period: Last month as YYYYMM, defaults to None
+        :type last_period: int, optional
+        :return: (category, amount, colour) for each category, largest first. Amounts are positive.
+        :rtype: list[tuple[Category, Money, tuple]]
+        """
+        totals = self.group_by('category', person=person, kind=kind, first_period=first_period,
+                               last_period=last_period)
+        breakdown = [(category, abs(total), category.get_colour() if category is not None else None)
+                     for category, total in totals.items()]
+        breakdown.sort(key=lambda entry: entry[1], reverse=True)
+        return breakdown
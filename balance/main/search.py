@@ -0,0 +1,338 @@
+import math
+import re
+
+from .base_classes import Account, Category, CategoryManager, Person, PersonManager, Transaction, TRANSACTION_VIEWS
+from .indexes import RowIndex
+from .ledger import Change, Ledger, LedgerListener, NO_CATEGORY
+
+# Fraction of the query's trigrams a name must contain to be a match.
+MATCH_THRESHOLD = 0.5
+
+# Kinds of search result.
+PERSON = 'person'
+ACCOUNT = 'account'
+CATEGORY = 'category'
+TRANSACTION = 'transaction'
+
+WORD = re.compile(r'\w+')
+
+def trigrams(text : str, prefix : bool = False) -> set[str]:
+    """Case-insensitive trigrams of each word of a text, padded so that word starts weigh more.
+
+    :param text: The text.
+    :type text: str
+    :param prefix: Treat the last word as the start of a longer word, for as-you-type queries, defaults to False
+    :type prefix: bool, optional
+    :return: The trigrams.
+    :rtype: set[str]
+    """
+    words = WORD.findall(text.casefold())
+    grams = set()
+    for position, word in enumerate(words):
+        padded = f"  {word}" if prefix and position == len(words) - 1 else f"  {word} "
+        grams.update(padded[index:index + 3] for index in range(len(padded) - 2))
+    return grams
+
+class SearchResult():
+    """One match of a :class:`SearchIndex` query."""
+    __slots__ = ('kind', 'item', 'name', 'score', 'count')
+
+    def __init__(self, kind : str, item, name : str, score : float, count : int = 1):
+        """Constructor.
+
+        :param kind: PERSON, ACCOUNT, CATEGORY or TRANSACTION.
+        :type kind: str
+        :param item: The person, account or category, or the name of the matching transactions.
+        :type item: object
+        :param name: The matching name.
+        :type name: str
+        :param score: Fraction of the query's trigrams found in the name, 1.0 for every one.
+        :type score: float
+        :param count: Number of live transactions with the name, defaults to 1
+        :type count: int, optional
+        """
+        self.kind = kind
+        self.item = item
+        self.name = name
+        self.score = score
+        self.count = count
+
+    def __repr__(self) -> str:
+        return f"SearchResult({self.kind}, {self.name!r}, score={self.score:.2f}, count={self.count})"
+
+class SearchIndex(LedgerListener):
+    """Inverted trigram index over the names of people, accounts, categories and transactions.
+
+    Transactions are indexed by distinct name rather than by row, since most names recur every
+    month, so the index grows with the vocabulary of the ledger rather than its length. Each name
+    is stored once under every trigram of its words; a query only verifies names found under its
+    rarest trigrams, so misspelt and partly typed queries still match without scanning every name.
+    The live rows of each name are kept too, so the transactions of a result are found without
+    scanning the ledger. Everything is kept up to date from ledger notifications, including the
+    categories of the category manager, which is attached to the ledger for that purpose.
+    Categories only used by transactions are indexed when first used; renaming one of those is
+    not reported, so call :meth:`refresh_categories` afterwards.
+    """
+    def __init__(self, person_manager : PersonManager, category_manager : CategoryManager = None):
+        """Constructor.
+
+        :param person_manager: The people whose names, accounts and transactions are indexed.
+        :type person_manager: PersonManager
+        :param category_manager: Categories indexed besides those used by transactions, defaults to None
+        :type category_manager: CategoryManager, optional
+        """
+        self.person_manager = person_manager
+        self.category_manager = category_manager
+        self.ledger = person_manager.get_ledger()
+
+        # Trigram -> keys (name codes for transactions, the object otherwise) of the names holding it.
+        self.postings : dict[str, set] = {}
+        self.sizes : dict[object, int] = {}
+        self.names : dict[object, str] = {}
+        # Name code -> live rows with the name, and transaction name -> its code.
+        self.name_rows = RowIndex()
+        self.transaction_names : dict[str, int] = {}
+        self.categories : set[Category] = set()
+
+        ledger = self.ledger
+        for row in ledger.live_rows():
+            self.add_row(row)
+        for person in person_manager.get_people():
+            self.add_person(person)
+        self.refresh_categories()
+        if category_manager is not None:
+            category_manager.add_ledger(ledger)
+        ledger.subscribe(self)
+
+    def close(self):
+        """Stop indexing the ledger."""
+        self.ledger.unsubscribe(self)
+
+    def add(self, key, name : str):
+        """
+        :param key: Name code of a transaction name, or a person, account or category.
+        :type key: object
+        :param name: The name to index the key under.
+        :type name: str
+        """
+        grams = trigrams(name)
+        for gram in grams:
+            self.postings.setdefault(gram, set()).add(key)
+        self.sizes[key] = len(grams)
+        self.names[key] = name
+
+    def remove(self, key):
+        """Remove a key from the index. Unknown keys are ignored.
+
+        :param key: Name code of a transaction name, or a person, account or category.
+        :type key: object
+        """
+        name = self.names.pop(key, None)
+        if name is None:
+            return
+        del self.sizes[key]
+        for gram in trigrams(name):
+            keys = self.postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.postings[gram]
+
+    def add_name(self, name_id : int, row : int):
+        """
+        :param name_id: Code of a transaction name in the ledger's string table.
+        :type name_id: int
+        :param row: A live row with the name.
+        :type row: int
+        """
+        if name_id not in self.name_rows.entries:
+            name = self.ledger.strings[name_id]
+            self.add(name_id, name)
+            self.transaction_names[name] = name_id
+        self.name_rows.add(name_id, row)
+
+    def remove_name(self, name_id : int, row : int):
+        """
+        :param name_id: Code of a transaction name in the ledger's string table.
+        :type name_id: int
+        :param row: A row which no longer has the name, or is no longer live.
+        :type row: int
+        """
+        self.name_rows.remove(name_id, row)
+        if name_id not in self.name_rows.entries:
+            name = self.names.get(name_id)
+            self.remove(name_id)
+            if self.transaction_names.get(name) == name_id:
+                del self.transaction_names[name]
+
+    def add_row(self, row : int):
+        """
+        :param row: A live row to index, by name and category.
+        :type row: int
+        """
+        ledger = self.ledger
+        self.add_name(ledger.name_ids[row], row)
+        category = ledger.category_at(ledger.category_ids[row])
+        if category is not None and category not in self.categories:
+            self.add_category(category)
+
+    def add_person(self, person : Person):
+        """
+        :param person: A person to index, with their accounts.
+        :type person: Person
+        """
+        self.add(person, person.get_name())
+        for account in person.get_accounts():
+            self.add(account, account.get_account_name())
+
+    def remove_person(self, person : Person):
+        """
+        :param person: A person to drop from the index, with their accounts.
+        :type person: Person
+        """
+        self.remove(person)
+        for account in person.get_accounts():
+            self.remove(account)
+
+    def add_category(self, category : Category):
+        """
+        :param category: A category to index, or to re-index under its current name.
+        :type category: Category
+        """
+        self.remove(category)
+        self.add(category, category.get_name())
+        self.categories.add(category)
+
+    def refresh_categories(self):
+        """Index categories not seen before, re-index renamed ones and drop those no longer used."""
+        categories = [category for category in self.ledger.categories if category is not None]
+        if self.category_manager is not None:
+            categories.extend(self.category_manager.get_categories())
+        for category in self.categories.difference(categories):
+            self.remove(category)
+        self.categories = set()
+        for category in categories:
+            if self.names.get(category) != category.get_name():
+                self.add_category(category)
+            self.categories.add(category)
+
+    def row_added(self, ledger : Ledger, row : int):
+        self.add_row(row)
+
+    def row_released(self, ledger : Ledger, row : int):
+        self.remove_name(ledger.name_ids[row], row)
+
+    def row_restored(self, ledger : Ledger, row : int):
+        self.add_row(row)
+
+    def row_changed(self, ledger : Ledger, row : int, column : str, old_value):
+        if not ledger.alive[row]:
+            return
+        if column == 'name_ids' and old_value != ledger.name_ids[row]:
+            self.remove_name(old_value, row)
+            self.add_name(ledger.name_ids[row], row)
+        elif column == 'category_ids':
+            category = ledger.category_at(ledger.category_ids[row])
+            if category is not None and category not in self.categories:
+                self.add_category(category)
+
+    def ledger_compacted(self, ledger : Ledger, rows):
+        entries = self.name_rows.entries
+        for name_id, name_rows in entries.items():
+            entries[name_id] = {rows[row]: None for row in name_rows}
+
+    def object_changed(self, ledger : Ledger, item, change : Change):
+        if isinstance(item, Person):
+            if change == Change.REMOVED:
+                self.remove_person(item)
+            elif item.manager is self.person_manager:
+                self.remove_person(item)
+                self.add_person(item)
+        elif isinstance(item, Account):
+            self.remove(item)
+            owner = item.get_account_owner()
+            if (change != Change.REMOVED and owner is not None and owner.manager is self.person_manager and
+                    owner.get_account_by_id(item.account_id) is item):
+                self.add(item, item.get_account_name())
+        elif isinstance(item, Category):
+            if change != Change.REMOVED:
+                self.add_category(item)
+            elif ledger.find_category_code(item) == NO_CATEGORY:
+                # Categories still known to the ledger stay searchable, as they were before removal.
+                self.categories.discard(item)
+                self.remove(item)
+
+    def search(self, query : str, limit : int = 50, kinds : tuple[str] = None,
+               threshold : float = MATCH_THRESHOLD) -> list[SearchResult]:
+        """Find names similar to a query, treating its last word as possibly unfinished.
+
+        :param query: The text typed so far.
+        :type query: str
+        :param limit: Most results returned, defaults to 50
+        :type limit: int, optional
+        :param kinds: Restrict to PERSON, ACCOUNT, CATEGORY and/or TRANSACTION results, defaults to None
+        :type kinds: tuple[str], optional
+        :param threshold: Fraction of the query's trigrams a name must contain, defaults to MATCH_THRESHOLD
+        :type threshold: float, optional
+        :return: The best matches first, ties broken by closeness in length, then by name.
+        :rtype: list[SearchResult]
+        """
+        grams = trigrams(query, prefix=True)
+        if not grams:
+            return []
+        postings = sorted((self.postings.get(gram, ()) for gram in grams), key=len)
+        required = max(1, math.ceil(threshold * len(grams)))
+
+        # A name holding at least `required` of the query's trigrams holds one of its rarest
+        # len(grams) - required + 1, so only those postings need to be read.
+        candidates = set()
+        for keys in postings[:len(grams) - required + 1]:
+            candidates.update(keys)
+
+        ranked = []
+        for key in candidates:
+            hits = sum(1 for keys in postings if key in keys)
+            if hits >= required:
+                ranked.append((hits / len(grams), hits / (len(grams) + self.sizes[key] - hits), key))
+        ranked.sort(key=lambda entry: (-entry[0], -entry[1], self.names[entry[2]]))
+
+        results = []
+        for score, _, key in ranked:
+            if len(results) >= limit:
+                break
+            result = self.make_result(key, score)
+            if kinds is None or result.kind in kinds:
+                results.append(result)
+        return results
+
+    def make_result(self, key, score : float) -> SearchResult:
+        """
+        :param key: An indexed key.
+        :type key: object
+        :param score: The match score.
+        :type score: float
+        :return: The search result for the key.
+        :rtype: SearchResult
+        """
+        name = self.names[key]
+        if isinstance(key, int):
+            return SearchResult(TRANSACTION, name, name, score, len(self.name_rows.entries[key]))
+        if isinstance(key, Person):
+            return SearchResult(PERSON, key, name, score)
+        if isinstance(key, Account):
+            return SearchResult(ACCOUNT, key, name, score)
+        return SearchResult(CATEGORY, key, name, score)
+
+    def get_transactions(self, name : str) -> list[Transaction]:
+        """
+        :param name: A transaction name, e.g. the item of a TRANSACTION result.
+        :type name: str
+        :return: Live transactions with exactly the name, in row order.
+        :rtype: list[Transaction]
+        """
+        ledger = self.ledger
+        name_id = self.transaction_names.get(name)
+        if name_id is None:
+            return []
+        return [TRANSACTION_VIEWS.get(ledger.kinds[row], (Transaction, None))[0].from_row(ledger, row)
+                for row in sorted(self.name_rows.get(name_id))]
@@ -0,0 +1,262 @@
+import heapq
+from enum import Enum
+
+from .base_classes import Account, PersonManager, TransferIn, TransferOut
+from .ledger import TransactionKind, NO_CATEGORY, RECURRING
+from .money import Money
+
+class SplitMethod(Enum):
+    """How a shared bill is divided between the people sharing it."""
+    EQUAL = 'equal'
+    INCOME = 'income'
+    WEIGHTS = 'weights'
+
+class SplitRule():
+    def __init__(self, people : list = None, method : SplitMethod = SplitMethod.EQUAL, weights : dict = None,
+                 category = None):
+        """Constructor.
+
+        :param people: People sharing the bills, defaults to every managed person.
+        :type people: list[Person], optional
+        :param method: How the bills are divided, defaults to SplitMethod.EQUAL
+        :type method: SplitMethod, optional
+        :param weights: Share of each person for SplitMethod.WEIGHTS, defaults to None
+        :type weights: dict[Person, float], optional
+        :param category: Only share bills in this category, defaults to every bill not matched by another rule.
+        :type category: Category, optional
+        """
+        if method == SplitMethod.WEIGHTS and not weights:
+            raise ValueError("SplitMethod.WEIGHTS needs weights")
+        self.people = list(weights) if people is None and weights else people
+        self.method = method
+        self.weights = weights
+        self.category = category
+
+    def get_shares(self, people : list, incomes : dict) -> dict:
+        """
+        :param people: Every managed person, used when the rule names nobody.
+        :type people: list[Person]
+        :param incomes: Income of each person over the settled period.
+        :type incomes: dict[Person, float]
+        :return: Fraction of each shared bill owed by each person, summing to one.
+        :rtype: dict[Person, float]
+        """
+        sharing = self.people if self.people is not None else people
+        if self.method == SplitMethod.WEIGHTS:
+            weights = {person: self.weights.get(person, 0.0) for person in sharing}
+        elif self.method == SplitMethod.INCOME:
+            weights = {person: max(incomes.get(person, 0.0), 0.0) for person in sharing}
+        else:
+            weights = dict.fromkeys(sharing, 1.0)
+        total = sum(weights.values())
+        if total <= 0:
+            # Nobody has income (or every weight is zero): fall back to equal shares.
+            weights, total = dict.fromkeys(sharing, 1.0), len(sharing)
+        return {person: weight / total for person, weight in weights.items()} if total else {}
+
+class SettlementTransfer():
+    def __init__(self, payer, payee, from_account : Account, to_account : Account, amount : Money):
+        """Constructor.
+
+        :param payer: The person paying.
+        :type payer: Person
+        :param payee: The person paid.
+        :type payee: Person
+        :param from_account: The account paying.
+        :type from_account: Account
+        :param to_account: The account paid.
+        :type to_account: Account
+        :param amount: Amount to transfer.
+        :type amount: Money
+        """
+        self.payer = payer
+        self.payee = payee
+        self.from_account = from_account
+        self.to_account = to_account
+        self.amount = amount
+
+    def __repr__(self) -> str:
+        return f"SettlementTransfer({self.payer.get_name()} -> {self.payee.get_name()}: {self.amount})"
+
+class Settlement():
+    """Transfers which settle the shared bills of a household.
+
+    :attr:`positions` holds what each person is owed (positive) or owes (negative) before the
+    transfers; after :meth:`apply` every position is zero.
+    """
+    def __init__(self, positions : dict, transfers : list[SettlementTransfer], period : int):
+        """Constructor.
+
+        :param positions: Net position of each person.
+        :type positions: dict[Person, Money]
+        :param transfers: The transfers settling the positions.
+        :type transfers: list[SettlementTransfer]
+        :param period: The settled period.
+        :type period: int
+        """
+        self.positions = positions
+        self.transfers = transfers
+        self.period = period
+
+    def get_positions(self) -> dict:
+        """
+        :return: What each person is owed (positive) or owes (negative).
+        :rtype: dict[Person, Money]
+        """
+        return self.positions
+
+    def get_transfers(self) -> list[SettlementTransfer]:
+        """
+        :return: The transfers settling the positions.
+        :rtype: list[SettlementTransfer]
+        """
+        return self.transfers
+
+    def apply(self, name : str = "Settlement", date : str = "1") -> list[tuple[TransferOut, TransferIn]]:
+        """Record each transfer as a TransferOut from the payer's account and a TransferIn to the payee's.
+
+        :param name: Name of the created transactions, defaults to "Settlement"
+        :type name: str, optional
+        :param date: Date of the created transactions, defaults to "1"
+        :type date: str, optional
+        :return: The created transaction pairs.
+        :rtype: list[tuple[TransferOut, TransferIn]]
+        """
+        created = []
+        if not self.transfers:
+            return created
+        ledger = self.transfers[0].from_account.get_ledger()
+        period = self.period if self.period is not None else RECURRING
+        with ledger.batch():
+            for transfer in self.transfers:
+                created.append(transfer.from_account.add_transfer(name, transfer.amount, date, transfer.to_account,
+                                                                  period))
+        return created
+
+def simplify_debts(positions : dict) -> list[tuple[object, object, int]]:
+    """Settle net positions with few transfers.
+
+    The largest creditor is repeatedly paid by the largest debtor, each taken from a heap, so at
+    most one transfer fewer than the number of people with a position is produced, in
+    O(n log n) time. Positions are whole minor units, so the transfers settle them exactly.
+
+    :param positions: Minor units owed to (positive) or by (negative) each party. Must sum to zero.
+    :type positions: dict[object, int]
+    :return: (payer, payee, amount in minor units) triples.
+    :rtype: list[tuple[object, object, int]]
+    """
+    if sum(positions.values()):
+        raise ValueError("Positions do not sum to zero")
+
+    # The index breaks ties so that parties themselves are never compared.
+    creditors = [(-amount, index, party) for index, (party, amount) in enumerate(positions.items()) if amount > 0]
+    debtors = [(amount, index, party) for index, (party, amount) in enumerate(positions.items()) if amount < 0]
+    heapq.heapify(creditors)
+    heapq.heapify(debtors)
+
+    transfers = []
+    while creditors and debtors:
+        credit, creditor_index, creditor = heapq.heappop(creditors)
+        debt, debtor_index, debtor = heapq.heappop(debtors)
+        amount = min(-credit, -debt)
+        transfers.append((debtor, creditor, amount))
+        if credit + amount < 0:
+            heapq.heappush(creditors, (credit + amount, creditor_index, creditor))
+        if debt + amount < 0:
+            heapq.heappush(debtors, (debt + amount, debtor_index, debtor))
+    return transfers
+
+def settle(person_manager : PersonManager, rules : list[SplitRule] = None, period : int = RECURRING,
+           accounts : dict = None) -> Settlement:
+    """Work out the transfers which share a household's bills according to split rules.
+
+    Each bill is shared by the first rule for its category, or else by the first rule without a
+    category; bills matched by no rule are personal. The person paying a shared bill is owed
+    the other people's shares of it. Transfers already made between the people's accounts count
+    towards settling, so settling again after :meth:`Settlement.apply` produces no transfers.
+    Shares are allocated in whole minor units, so the positions always sum exactly to zero.
+
+    :param person_manager: The household.
+    :type person_manager: PersonManager
+    :param rules: How bills are shared, defaults to sharing every bill equally.
+    :type rules: list[SplitRule], optional
+    :param period: Period settled, RECURRING for monthly transactions or a YYYYMM month, or None for every row.
+    :type period: int, optional
+    :param accounts: Account each person settles from and into, defaults to the account paying
+        most shared bills (when owed) or receiving most income (when owing).
+    :type accounts: dict[Person, Account], optional
+    :return: The settlement.
+    :rtype: Settlement
+    """
+    if rules is None:
+        rules = [SplitRule()]
+    ledger = person_manager.get_ledger()
+    people = person_manager.get_people()
+    owners = {account.account_id: person for person in people for account in person.get_accounts()}
+    rules_by_category = {}
+    default_rule = None
+    for rule in rules:
+        if rule.people is not None and not set(rule.people) & set(people):
+            # Nobody managed shares these bills, so they stay personal.
+            continue
+        if rule.category is None:
+            default_rule = default_rule or rule
+        else:
+            # Looked up rather than registered, so settling never adds categories to the ledger. A
+            # category no row uses has no code, and no bills to share.
+            code = ledger.find_category_code(rule.category)
+            if code != NO_CATEGORY:
+                rules_by_category.setdefault(code, rule)
+
+    positions = dict.fromkeys(people, 0)
+    incomes : dict = {}
+    shared : dict[SplitRule, int] = {}
+    paid_by_account : dict[int, int] = {}
+    income_by_account : dict[int, int] = {}
+    kinds, amounts, account_ids, category_ids = ledger.kinds, ledger.amounts, ledger.account_ids, ledger.category_ids
+    for row in ledger.live_rows():
+        if period is not None and ledger.periods[row] != period:
+            continue
+        payer = owners.get(account_ids[row])
+        if payer is None:
+            continue
+        kind = kinds[row]
+        amount = amounts[row]
+        if kind == TransactionKind.BILL:
+            rule = rules_by_category.get(category_ids[row], default_rule)
+            if rule is not None:
+                shared[rule] = shared.get(rule, 0) + amount
+                positions[payer] += amount
+                paid_by_account[account_ids[row]] = paid_by_account.get(account_ids[row], 0) + amount
+        elif kind == TransactionKind.INCOME:
+            incomes[payer] = incomes.get(payer, 0) + amount
+            income_by_account[account_ids[row]] = income_by_account.get(account_ids[row], 0) + amount
+        elif kind == TransactionKind.TRANSFER_OUT:
+            target = ledger.counterparties.get(row)
+            payee = owners.get(target.account_id) if target is not None and target.get_ledger() is ledger else None
+            if payee is not None and payee is not payer:
+                positions[payer] += amount
+                positions[payee] -= amount
+
+    for rule, total in shared.items():
+        shares = {person: share for person, share in rule.get_shares(people, incomes).items() if person in positions}
+        if not any(shares.values()):
+            shares = dict.fromkeys(shares, 1.0)
+        for person, owed in zip(shares, Money.from_minor(total).allocate(shares.values())):
+            positions[person] -= owed.minor
+
+    accounts = dict(accounts or {})
+    for person, position in positions.items():
+        if person in accounts or not position:
+            continue
+        candidates = person.get_accounts()
+        if not candidates:
+            raise ValueError(f"{person.get_name()} has no account to settle with")
+        weights = paid_by_account if position > 0 else income_by_account
+        accounts[person] = max(candidates, key=lambda account: weights.get(account.account_id, 0))
+
+    currency = ledger.currency
+    transfers = [SettlementTransfer(payer, payee, accounts[payer], accounts[payee], Money.from_minor(amount, currency))
+                 for payer, payee, amount in simplify_debts(positions)]
+    return Settlement({person: Money.from_minor(position, currency) for person, position in positions.items()},
+                      transfers, period)
@@ -0,0 +1,424 @@
+import sqlite3
+from array import array
+from itertools import compress
+
+from .base_classes import Account, Category, CategoryManager, Person, PersonManager, Transaction, TRANSACTION_VIEWS
+from .dates import parse_date
+from .ledger import Change, Ledger, LedgerListener, TransactionKind
+from .money import MINOR_UNITS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS people (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS accounts (
+    id INTEGER PRIMARY KEY,
+    person_id INTEGER NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS categories (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    colour TEXT NOT NULL,
+    managed INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,
+    kind INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    account_id INTEGER NOT NULL,
+    category_id INTEGER,
+    counterparty_id INTEGER,
+    period INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS accounts_person ON accounts (person_id);
+CREATE INDEX IF NOT EXISTS transactions_account ON transactions (account_id, kind);
+CREATE INDEX IF NOT EXISTS transactions_category ON transactions (category_id, kind);
+CREATE INDEX IF NOT EXISTS transactions_day ON transactions (day);
+CREATE INDEX IF NOT EXISTS transactions_period ON transactions (period);
+"""
+
+# Stored in PRAGMA user_version. Version 1 stores amounts as integer minor units; databases
+# from before versioning stored them as REAL major units.
+SCHEMA_VERSION = 1
+
+class KeyMap():
+    """Stable database ids for in-memory objects."""
+    def __init__(self):
+        """Constructor."""
+        self.keys : dict = {}
+        self.next_key = 0
+
+    def get(self, item, default = None) -> int:
+        """
+        :param item: The object.
+        :type item: object
+        :param default: Value returned for objects without an id, defaults to None
+        :type default: int, optional
+        :return: The database id of the object.
+        :rtype: int
+        """
+        return self.keys.get(item, default)
+
+    def set(self, item, key : int):
+        """
+        :param item: The object.
+        :type item: object
+        :param key: The database id loaded for the object.
+        :type key: int
+        """
+        self.keys[item] = key
+        self.next_key = max(self.next_key, key + 1)
+
+    def key(self, item) -> int:
+        """
+        :param item: The object.
+        :type item: object
+        :return: The database id of the object, assigning a new one if needed.
+        :rtype: int
+        """
+        key = self.keys.get(item)
+        if key is None:
+            key = self.keys[item] = self.next_key
+            self.next_key += 1
+        return key
+
+class SqliteStorage(LedgerListener):
+    """Keeps a PersonManager, its ledger and a CategoryManager in a SQLite database.
+
+    Changes are picked up from ledger notifications and only the ids of changed rows are recorded,
+    so any number of edits to the same transaction cost one write. Pending changes are written in a
+    single database transaction by :meth:`flush`, which also runs automatically once
+    ``batch_size`` rows are pending.
+
+    People, accounts and categories keep stable database ids across sessions; ledger rows are
+    mapped to database ids through :attr:`row_keys`. People and accounts reported changed by the
+    ledger are written or deleted one by one. Categories are not reported by the ledger, so they
+    are compared with the copies last written and only those which differ are stored.
+    """
+    def __init__(self, path : str, person_manager : PersonManager = None,
+                 category_manager : CategoryManager = None, batch_size : int = 1000):
+        """Open (or create) a database. Existing contents are loaded when no managers are given.
+
+        :param path: Database file, or ":memory:".
+        :type path: str
+        :param person_manager: People to store, defaults to the people in the database.
+        :type person_manager: PersonManager, optional
+        :param category_manager: Categories to store, defaults to the categories in the database.
+        :type category_manager: CategoryManager, optional
+        :param batch_size: Number of pending rows which triggers a flush, defaults to 1000
+        :type batch_size: int, optional
+        """
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+        self.migrate()
+        self.batch_size = batch_size
+
+        self.person_keys = KeyMap()
+        self.account_keys = KeyMap()
+        self.category_keys = KeyMap()
+        self.row_keys = array('q')
+        self.rows_by_key : dict[int, int] = {}
+        self.dirty_rows : set[int] = set()
+        self.next_row_key = 0
+        # People and accounts whose stored copy is out of date, in the order new ids are assigned.
+        self.dirty_objects : dict = {}
+        # Category -> (name, colour, managed) as last written.
+        self.stored_categories : dict[Category, tuple] = {}
+
+        if person_manager is None:
+            self.person_manager, self.category_manager = self.load()
+        else:
+            self.person_manager = person_manager
+            self.category_manager = category_manager or CategoryManager()
+            with self.connection:
+                for table in ('people', 'accounts', 'categories', 'transactions'):
+                    self.connection.execute(f"DELETE FROM {table}")
+            for person in person_manager.get_people():
+                self.mark_person_dirty(person)
+            for row in range(len(person_manager.get_ledger())):
+                self.row_added(person_manager.get_ledger(), row)
+        self.ledger = self.person_manager.get_ledger()
+        self.ledger.subscribe(self)
+        self.flush()
+
+    def migrate(self):
+        """Upgrade a database written by an older version to :data:`SCHEMA_VERSION`."""
+        version, = self.connection.execute("PRAGMA user_version").fetchone()
+        if version >= SCHEMA_VERSION:
+            return
+        with self.connection:
+            if version < 1:
+                self.connection.execute(f"UPDATE transactions SET amount = CAST(ROUND(amount * {MINOR_UNITS}) AS INTEGER)")
+            self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        """Flush pending changes and close the database."""
+        self.flush()
+        self.ledger.unsubscribe(self)
+        self.connection.close()
+
+    def load(self) -> tuple[PersonManager, CategoryManager]:
+        """
+        :return: The people and categories stored in the database.
+        :rtype: tuple[PersonManager, CategoryManager]
+        """
+        person_manager = PersonManager()
+        category_manager = CategoryManager()
+        ledger = person_manager.get_ledger()
+        cursor = self.connection.cursor()
+
+        people = {}
+        for key, name in cursor.execute("SELECT id, name FROM people ORDER BY id"):
+            people[key] = person_manager.add_person_by_name(name)
+            self.person_keys.set(people[key], key)
+
+        accounts = {}
+        for key, person_key, name in cursor.execute("SELECT id, person_id, name FROM accounts ORDER BY id"):
+            accounts[key] = people[person_key].create_account(name)
+            self.account_keys.set(accounts[key], key)
+
+        categories = {}
+        for key, name, colour, managed in cursor.execute("SELECT id, name, colour, managed FROM categories ORDER BY id"):
+            colour = tuple(float(value) for value in colour.split(',') if value)
+            if managed:
+                categories[key] = category_manager.add_category(name, colour)
+            else:
+                categories[key] = Category(name, colour)
+            self.category_keys.set(categories[key], key)
+            self.stored_categories[categories[key]] = self.category_record(categories[key], bool(managed))
+
+        ranges = {}
+        rows = cursor.execute("SELECT id, kind, name, amount, date, account_id, category_id, counterparty_id, period "
+                              "FROM transactions ORDER BY account_id, id")
+        for key, kind, name, amount, date, account_key, category_key, counterparty_key, period in rows:
+            account = accounts.get(account_key)
+            if account is None:
+                continue
+            # Tables created before SCHEMA_VERSION 1 keep REAL affinity, so amounts may read back as floats.
+            row = ledger.append(TransactionKind(kind), name, int(amount), parse_date(date), account.account_id,
+                                ledger.category_code(categories.get(category_key)), period)
+            if counterparty_key is not None:
+                ledger.counterparties[row] = accounts.get(counterparty_key)
+            self.row_keys.append(key)
+            self.rows_by_key[key] = row
+            first = ranges.get(account, (row, row))[0]
+            ranges[account] = (first, row + 1)
+        for account, (first, end) in ranges.items():
+            account.defer_transactions(range(first, end))
+
+        self.next_row_key = max(self.rows_by_key, default=-1) + 1
+        return person_manager, category_manager
+
+    def mark_dirty(self, row : int):
+        """
+        :param row: A ledger row whose stored copy is out of date.
+        :type row: int
+        """
+        self.dirty_rows.add(row)
+        if len(self.dirty_rows) >= self.batch_size:
+            self.flush()
+
+    def mark_person_dirty(self, person : Person):
+        """
+        :param person: A person whose stored copy, and that of their accounts, is out of date.
+        :type person: Person
+        """
+        self.dirty_objects[person] = None
+        self.dirty_objects.update(dict.fromkeys(person.get_accounts()))
+
+    def row_added(self, ledger : Ledger, row : int):
+        self.row_keys.append(self.next_row_key)
+        self.rows_by_key[self.next_row_key] = row
+        self.next_row_key += 1
+        self.mark_dirty(row)
+
+    def row_released(self, ledger : Ledger, row : int):
+        self.mark_dirty(row)
+
+    def row_restored(self, ledger : Ledger, row : int):
+        self.mark_dirty(row)
+
+    def row_changed(self, ledger : Ledger, row : int, column : str, old_value):
+        self.mark_dirty(row)
+
+    def ledger_compacted(self, ledger : Ledger, rows):
+        # Dropped rows were removed, and are already deleted from the database unless still pending.
+        with self.connection:
+            self.connection.executemany("DELETE FROM transactions WHERE id = ?", [
+                (self.row_keys[row],) for row in self.dirty_rows if rows[row] < 0])
+        self.row_keys = array('q', compress(self.row_keys, map((0).__le__, rows)))
+        self.rows_by_key = {key: row for row, key in enumerate(self.row_keys)}
+        self.dirty_rows = {rows[row] for row in self.dirty_rows if rows[row] >= 0}
+
+    def account_owner_changed(self, ledger : Ledger, account, old_owner):
+        self.dirty_objects[account] = None
+
+    def object_changed(self, ledger : Ledger, item, change : Change):
+        if isinstance(item, Person) and change != Change.CHANGED:
+            self.mark_person_dirty(item)
+        elif not isinstance(item, Category):
+            # Categories are compared with what was last written when flushing.
+            self.dirty_objects[item] = None
+
+    def is_stored(self, item) -> bool:
+        """
+        :param item: A person or account.
+        :type item: Person or Account
+        :return: True if the item belongs to the stored people.
+        :rtype: bool
+        """
+        if isinstance(item, Account):
+            owner = item.get_account_owner()
+            return (owner is not None and owner.get_ledger() is self.ledger and
+                    owner.get_account_by_id(item.account_id) is item and self.is_stored(owner))
+        return item.manager is self.person_manager
+
+    @staticmethod
+    def category_record(category : Category, managed : bool) -> tuple:
+        """
+        :param category: A category.
+        :type category: Category
+        :param managed: Whether the category belongs to the CategoryManager.
+        :type managed: bool
+        :return: The category's name, colour and managed flag as stored.
+        :rtype: tuple
+        """
+        return (category.get_name(), ','.join(str(value) for value in category.get_colour() or ()), managed)
+
+    def flush(self):
+        """Write every pending change in one database transaction."""
+        ledger = self.person_manager.get_ledger()
+
+        written_people = []
+        written_accounts = []
+        deleted_people = []
+        deleted_accounts = []
+        for item in self.dirty_objects:
+            if isinstance(item, Account):
+                if self.is_stored(item):
+                    written_accounts.append((self.account_keys.key(item), self.person_keys.key(item.get_account_owner()),
+                                             item.get_account_name()))
+                elif self.account_keys.get(item) is not None:
+                    deleted_accounts.append((self.account_keys.get(item),))
+            elif self.is_stored(item):
+                written_people.append((self.person_keys.key(item), item.get_name()))
+            elif self.person_keys.get(item) is not None:
+                deleted_people.append((self.person_keys.get(item),))
+        self.dirty_objects.clear()
+
+        categories = dict.fromkeys(self.category_manager.get_categories(), True)
+        for category in ledger.categories:
+            if category is not None:
+                categories.setdefault(category, False)
+        written_categories = []
+        for category, is_managed in categories.items():
+            record = self.category_record(category, is_managed)
+            if self.stored_categories.get(category) != record:
+                self.stored_categories[category] = record
+                written_categories.append((self.category_keys.key(category),) + record)
+        deleted_categories = []
+        for category in [category for category in self.stored_categories if category not in categories]:
+            del self.stored_categories[category]
+            deleted_categories.append((self.category_keys.get(category),))
+
+        deleted = []
+        written = []
+        for row in self.dirty_rows:
+            account = ledger.account_at(ledger.account_ids[row])
+            if not ledger.alive[row] or account is None:
+                deleted.append((self.row_keys[row],))
+                continue
+            category = ledger.category_at(ledger.category_ids[row])
+            counterparty = ledger.counterparties.get(row)
+            written.append((
+                self.row_keys[row], int(ledger.kinds[row]), ledger.get_name(row), ledger.amounts[row],
+                ledger.get_date(row), ledger.days[row], self.account_keys.key(account),
+                None if category is None else self.category_keys.key(category),
+                None if counterparty is None else self.account_keys.key(counterparty),
+                ledger.periods[row],
+            ))
+        self.dirty_rows.clear()
+
+        if not (written_people or written_accounts or deleted_people or deleted_accounts or
+                written_categories or deleted_categories or written or deleted):
+            return
+        with self.connection:
+            self.connection.executemany("DELETE FROM people WHERE id = ?", deleted_people)
+            self.connection.executemany("INSERT OR REPLACE INTO people (id, name) VALUES (?, ?)", written_people)
+            self.connection.executemany("DELETE FROM accounts WHERE id = ?", deleted_accounts)
+            self.connection.executemany("INSERT OR REPLACE INTO accounts (id, person_id, name) VALUES (?, ?, ?)",
+                                        written_accounts)
+            self.connection.executemany("DELETE FROM categories WHERE id = ?", deleted_categories)
+            self.connection.executemany("INSERT OR REPLACE INTO categories (id, name, colour, managed) "
+                                        "VALUES (?, ?, ?, ?)", written_categories)
+            self.connection.executemany("DELETE FROM transactions WHERE id = ?", deleted)
+            self.connection.executemany("INSERT OR REPLACE INTO transactions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                        written)
+
+    def query(self, kind : TransactionKind = None, person = None, account = None, category = None,
+              first_day : int = None, last_day : int = None) -> list:
+        """Find transactions using the database indexes. Pending changes are flushed first.
+
+        :param kind: Restrict to a kind of transaction, defaults to None
+        :type kind: TransactionKind, optional
+        :param person: Restrict to accounts owned by a person, defaults to None
+        :type person: Person, optional
+        :param account: Restrict to an account, defaults to None
+        :type account: Account, optional
+        :param category: Restrict to a category, defaults to None
+        :type category: Category, optional
+        :param first_day: Earliest day of the month, defaults to None
+        :type first_day: int, optional
+        :param last_day: Latest day of the month, defaults to None
+        :type last_day: int, optional
+        :return: Matching transactions.
+        :rtype: list[Transaction]
+        """
+        self.flush()
+        conditions = []
+        parameters = []
+        if kind is not None:
+            conditions.append("transactions.kind = ?")
+            parameters.append(int(kind))
+        if person is not None:
+            conditions.append("transactions.account_id IN (SELECT id FROM accounts WHERE person_id = ?)")
+            parameters.append(self.person_keys.get(person, -1))
+        if account is not None:
+            conditions.append("transactions.account_id = ?")
+            parameters.append(self.account_keys.get(account, -1))
+        if category is not None:
+            conditions.append("transactions.category_id = ?")
+            parameters.append(self.category_keys.get(category, -1))
+        if first_day is not None:
+            conditions.append("transactions.day >= ?")
+            parameters.append(first_day)
+        if last_day is not None:
+            conditions.append("transactions.day <= ?")
+            parameters.append(last_day)
+        sql = "SELECT id FROM transactions"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+
+        ledger = self.person_manager.get_ledger()
+        transactions = []
+        for key, in self.connection.execute(sql, parameters):
+            row = self.rows_by_key[key]
+            view_class, _ = TRANSACTION_VIEWS.get(ledger.kinds[row], (Transaction, None))
+            transactions.append(view_class.from_row(ledger, row))
+        return transactions
+
+    def get_bills(self, category : Category = None, person = None) -> list:
+        """
+        :param category: Restrict to a category, defaults to None
+        :type category: Category, optional
+        :param person: Restrict to accounts owned by a person, defaults to None
+        :type person: Person, optional
+        :return: Matching bills.
+        :rtype: list[Bill]
+        """
+        return self.query(TransactionKind.BILL, person=person, category=category)
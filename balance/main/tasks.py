@@ -0,0 +1,234 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from PySide6 import QtCore
+
+from .importer import CsvFormat, StatementChunk, detect_format, read_csv, read_ofx, to_records
+from .instrumentation import get_recorder
+
+# Shortest time between two progress signals of a task, so a fast loop cannot flood the GUI thread.
+PROGRESS_INTERVAL = 1 / 60
+
+class TaskCancelled(Exception):
+    """Raised inside a task function when the task has been cancelled."""
+
+class TaskContext():
+    """Passed to task functions to report progress and check for cancellation.
+
+    Cancellation is cooperative: a function should call :meth:`check_cancelled` (or iterate
+    through :meth:`track`) regularly so that a cancelled task stops promptly.
+    """
+    def __init__(self, task : 'Task'):
+        """Constructor.
+
+        :param task: The task running the function.
+        :type task: Task
+        """
+        self.task = task
+        self.cancel_event = threading.Event()
+        self.last_progress = 0.0
+
+    def is_cancelled(self) -> bool:
+        """
+        :return: True once the task has been cancelled.
+        :rtype: bool
+        """
+        return self.cancel_event.is_set()
+
+    def check_cancelled(self):
+        """
+        :raises TaskCancelled: If the task has been cancelled.
+        """
+        if self.cancel_event.is_set():
+            raise TaskCancelled()
+
+    def report_progress(self, done : int, total : int = 0):
+        """
+        :param done: Units of work done so far.
+        :type done: int
+        :param total: Units of work in total, defaults to 0 when unknown.
+        :type total: int, optional
+        """
+        now = time.perf_counter()
+        if now - self.last_progress >= PROGRESS_INTERVAL or (total and done >= total):
+            self.last_progress = now
+            self.task.progress.emit(done, total)
+
+    def track(self, items, total : int = 0, every : int = 1000):
+        """Iterate over items, reporting progress and checking for cancellation as it goes.
+
+        :param items: The items.
+        :type items: Iterable
+        :param total: Number of items, defaults to 0 when unknown.
+        :type total: int, optional
+        :param every: Items between two checks, defaults to 1000
+        :type every: int, optional
+        :return: Generator of the items.
+        :rtype: Iterator
+        """
+        for done, item in enumerate(items, 1):
+            if done % every == 0:
+                self.check_cancelled()
+                self.report_progress(done, total)
+            yield item
+
+class Task(QtCore.QObject):
+    """A function running on a :class:`TaskScheduler` thread.
+
+    Signals are emitted from the worker thread; Qt queues them to receivers living on the GUI
+    thread, so connected slots can update widgets directly. Exactly one of :attr:`succeeded`,
+    :attr:`failed` or :attr:`cancelled` is emitted, followed by :attr:`finished`.
+    """
+    progress = QtCore.Signal(int, int)
+    succeeded = QtCore.Signal(object)
+    failed = QtCore.Signal(object)
+    cancelled = QtCore.Signal()
+    finished = QtCore.Signal()
+
+    def __init__(self, name : str = ""):
+        """Constructor.
+
+        :param name: Description of the task, defaults to ""
+        :type name: str, optional
+        """
+        super().__init__()
+        self.name = name
+        self.context = TaskContext(self)
+        self.future : Future = None
+
+    def run(self, function, args : tuple, kwargs : dict):
+        """Run the function on the current thread. Called by the scheduler.
+
+        :param function: Called with the task's :class:`TaskContext` followed by args and kwargs.
+        :type function: Callable
+        :param args: Positional arguments.
+        :type args: tuple
+        :param kwargs: Keyword arguments.
+        :type kwargs: dict
+        :return: The function's result.
+        :rtype: object
+        """
+        try:
+            self.context.check_cancelled()
+            with get_recorder().span(f"task.{getattr(function, '__name__', 'function')}"):
+                result = function(self.context, *args, **kwargs)
+            self.context.check_cancelled()
+        except TaskCancelled:
+            self.cancelled.emit()
+            raise
+        except Exception as error:
+            self.failed.emit(error)
+            raise
+        else:
+            self.succeeded.emit(result)
+            return result
+        finally:
+            self.finished.emit()
+
+    def cancel(self):
+        """Ask the task to stop. A task which has not started yet never runs."""
+        self.context.cancel_event.set()
+
+    def is_done(self) -> bool:
+        """
+        :return: True once the task has finished, failed or been cancelled.
+        :rtype: bool
+        """
+        return self.future is not None and self.future.done()
+
+    def result(self, timeout : float = None):
+        """Wait for the task. Only for use off the GUI thread or in scripts.
+
+        :param timeout: Seconds to wait, defaults to waiting forever.
+        :type timeout: float, optional
+        :return: The function's result.
+        :rtype: object
+        """
+        return self.future.result(timeout)
+
+class TaskScheduler(QtCore.QObject):
+    """Runs long domain operations, such as statement parsing and projections, off the GUI thread.
+
+    Task functions should only read shared domain objects, or build new data, and leave changes to
+    the ledger to a slot connected to :attr:`Task.succeeded` so that ledger listeners (including
+    the Qt models) are always notified on the GUI thread.
+    """
+    def __init__(self, max_workers : int = None):
+        """Constructor.
+
+        :param max_workers: Number of worker threads, defaults to the executor's default.
+        :type max_workers: int, optional
+        """
+        super().__init__()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="balance-task")
+        self.tasks : set[Task] = set()
+
+    def submit(self, function, *args, name : str = "", **kwargs) -> Task:
+        """
+        :param function: Called on a worker thread with a :class:`TaskContext` followed by args and kwargs.
+        :type function: Callable
+        :param name: Description of the task, defaults to ""
+        :type name: str, optional
+        :return: The task. Connect to its signals before returning to the event loop.
+        :rtype: Task
+        """
+        task = Task(name)
+        self.tasks.add(task)
+        task.finished.connect(lambda: self.tasks.discard(task))
+        task.future = self.executor.submit(task.run, function, args, kwargs)
+        return task
+
+    def get_tasks(self) -> list[Task]:
+        """
+        :return: Tasks which have not finished.
+        :rtype: list[Task]
+        """
+        return list(self.tasks)
+
+    def cancel_all(self):
+        """Ask every task to stop."""
+        for task in list(self.tasks):
+            task.cancel()
+
+    def shutdown(self, wait : bool = True):
+        """Cancel every task and stop the worker threads.
+
+        :param wait: Wait for running tasks to stop, defaults to True
+        :type wait: bool, optional
+        """
+        self.cancel_all()
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+
+scheduler : TaskScheduler = None
+
+def get_scheduler() -> TaskScheduler:
+    """
+    :return: The application's task scheduler, created on first use.
+    :rtype: TaskScheduler
+    """
+    global scheduler
+    if scheduler is None:
+        scheduler = TaskScheduler()
+    return scheduler
+
+def parse_statement_task(context : TaskContext, path : str, file_format : str = None,
+                         csv_format : CsvFormat = None) -> StatementChunk:
+    """Parse a statement file as a task. Add the result with ``account.add_transactions(chunk.records())``.
+
+    :param context: The task context.
+    :type context: TaskContext
+    :param path: The statement file.
+    :type path: str
+    :param file_format: "csv" or "ofx", defaults to detecting it from the file extension.
+    :type file_format: str, optional
+    :param csv_format: Column layout of a CSV file, defaults to CsvFormat()
+    :type csv_format: CsvFormat, optional
+    :return: The parsed records.
+    :rtype: StatementChunk
+    """
+    file_format = file_format or detect_format(path)
+    # The parsers are bound by name here, so they are timed at the call site rather than patched.
+    with get_recorder().span(f"importer.parse_{file_format}"):
+        rows = read_ofx(path) if file_format == 'ofx' else read_csv(path, csv_format)
+        return StatementChunk.from_records(context.track(to_records(rows)))
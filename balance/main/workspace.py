@@ -0,0 +1,211 @@
+import os
+import time
+from collections import OrderedDict
+
+from . import persistence
+from .base_classes import CategoryManager, PersonManager
+
+FILE_EXTENSION = '.baln'
+
+# Households kept in memory at once; the least recently opened beyond this are saved and unloaded.
+DEFAULT_CAPACITY = 4
+
+class Household():
+    """One family's people and categories, isolated from every other household of a :class:`Workspace`."""
+    def __init__(self, name : str, person_manager : PersonManager, category_manager : CategoryManager):
+        """Constructor.
+
+        :param name: Name of the household.
+        :type name: str
+        :param person_manager: The household's people, accounts and transactions.
+        :type person_manager: PersonManager
+        :param category_manager: The household's categories.
+        :type category_manager: CategoryManager
+        """
+        self.name = name
+        self.person_manager = person_manager
+        self.category_manager = category_manager
+        self.last_used = time.monotonic()
+
+    def get_name(self) -> str:
+        """
+        :return: Name of the household.
+        :rtype: str
+        """
+        return self.name
+
+    def get_person_manager(self) -> PersonManager:
+        """
+        :return: The household's people.
+        :rtype: PersonManager
+        """
+        return self.person_manager
+
+    def get_category_manager(self) -> CategoryManager:
+        """
+        :return: The household's categories.
+        :rtype: CategoryManager
+        """
+        return self.category_manager
+
+class Workspace():
+    """A directory of households, each saved as its own file and loaded only while in use.
+
+    Opening a household loads it on first use. At most ``capacity`` households stay in memory:
+    opening another saves and unloads the least recently opened one, and households left unopened
+    for ``idle_seconds`` are unloaded too, so memory is bounded however many households exist.
+    """
+    def __init__(self, directory : str, capacity : int = DEFAULT_CAPACITY, idle_seconds : float = None):
+        """Constructor.
+
+        :param directory: Directory holding one file per household, created if missing.
+        :type directory: str
+        :param capacity: Households kept in memory at once, defaults to DEFAULT_CAPACITY
+        :type capacity: int, optional
+        :param idle_seconds: Unload households not opened for this long, defaults to None for never.
+        :type idle_seconds: float, optional
+        """
+        self.directory = directory
+        self.capacity = max(1, capacity)
+        self.idle_seconds = idle_seconds
+        self.households : OrderedDict[str, Household] = OrderedDict()
+        os.makedirs(directory, exist_ok=True)
+
+    def get_path(self, name : str) -> str:
+        """
+        :param name: Name of a household.
+        :type name: str
+        :return: The file the household is saved to.
+        :rtype: str
+        """
+        if not name or name != os.path.basename(name) or name in (os.curdir, os.pardir):
+            raise ValueError(f"Invalid household name: {name!r}")
+        return os.path.join(self.directory, name + FILE_EXTENSION)
+
+    def get_household_names(self) -> list[str]:
+        """
+        :return: Names of every household, loaded or not, in alphabetical order.
+        :rtype: list[str]
+        """
+        names = {entry[:-len(FILE_EXTENSION)] for entry in os.listdir(self.directory)
+                 if entry.endswith(FILE_EXTENSION)}
+        names.update(self.households)
+        return sorted(names)
+
+    def get_loaded_names(self) -> list[str]:
+        """
+        :return: Names of the households in memory, least recently opened first.
+        :rtype: list[str]
+        """
+        return list(self.households)
+
+    def has_household(self, name : str) -> bool:
+        """
+        :param name: Name of a household.
+        :type name: str
+        :return: True if the household exists, loaded or not.
+        :rtype: bool
+        """
+        return name in self.households or os.path.exists(self.get_path(name))
+
+    def create_household(self, name : str) -> Household:
+        """Create an empty household, save it and open it.
+
+        :param name: Name of the household.
+        :type name: str
+        :return: The new household.
+        :rtype: Household
+        """
+        if self.has_household(name):
+            raise ValueError(f"A household named {name} already exists")
+        household = Household(name, PersonManager(), CategoryManager())
+        self.households[name] = household
+        self.save_household(name)
+        self.trim(keep=name)
+        return household
+
+    def open_household(self, name : str) -> Household:
+        """Get a household, loading it if it is not in memory.
+
+        :param name: Name of the household.
+        :type name: str
+        :return: The household.
+        :rtype: Household
+        """
+        household = self.households.get(name)
+        if household is None:
+            path = self.get_path(name)
+            if not os.path.exists(path):
+                raise ValueError(f"No household named {name}")
+            household = Household(name, *persistence.load(path))
+            self.households[name] = household
+        else:
+            self.households.move_to_end(name)
+        household.last_used = time.monotonic()
+        self.trim(keep=name)
+        return household
+
+    def save_household(self, name : str):
+        """
+        :param name: Name of a loaded household to save.
+        :type name: str
+        """
+        household = self.households[name]
+        persistence.save(self.get_path(name), household.person_manager, household.category_manager)
+
+    def save(self):
+        """Save every loaded household."""
+        for name in self.households:
+            self.save_household(name)
+
+    def evict(self, name : str):
+        """Save a household and unload it from memory. Households not loaded are ignored.
+
+        :param name: Name of the household.
+        :type name: str
+        """
+        if name not in self.households:
+            return
+        self.save_household(name)
+        del self.households[name]
+
+    def trim(self, keep : str = None):
+        """Unload idle households, then the least recently opened beyond the capacity.
+
+        :param keep: A household which must stay loaded, defaults to None
+        :type keep: str, optional
+        """
+        if self.idle_seconds is not None:
+            cutoff = time.monotonic() - self.idle_seconds
+            for name, household in list(self.households.items()):
+                if name != keep and household.last_used < cutoff:
+                    self.evict(name)
+        for name in list(self.households):
+            if len(self.households) <= self.capacity:
+                break
+            if name != keep:
+                self.evict(name)
+
+    def set_capacity(self, capacity : int):
+        """
+        :param capacity: Households kept in memory at once, at least one.
+        :type capacity: int
+        """
+        self.capacity = max(1, capacity)
+        self.trim()
+
+    def remove_household(self, name : str):
+        """Delete a household from memory and disk.
+
+        :param name: Name of the household.
+        :type name: str
+        """
+        self.households.pop(name, None)
+        path = self.get_path(name)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def close(self):
+        """Save and unload every household."""
+        self.save()
+        self.households.clear()
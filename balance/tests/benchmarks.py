@@ -0,0 +1,478 @@
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from ..main.base_classes import CategoryManager, PersonManager
+from ..main.importer import StatementRow, import_rows
+from ..main.persistence import load, save
+from ..main.search import SearchIndex
+
+# Version of the JSON layout written by :func:`run`.
+RESULTS_VERSION = 1
+
+BILL_NAMES = ('Rent', 'Council Tax', 'Electricity', 'Gas', 'Water', 'Broadband', 'Phone', 'Insurance',
+              'Gym', 'Streaming', 'Groceries', 'Fuel')
+INCOME_NAMES = ('Salary', 'Freelance', 'Dividends', 'Benefits')
+CATEGORY_NAMES = ('Housing', 'Utilities', 'Transport', 'Food', 'Leisure', 'Insurance')
+
+class Household():
+    """Size of a synthetic household: people × accounts per person × transactions per account."""
+    def __init__(self, people : int = 10, accounts : int = 3, transactions : int = 1000, seed : int = 0):
+        """Constructor.
+
+        :param people: Number of people, defaults to 10
+        :type people: int, optional
+        :param accounts: Accounts per person, defaults to 3
+        :type accounts: int, optional
+        :param transactions: Transactions per account, defaults to 1000
+        :type transactions: int, optional
+        :param seed: Random seed, so that runs generate the same data, defaults to 0
+        :type seed: int, optional
+        """
+        self.people = people
+        self.accounts = accounts
+        self.transactions = transactions
+        self.seed = seed
+
+    def get_rows(self) -> int:
+        """
+        :return: Total number of transactions.
+        :rtype: int
+        """
+        return self.people * self.accounts * self.transactions
+
+    def to_dict(self) -> dict:
+        """
+        :return: The parameters, for the results file.
+        :rtype: dict
+        """
+        return {'people': self.people, 'accounts': self.accounts, 'transactions': self.transactions,
+                'seed': self.seed}
+
+def person_name(index : int) -> str:
+    """
+    :param index: Index of the person.
+    :type index: int
+    :return: Name of the generated person.
+    :rtype: str
+    """
+    return f"Person {index:05d}"
+
+def account_name(index : int) -> str:
+    """
+    :param index: Index of the account within its person.
+    :type index: int
+    :return: Name of the generated account.
+    :rtype: str
+    """
+    return f"Account {index}"
+
+def fill_account(account, count : int, categories : list, rng : random.Random) -> list:
+    """Add a mix of bills (about two thirds) and incomes to an account.
+
+    :param account: The account.
+    :type account: Account
+    :param count: Number of transactions.
+    :type count: int
+    :param categories: Categories assigned to bills.
+    :type categories: list[Category]
+    :param rng: Random source.
+    :type rng: random.Random
+    :return: The added transactions.
+    :rtype: list[Transaction]
+    """
+    added = []
+    for _ in range(count):
+        day = str(rng.randint(1, 28))
+        if rng.random() < 0.66:
+            added.append(account.add_bill(rng.choice(BILL_NAMES), rng.randint(100, 200000) / 100, day,
+                                          rng.choice(categories)))
+        else:
+            added.append(account.add_income(rng.choice(INCOME_NAMES), rng.randint(1000, 500000) / 100, day))
+    return added
+
+def generate_household(size : Household) -> tuple[PersonManager, CategoryManager]:
+    """Build a synthetic household.
+
+    :param size: Size of the household.
+    :type size: Household
+    :return: The people and categories.
+    :rtype: tuple[PersonManager, CategoryManager]
+    """
+    rng = random.Random(size.seed)
+    person_manager = PersonManager()
+    category_manager = CategoryManager()
+    categories = [category_manager.add_category(name, (rng.random(), rng.random(), rng.random()))
+                  for name in CATEGORY_NAMES]
+    for person_index in range(size.people):
+        person = person_manager.add_person_by_name(person_name(person_index))
+        for index in range(size.accounts):
+            fill_account(person.create_account(account_name(index)), size.transactions, categories, rng)
+    return person_manager, category_manager
+
+def generate_statement(rows : int, seed : int = 0) -> list[StatementRow]:
+    """
+    :param rows: Number of statement rows.
+    :type rows: int
+    :param seed: Random seed, defaults to 0
+    :type seed: int, optional
+    :return: Rows of a synthetic bank statement, in date order.
+    :rtype: list[StatementRow]
+    """
+    rng = random.Random(seed)
+    start = datetime.date(2020, 1, 1)
+    statement = []
+    for index in range(rows):
+        date = start + datetime.timedelta(days=index * 3 // 10)
+        if rng.random() < 0.8:
+            statement.append(StatementRow(date, rng.choice(BILL_NAMES), -rng.randint(100, 20000), ''))
+        else:
+            statement.append(StatementRow(date, rng.choice(INCOME_NAMES), rng.randint(1000, 500000), ''))
+    return statement
+
+def measure(function, repeat : int, setup = None, operations : int = 1) -> dict:
+    """Time a function several times. The garbage collector is paused while timing.
+
+    :param function: Called with the result of setup, or with no arguments.
+    :type function: Callable
+    :param repeat: Number of timed runs.
+    :type repeat: int
+    :param setup: Called before each run, outside the timing, defaults to None
+    :type setup: Callable, optional
+    :param operations: Operations done by one run, used for the per-operation time, defaults to 1
+    :type operations: int, optional
+    :return: Timing statistics in seconds.
+    :rtype: dict
+    """
+    timings = []
+    for _ in range(repeat):
+        state = setup() if setup is not None else None
+        gc.collect()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            if setup is not None:
+                function(state)
+            else:
+                function()
+            timings.append(time.perf_counter() - started)
+        finally:
+            gc.enable()
+    best = min(timings)
+    return {
+        'repeat': repeat,
+        'operations': operations,
+        'min': best,
+        'median': statistics.median(timings),
+        'mean': statistics.fmean(timings),
+        'max': max(timings),
+        'per_operation': best / operations if operations else best,
+    }
+
+BENCHMARKS = {}
+
+def benchmark(name : str):
+    """Register a benchmark function taking (size, repeat) and returning the result of :func:`measure`.
+
+    :param name: Name of the benchmark in the results.
+    :type name: str
+    :return: Decorator.
+    :rtype: Callable
+    """
+    def register(function):
+        BENCHMARKS[name] = function
+        return function
+    return register
+
+@benchmark('generate_household')
+def bench_generate_household(size : Household, repeat : int) -> dict:
+    return measure(lambda: generate_household(size), repeat, operations=size.get_rows())
+
+@benchmark('person_lookup')
+def bench_person_lookup(size : Household, repeat : int) -> dict:
+    person_manager, _ = generate_household(size)
+    names = [person_name(index) for index in range(size.people)]
+
+    def lookup():
+        for name in names:
+            person_manager.get_person_by_name(name)
+    return measure(lookup, repeat, operations=len(names))
+
+@benchmark('account_lookup')
+def bench_account_lookup(size : Household, repeat : int) -> dict:
+    person_manager, _ = generate_household(size)
+    people = person_manager.get_people()
+    names = [account_name(index) for index in range(size.accounts)]
+
+    def lookup():
+        for person in people:
+            for name in names:
+                person.get_account_by_name(name)
+    return measure(lookup, repeat, operations=len(people) * len(names))
+
+@benchmark('account_insert_remove')
+def bench_account_insert_remove(size : Household, repeat : int) -> dict:
+    person_manager, _ = generate_household(size)
+    person = person_manager.get_people()[0]
+
+    def churn():
+        accounts = [person.create_account(f"Temporary {index}") for index in range(size.accounts * 10)]
+        for account in accounts:
+            person.remove_account(account)
+    return measure(churn, repeat, operations=size.accounts * 20)
+
+@benchmark('transaction_insert')
+def bench_transaction_insert(size : Household, repeat : int) -> dict:
+    person_manager, category_manager = generate_household(size)
+    categories = category_manager.get_categories()
+    person = person_manager.get_people()[0]
+    counter = iter(range(sys.maxsize))
+
+    def setup():
+        return person.create_account(f"Insert {next(counter)}")
+    return measure(lambda account: fill_account(account, size.transactions, categories, random.Random(size.seed)),
+                   repeat, setup, operations=size.transactions)
+
+@benchmark('transaction_remove')
+def bench_transaction_remove(size : Household, repeat : int) -> dict:
+    person_manager, category_manager = generate_household(size)
+    categories = category_manager.get_categories()
+    person = person_manager.get_people()[0]
+    counter = iter(range(sys.maxsize))
+
+    def setup():
+        account = person.create_account(f"Remove {next(counter)}")
+        fill_account(account, size.transactions, categories, random.Random(size.seed))
+        return account
+
+    def remove(account):
+        for bill in list(account.get_bills()):
+            account.remove_bill(bill)
+        for income in list(account.get_incomes()):
+            account.remove_income(income)
+    return measure(remove, repeat, setup, operations=size.transactions)
+
+@benchmark('totals_cold')
+def bench_totals_cold(size : Household, repeat : int) -> dict:
+    person_manager, _ = generate_household(size)
+    ledger = person_manager.get_ledger()
+    people = person_manager.get_people()
+
+    def setup():
+        if ledger.balances is not None:
+            ledger.balances.close()
+
+    def totals(_):
+        for person in people:
+            person.get_total()
+    return measure(totals, repeat, setup, operations=size.get_rows())
+
+@benchmark('totals_warm')
+def bench_totals_warm(size : Household, repeat : int) -> dict:
+    person_manager, _ = generate_household(size)
+    people = person_manager.get_people()
+    accounts = [account for person in people for account in person.get_accounts()]
+    person_manager.get_ledger().get_balances()
+
+    def totals():
+        for person in people:
+            person.get_total()
+        for account in accounts:
+            account.get_total()
+    return measure(totals, repeat, operations=len(people) + len(accounts))
+
+@benchmark('import_statement')
+def bench_import_statement(size : Household, repeat : int) -> dict:
+    statement = generate_statement(size.transactions * size.accounts, size.seed)
+    person_manager, _ = generate_household(size)
+    person = person_manager.get_people()[0]
+    counter = iter(range(sys.maxsize))
+
+    def setup():
+        return person.create_account(f"Import {next(counter)}")
+    return measure(lambda account: import_rows(statement, account), repeat, setup, operations=len(statement))
+
+@benchmark('save')
+def bench_save(size : Household, repeat : int) -> dict:
+    person_manager, category_manager = generate_household(size)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'household.baln')
+        return measure(lambda: save(path, person_manager, category_manager), repeat, operations=size.get_rows())
+
+@benchmark('load')
+def bench_load(size : Household, repeat : int) -> dict:
+    person_manager, category_manager = generate_household(size)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'household.baln')
+        save(path, person_manager, category_manager)
+
+        def load_totals():
+            # Totals force the columns to be read, so lazy loading is not flattered.
+            for person in load(path)[0].get_people():
+                person.get_total()
+        return measure(load_totals, repeat, operations=size.get_rows())
+
+@benchmark('search_as_you_type')
+def bench_search_as_you_type(size : Household, repeat : int) -> dict:
+    person_manager, category_manager = generate_household(size)
+    search_index = SearchIndex(person_manager, category_manager)
+    # Every keystroke of a few queries, including misspellings.
+    queries = [query[:length] for query in ('Electricity', 'Brodband', 'Insurence', 'Person 1')
+               for length in range(1, len(query) + 1)]
+
+    def search():
+        for query in queries:
+            search_index.search(query)
+    return measure(search, repeat, operations=len(queries))
+
+@benchmark('widget_people_manager')
+def bench_widget_people_manager(size : Household, repeat : int) -> dict:
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    try:
+        from PySide6 import QtWidgets
+    except ImportError:
+        return {'skipped': "PySide6 is not installed"}
+    from ..main.main import WidgetPeopleManager
+
+    application = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    names = [person_name(index) for index in range(size.people)]
+
+    def build():
+        widget = WidgetPeopleManager()
+        for name in names:
+            widget.add_person(name)
+        for person in widget.person_manager.get_people():
+            widget.load_person(person)
+        application.processEvents()
+        return widget
+
+    def teardown_build():
+        build().deleteLater()
+    result = measure(teardown_build, repeat, operations=len(names))
+
+    widget = build()
+    people = widget.person_manager.get_people()
+    widget.set_panel_cache_size(len(people))
+    result['switch_per_operation'] = measure(lambda: [widget.load_person(person) for person in people],
+                                             repeat, operations=len(people))['per_operation']
+    widget.deleteLater()
+    application.processEvents()
+    return result
+
+def git_commit() -> str:
+    """
+    :return: The checked out commit, or None outside a git checkout.
+    :rtype: str
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(size : Household, repeat : int = 5, names : list[str] = None, progress = None) -> dict:
+    """Run benchmarks.
+
+    :param size: Size of the synthetic household.
+    :type size: Household
+    :param repeat: Timed runs of each benchmark, defaults to 5
+    :type repeat: int, optional
+    :param names: Benchmarks to run, defaults to all of them.
+    :type names: list[str], optional
+    :param progress: Called with each benchmark name before it runs, defaults to None
+    :type progress: Callable[[str], None], optional
+    :return: The results, ready to be written as JSON.
+    :rtype: dict
+    """
+    results = {}
+    for name in names or BENCHMARKS:
+        if progress is not None:
+            progress(name)
+        results[name] = BENCHMARKS[name](size, repeat)
+    return {
+        'version': RESULTS_VERSION,
+        'commit': git_commit(),
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'household': size.to_dict(),
+        'results': results,
+    }
+
+def compare(results : dict, baseline : dict, threshold : float = 0.2) -> list[tuple[str, float]]:
+    """Find benchmarks which got slower than a baseline run.
+
+    :param results: Results of :func:`run`.
+    :type results: dict
+    :param baseline: Earlier results of :func:`run`, ideally with the same household.
+    :type baseline: dict
+    :param threshold: Slowdown of the best time counted as a regression, defaults to 0.2 (20%)
+    :type threshold: float, optional
+    :return: (benchmark, ratio of new to old best time) for each regression.
+    :rtype: list[tuple[str, float]]
+    """
+    regressions = []
+    for name, result in results['results'].items():
+        old = baseline.get('results', {}).get(name)
+        if not old or 'min' not in old or 'min' not in result or not old['min']:
+            continue
+        ratio = result['min'] / old['min']
+        if ratio > 1 + threshold:
+            regressions.append((name, ratio))
+    return regressions
+
+def main(argv : list[str] = None) -> int:
+    """
+    :param argv: Command line arguments, defaults to sys.argv[1:]
+    :type argv: list[str], optional
+    :return: Exit status, 1 when a baseline was given and a benchmark regressed.
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(prog='python -m balance.tests.benchmarks',
+                                     description="Time the domain model and UI hot paths on synthetic households.")
+    parser.add_argument('--people', type=int, default=10, help="people in the household, defaults to 10")
+    parser.add_argument('--accounts', type=int, default=3, help="accounts per person, defaults to 3")
+    parser.add_argument('--transactions', type=int, default=1000, help="transactions per account, defaults to 1000")
+    parser.add_argument('--seed', type=int, default=0, help="random seed, defaults to 0")
+    parser.add_argument('--repeat', type=int, default=5, help="timed runs of each benchmark, defaults to 5")
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help="benchmarks to run")
+    parser.add_argument('--output', default='benchmarks.json', help="results file, or - for standard output")
+    parser.add_argument('--baseline', help="earlier results file to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2, help="slowdown reported as a regression")
+    arguments = parser.parse_args(argv)
+
+    size = Household(arguments.people, arguments.accounts, arguments.transactions, arguments.seed)
+    results = run(size, arguments.repeat, arguments.only, lambda name: print(f"running {name}", file=sys.stderr))
+    for name, result in results['results'].items():
+        if 'skipped' in result:
+            print(f"{name:28} skipped: {result['skipped']}", file=sys.stderr)
+        else:
+            print(f"{name:28} {result['min'] * 1000:10.2f} ms  {result['per_operation'] * 1e6:10.2f} us/op",
+                  file=sys.stderr)
+
+    if arguments.output == '-':
+        json.dump(results, sys.stdout, indent=1)
+        sys.stdout.write("\n")
+    else:
+        with open(arguments.output, 'w') as file:
+            json.dump(results, file, indent=1)
+
+    if arguments.baseline:
+        with open(arguments.baseline) as file:
+            regressions = compare(results, json.load(file), arguments.threshold)
+        for name, ratio in regressions:
+            print(f"regression: {name} is {ratio:.2f}x slower", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
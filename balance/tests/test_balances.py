@@ -0,0 +1,84 @@
+import unittest
+
+from balance.main.balances import BalanceEngine
+from balance.main.base_classes import CategoryManager, PersonManager
+
+class TestBalanceEngine(unittest.TestCase):
+    def setUp(self):
+        self.person_manager = PersonManager()
+        self.category_manager = CategoryManager()
+        self.bills = self.category_manager.add_category('Bills', ())
+        self.leisure = self.category_manager.add_category('Leisure', ())
+        self.ledger = self.person_manager.get_ledger()
+        self.balances = self.ledger.get_balances()
+
+        self.alex = self.person_manager.add_person_by_name('Alex')
+        self.current = self.alex.create_account('Current')
+        self.saver = self.alex.create_account('Saver')
+        self.sam = self.person_manager.add_person_by_name('Sam')
+        self.joint = self.sam.create_account('Joint')
+
+        self.current.add_income('Salary', 2000, '28')
+        self.rent = self.current.add_bill('Rent', 800, '1', self.bills)
+        self.gym = self.current.add_bill('Gym', 30.5, '2', self.leisure)
+        self.current.add_transfer('Savings', 100, '1', self.saver)
+        self.joint.add_bill('Energy', 120, '3', self.bills)
+
+    def totals(self, balances : BalanceEngine) -> tuple:
+        accounts = [account for person in self.person_manager.get_people() for account in person.get_accounts()]
+        return ({account.get_account_name(): balances.get_account_total(account).get_minor() for account in accounts},
+                {person.get_name(): balances.get_person_total(person).get_minor()
+                 for person in self.person_manager.get_people()},
+                {category.get_name(): balances.get_category_total(category).get_minor()
+                 for category in self.category_manager.get_categories()})
+
+    def assert_matches_recompute(self):
+        recomputed = BalanceEngine(self.ledger)
+        recomputed.close()
+        self.assertEqual(self.totals(self.balances), self.totals(recomputed))
+        for account in self.alex.get_accounts() + self.sam.get_accounts():
+            self.assertEqual(self.balances.get_account_total(account).get_minor(),
+                             self.ledger.total_for_account(account.account_id))
+
+    def test_add(self):
+        self.assertEqual(self.totals(self.balances),
+                         ({'Current': 106950, 'Saver': 10000, 'Joint': -12000}, {'Alex': 116950, 'Sam': -12000},
+                          {'Bills': -92000, 'Leisure': -3050}))
+        self.joint.add_income('Wages', 1500, '15')
+        self.assert_matches_recompute()
+
+    def test_change(self):
+        self.rent.set_amount(850)
+        self.gym.set_category(self.bills)
+        self.ledger.set_account(self.rent.get_row(), self.joint.account_id)
+        self.assert_matches_recompute()
+        self.assertEqual(self.balances.get_person_total(self.sam).get_minor(), -97000)
+
+    def test_release_and_restore(self):
+        row = self.rent.get_row()
+        self.current.remove_bill(self.rent)
+        self.assert_matches_recompute()
+        self.assertEqual(self.balances.get_category_total(self.bills).get_minor(), -12000)
+        self.ledger.restore(row)
+        self.assert_matches_recompute()
+        self.assertEqual(self.balances.get_category_total(self.bills).get_minor(), -92000)
+
+    def test_owner_change(self):
+        self.alex.detach_account(self.saver)
+        self.sam.add_account(self.saver)
+        self.assert_matches_recompute()
+        self.assertEqual(self.balances.get_person_total(self.sam).get_minor(), -2000)
+
+    def test_compaction(self):
+        self.current.remove_bill(self.gym)
+        self.joint.remove_bill(self.joint.get_bills()[0])
+        self.person_manager.compact()
+        self.assert_matches_recompute()
+        self.current.add_bill('Phone', 20, '14', self.leisure)
+        self.assert_matches_recompute()
+        self.assertEqual(self.totals(self.balances),
+                         ({'Current': 108000, 'Saver': 10000, 'Joint': 0}, {'Alex': 118000, 'Sam': 0},
+                          {'Bills': -80000, 'Leisure': -2000}))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from balance.tests import benchmarks
+
+# Small enough that every benchmark runs in a fraction of a second.
+SMOKE_SIZE = benchmarks.Household(people=2, accounts=2, transactions=20)
+
+class TestBenchmarks(unittest.TestCase):
+    def test_every_benchmark_runs(self):
+        ran = []
+        results = benchmarks.run(SMOKE_SIZE, repeat=1, progress=ran.append)
+        self.assertEqual(ran, list(benchmarks.BENCHMARKS))
+        self.assertEqual(results['version'], benchmarks.RESULTS_VERSION)
+        self.assertEqual(results['household'], SMOKE_SIZE.to_dict())
+        for name, result in results['results'].items():
+            if 'skipped' not in result:
+                self.assertEqual(result['repeat'], 1, name)
+                self.assertGreaterEqual(result['min'], 0, name)
+
+    def test_compare(self):
+        baseline = {'results': {'save': {'min': 1.0}, 'load': {'min': 1.0}, 'widgets': {'skipped': "no Qt"}}}
+        results = {'results': {'save': {'min': 1.5}, 'load': {'min': 1.1}, 'widgets': {'skipped': "no Qt"},
+                               'search': {'min': 2.0}}}
+        self.assertEqual(benchmarks.compare(results, baseline), [('save', 1.5)])
+        self.assertEqual(benchmarks.compare(results, baseline, threshold=0.05), [('save', 1.5), ('load', 1.1)])
+
+    def test_main_against_baseline(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'benchmarks.json')
+            arguments = ['--people', '2', '--accounts', '1', '--transactions', '10', '--repeat', '1',
+                         '--only', 'save', 'load', '--output', output]
+            with contextlib.redirect_stderr(io.StringIO()):
+                self.assertEqual(benchmarks.main(arguments), 0)
+            with open(output) as file:
+                results = json.load(file)
+            self.assertEqual(sorted(results['results']), ['load', 'save'])
+
+            # A baseline of zero-length timings is never counted as a regression.
+            baseline = os.path.join(directory, 'baseline.json')
+            for result in results['results'].values():
+                result['min'] = 0
+            with open(baseline, 'w') as file:
+                json.dump(results, file)
+            with contextlib.redirect_stderr(io.StringIO()):
+                self.assertEqual(benchmarks.main(arguments + ['--baseline', baseline]), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import re
+import unittest
+
+from balance.main.base_classes import Category, PersonManager
+from balance.main.categoriser import Categoriser, MatchType
+from balance.main.ledger import LedgerListener
+
+class BatchCounter(LedgerListener):
+    def __init__(self):
+        self.batches = 0
+        self.changes = 0
+
+    def batch_finished(self, ledger):
+        if ledger.batch_depth == 0:
+            self.batches += 1
+
+    def row_changed(self, ledger, row, column, old_value):
+        self.changes += 1
+
+class TestCategoriser(unittest.TestCase):
+    def setUp(self):
+        self.groceries = Category('Groceries', ())
+        self.utilities = Category('Utilities', ())
+        self.leisure = Category('Leisure', ())
+
+    def test_inline_global_flags(self):
+        categoriser = Categoriser()
+        categoriser.add_rule('(?x) tesco \\s+ stores', self.groceries, MatchType.REGEX)
+        categoriser.add_rule('water', self.utilities, MatchType.REGEX)
+        self.assertIs(categoriser.categorise('TESCO STORES 1234'), self.groceries)
+        self.assertIs(categoriser.categorise('Thames Water'), self.utilities)
+        # The verbose flag must not leak into the other rules.
+        categoriser.add_rule('gym membership', self.leisure, MatchType.REGEX)
+        self.assertIs(categoriser.categorise('PureGym membership'), self.leisure)
+
+    def test_backreferences(self):
+        categoriser = Categoriser()
+        categoriser.add_rule('energy', self.utilities, MatchType.REGEX)
+        categoriser.add_rule(r'(\w)\1{2}', self.leisure, MatchType.REGEX)
+        categoriser.add_rule('(?P<shop>aldi|lidl) (?P=shop)', self.groceries, MatchType.REGEX)
+        self.assertIs(categoriser.categorise('BOX OFFICE AAA'), self.leisure)
+        self.assertIs(categoriser.categorise('LIDL LIDL GB'), self.groceries)
+        self.assertIs(categoriser.categorise('Octopus Energy'), self.utilities)
+        self.assertIsNone(categoriser.categorise('ALDI LIDL'))
+
+    def test_first_rule_wins_across_matchers(self):
+        categoriser = Categoriser()
+        categoriser.add_rule('(market)', self.leisure, MatchType.REGEX)
+        categoriser.add_rule('market', self.groceries)
+        self.assertIs(categoriser.categorise('Farmers Market'), self.leisure)
+
+    def test_invalid_pattern(self):
+        categoriser = Categoriser()
+        with self.assertRaises(re.error):
+            categoriser.add_rule('(unclosed', self.groceries, MatchType.REGEX)
+        self.assertEqual(categoriser.rules, [])
+
+    def test_categorise_ledger_in_one_batch(self):
+        person_manager = PersonManager()
+        account = person_manager.add_person_by_name('Alex').create_account('Current')
+        for name in ('Tesco', 'Thames Water', 'Tesco Express', 'Cinema'):
+            account.add_bill(name, 10, '1')
+        ledger = person_manager.get_ledger()
+        counter = BatchCounter()
+        ledger.subscribe(counter)
+
+        categoriser = Categoriser()
+        categoriser.add_rule('tesco', self.groceries)
+        categoriser.add_rule('water', self.utilities)
+        self.assertEqual(categoriser.categorise_ledger(ledger), 3)
+        self.assertEqual(counter.batches, 1)
+        self.assertEqual(counter.changes, 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import contextlib
+import csv
+import io
+import json
+import os
+import tempfile
+import unittest
+from importlib import import_module
+
+import balance
+from balance import cli
+from balance.main import persistence
+
+class TestExports(unittest.TestCase):
+    def test_every_export_resolves(self):
+        for name, module in balance._EXPORTS.items():
+            self.assertIs(getattr(balance, name), getattr(import_module(f'balance.main.{module}'), name), name)
+        self.assertEqual(sorted(balance.__all__), sorted(balance._EXPORTS))
+        self.assertTrue(set(balance._EXPORTS) <= set(dir(balance)))
+
+    def test_unknown_name(self):
+        with self.assertRaises(AttributeError):
+            balance.MainWindow
+
+class TestCommandLine(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.data = self.path('household.baln')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def write(self, name, text):
+        with open(self.path(name), 'w') as file:
+            file.write(text)
+        return self.path(name)
+
+    def run_cli(self, *arguments):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(cli.main(list(arguments)), 0)
+        return output.getvalue()
+
+    def import_statements(self):
+        january = self.write('january.csv', "Date,Description,Amount\n"
+                                             "02/01/2024,Tesco,-12.50\n28/01/2024,Salary,1500.00\n")
+        february = self.write('february.csv', "Date,Description,Amount\n01/02/2024,Rent,-800.00\n")
+        self.run_cli('import', self.data, january, february, '--person', 'Alex', '--account', 'Current')
+
+    def test_import_and_balance(self):
+        self.import_statements()
+        person_manager, _ = persistence.load(self.data)
+        account = person_manager.get_person_by_name('Alex').get_account_by_name('Current')
+        self.assertEqual(account.get_total().get_minor(), 68750)
+        self.assertEqual(self.run_cli('balance', self.data), "Alex\t687.50\n  Current\t687.50\n")
+        self.assertEqual(self.run_cli('balance', self.data, '--person', 'Sam'), "")
+
+    def test_parallel_import_with_format(self):
+        statements = []
+        for name, posted, amount in (('first.txt', '20240102', '-12.50'), ('second.txt', '20240201', '-7.25')):
+            statements.append(self.write(name, f"<OFX><STMTTRN><TRNTYPE>DEBIT<DTPOSTED>{posted}"
+                                               f"<TRNAMT>{amount}<NAME>Shop</STMTTRN></OFX>"))
+        self.run_cli('import', self.data, *statements, '--person', 'Alex', '--account', 'Current',
+                     '--format', 'ofx', '--jobs', '2')
+        self.assertEqual(self.run_cli('balance', self.data), "Alex\t-19.75\n  Current\t-19.75\n")
+
+    def test_export(self):
+        self.import_statements()
+        exported = self.path('export.csv')
+        self.run_cli('export', self.data, exported)
+        with open(exported, newline='') as file:
+            rows = list(csv.reader(file))
+        self.assertEqual(rows[0], list(cli.EXPORT_COLUMNS))
+        self.assertEqual(sorted(row[3:6] for row in rows[1:]),
+                         [['Rent', '800.00', '1'], ['Salary', '1500.00', '28'], ['Tesco', '12.50', '2']])
+
+        records = json.loads(self.run_cli('export', self.data, '--format', 'json'))
+        self.assertEqual({record['name']: (record['kind'], record['period']) for record in records},
+                         {'Tesco': ('bill', 202401), 'Salary': ('income', 202401), 'Rent': ('bill', 202402)})
+
+    def test_project(self):
+        person_manager, category_manager = cli.open_data(self.data)
+        account = person_manager.add_person_by_name('Alex').create_account('Current')
+        account.add_income('Salary', 2000, '28')
+        account.add_bill('Rent', 800, '1')
+        persistence.save(self.data, person_manager, category_manager)
+
+        lines = self.run_cli('project', self.data, '--start', '2024-01', '--months', '2').splitlines()
+        self.assertEqual(lines[0], "person\taccount\t2024-01\t2024-02\tlowest")
+        self.assertEqual(lines[1], "Alex\tCurrent\t1200.00\t2400.00\t-800.00 on 2024-01-01")
+        lines = self.run_cli('project', self.data, '--start', '2024-01', '--months', '1',
+                             '--opening-totals').splitlines()
+        self.assertEqual(lines[1], "Alex\tCurrent\t2400.00\t400.00 on 2024-01-01")
+
+if __name__ == '__main__':
+    unittest.main()
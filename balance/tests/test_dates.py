@@ -0,0 +1,33 @@
+import unittest
+
+from balance.main.dates import PARSE_CACHE_SIZE, Schedule, parse_date, parse_date_text
+
+class TestParseDate(unittest.TestCase):
+    def test_parses_days_and_schedules(self):
+        self.assertEqual(parse_date('31st').day, 31)
+        self.assertEqual(parse_date(' 2nd ').day, 2)
+        self.assertEqual(parse_date('32').schedule, Schedule.OTHER)
+        self.assertEqual(parse_date('As & When').schedule, Schedule.AS_AND_WHEN)
+        self.assertEqual(parse_date('').schedule, Schedule.TBD)
+
+    def test_shares_instances(self):
+        self.assertIs(parse_date('15'), parse_date('15'))
+        parsed = parse_date('Variable')
+        self.assertIs(parse_date(parsed), parsed)
+
+    def test_rejects_other_types(self):
+        for value in (None, 1, 1.0, b'1'):
+            with self.assertRaises(TypeError):
+                parse_date(value)
+
+    def test_cache_is_bounded(self):
+        first = parse_date('unique date 0')
+        for index in range(PARSE_CACHE_SIZE + 10):
+            parse_date(f"unique date {index + 1}")
+        self.assertLessEqual(parse_date_text.cache_info().currsize, PARSE_CACHE_SIZE)
+        # An evicted date parses to an equal instance.
+        self.assertEqual(parse_date('unique date 0'), first)
+        self.assertEqual(hash(parse_date('unique date 0')), hash(first))
+
+if __name__ == '__main__':
+    unittest.main()
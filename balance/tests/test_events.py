@@ -0,0 +1,47 @@
+import unittest
+from unittest import mock
+
+from balance.main import events
+from balance.main.base_classes import PersonManager
+from balance.main.events import ChangeSet, EventBus
+from balance.main.ledger import Change, RECURRING, TransactionKind
+
+class TestChangeSet(unittest.TestCase):
+    def test_coalesces_rows(self):
+        changes = ChangeSet()
+        changes.record_row(1, Change.ADDED)
+        changes.record_row(1, Change.CHANGED)
+        changes.record_row(2, Change.CHANGED)
+        changes.record_row(3, Change.ADDED)
+        changes.record_row(3, Change.REMOVED)
+        self.assertEqual(changes.rows_added, {1})
+        self.assertEqual(changes.rows_changed, {2})
+        self.assertEqual(changes.get_rows(), {1, 2})
+        self.assertFalse(changes.reset)
+
+    def test_resets_past_row_limit(self):
+        changes = ChangeSet()
+        with mock.patch.object(events, 'ROW_LIMIT', 3):
+            for row in range(5):
+                changes.record_row(row, Change.ADDED)
+        self.assertTrue(changes.reset)
+        self.assertTrue(changes)
+        self.assertEqual(changes.get_rows(), set())
+
+    def test_large_batch_delivers_reset(self):
+        person_manager = PersonManager()
+        account = person_manager.add_person_by_name('Alex').create_account('Current')
+        bus = EventBus(person_manager.get_ledger())
+        delivered = []
+        bus.subscribe(delivered.append)
+
+        records = [(TransactionKind.BILL, f"Bill {index}", 100, '1', RECURRING) for index in range(10)]
+        with mock.patch.object(events, 'ROW_LIMIT', 4):
+            account.add_transactions(records)
+        changes, = delivered
+        self.assertTrue(changes.reset)
+        self.assertEqual(changes.rows_added, set())
+        self.assertEqual(changes.account_ids, {account.account_id})
+
+if __name__ == '__main__':
+    unittest.main()
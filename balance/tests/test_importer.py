@@ -0,0 +1,60 @@
+import datetime
+import os
+import tempfile
+import unittest
+
+from balance.main.base_classes import PersonManager
+from balance.main.events import EventBus
+from balance.main.importer import StatementRow, import_rows, import_statements
+
+class TestImportRows(unittest.TestCase):
+    def test_one_change_set_per_chunk(self):
+        person_manager = PersonManager()
+        account = person_manager.add_person_by_name('Alex').create_account('Current')
+        bus = EventBus(person_manager.get_ledger())
+        sizes = []
+        bus.subscribe(lambda changes: sizes.append(len(changes.rows_added)))
+
+        rows = [StatementRow(datetime.date(2024, 1, day), f"Shop {day}", -100 * day) for day in range(1, 8)]
+        reports = []
+        report = import_rows(rows, account, chunk_size=3, progress=lambda report: reports.append(report.rows))
+        self.assertEqual(sizes, [3, 3, 1])
+        self.assertEqual(reports, [3, 6, 7])
+        self.assertEqual(report.rows, 7)
+        self.assertEqual(account.get_total().get_minor(), -2800)
+
+class TestImportStatements(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_ofx(self, name, transactions):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as file:
+            file.write('<OFX><BANKTRANLIST>')
+            for posted, payee, amount in transactions:
+                file.write(f'<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>{posted}<TRNAMT>{amount}<NAME>{payee}</STMTTRN>')
+            file.write('</BANKTRANLIST></OFX>')
+        return path
+
+    def test_batch_per_chunk_with_given_format(self):
+        person_manager = PersonManager()
+        account = person_manager.add_person_by_name('Alex').create_account('Current')
+        bus = EventBus(person_manager.get_ledger())
+        sizes = []
+        bus.subscribe(lambda changes: sizes.append(len(changes.rows_added)))
+
+        january = self.write_ofx('january.txt', [('20240102', 'Shop', '-10.00'), ('20240103', 'Cafe', '-2.50'),
+                                                 ('20240128', 'Salary', '1500.00')])
+        february = self.write_ofx('february.txt', [('20240201', 'Rent', '-800.00')])
+        report = import_statements([(january, account), (february, account)], max_workers=2,
+                                   file_format='ofx', chunk_size=2)
+        self.assertEqual(report.rows, 4)
+        self.assertEqual(sizes, [2, 1, 1])
+        self.assertEqual(account.get_total().get_minor(), 68750)
+        self.assertEqual([bill.get_period() for bill in account.get_bills()], [202401, 202401, 202402])
+
+if __name__ == '__main__':
+    unittest.main()
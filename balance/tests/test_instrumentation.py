@@ -0,0 +1,56 @@
+import unittest
+
+from balance.main import persistence
+from balance.main.base_classes import PersonManager, Transaction
+from balance.main.instrumentation import Recorder
+
+def original_save(*args, **kwargs):
+    pass
+
+class TestRecorder(unittest.TestCase):
+    def setUp(self):
+        self.recorder = Recorder()
+        self.save = persistence.save
+
+    def tearDown(self):
+        self.recorder.disable()
+        persistence.save = self.save
+
+    def test_patches_module_functions(self):
+        self.recorder.instrument(persistence, 'save', 'persistence.save')
+        self.recorder.enable()
+        self.assertIsNot(persistence.save, self.save)
+        self.recorder.disable()
+        self.assertIs(persistence.save, self.save)
+
+    def test_reference_outliving_disable_stops_recording(self):
+        module = type(persistence)('instrumented')
+        module.save = original_save
+        self.recorder.instrument(module, 'save', 'module.save')
+        self.recorder.enable()
+        bound = module.save
+        bound()
+        self.recorder.disable()
+        bound()
+        self.assertIs(module.save, original_save)
+        self.assertEqual(self.recorder.calls.get('module.save'), 1)
+
+    def test_property_assignment_timed(self):
+        set_amount = Transaction.set_amount
+        self.recorder.instrument(Transaction, 'set_amount', 'Transaction.set_amount')
+        self.recorder.instrument(Transaction, 'get_amount', 'Transaction.get_amount')
+        bill = PersonManager().add_person_by_name('Alex').create_account('Current').add_bill('Rent', 800, '1')
+        self.recorder.enable()
+        bill.amount = 850
+        self.assertEqual(bill.amount.get_minor(), 85000)
+        self.assertEqual(self.recorder.calls.get('Transaction.set_amount'), 1)
+        self.assertEqual(self.recorder.calls.get('Transaction.get_amount'), 1)
+
+        self.recorder.disable()
+        self.assertIs(Transaction.amount.fset, set_amount)
+        bill.amount = 900
+        self.assertEqual(bill.get_amount().get_minor(), 90000)
+        self.assertEqual(self.recorder.calls.get('Transaction.set_amount'), 1)
+
+if __name__ == '__main__':
+    unittest.main()
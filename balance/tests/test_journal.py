@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+
+from balance.main.base_classes import CategoryManager, PersonManager
+from balance.main.journal import Journal, recover
+
+def describe(person_manager : PersonManager) -> dict:
+    return {(person.get_name(), account.get_account_name()):
+            sorted((transaction.get_name(), transaction.get_amount().get_minor(), transaction.get_date())
+                   for transaction in account.get_transactions() if transaction.get_ledger().alive[transaction.get_row()])
+            for person in person_manager.get_people() for account in person.get_accounts()}
+
+class TestJournal(unittest.TestCase):
+    def setUp(self):
+        self.person_manager = PersonManager()
+        self.category_manager = CategoryManager()
+        self.alex = self.person_manager.add_person_by_name('Alex')
+        self.current = self.alex.create_account('Current')
+        self.saver = self.alex.create_account('Saver')
+        self.current.add_income('Salary', 2000, '28')
+        self.rent = self.current.add_bill('Rent', 800, '1')
+
+    def test_undo_and_redo_batch(self):
+        journal = Journal(self.person_manager, self.category_manager)
+        before = describe(self.person_manager)
+        ledger = self.person_manager.get_ledger()
+        with ledger.batch():
+            self.rent.set_amount(850)
+            self.rent.set_date('2')
+            self.current.add_bill('Phone', 20, '14')
+            self.current.add_transfer('Savings', 100, '1', self.saver)
+        after = describe(self.person_manager)
+
+        self.assertTrue(journal.undo())
+        self.assertEqual(describe(self.person_manager), before)
+        self.assertEqual(self.current.get_total().get_minor(), 120000)
+        self.assertEqual(self.saver.get_total().get_minor(), 0)
+        self.assertFalse(journal.undo())
+
+        self.assertTrue(journal.redo())
+        self.assertEqual(describe(self.person_manager), after)
+        self.assertEqual(self.current.get_total().get_minor(), 103000)
+        self.assertFalse(journal.redo())
+
+    def test_new_change_clears_redo(self):
+        journal = Journal(self.person_manager)
+        self.rent.set_amount(900)
+        journal.undo()
+        self.rent.set_name('Mortgage')
+        self.assertFalse(journal.redo())
+        self.assertEqual(self.rent.get_amount().get_minor(), 80000)
+
+    def test_undo_account_removal(self):
+        journal = Journal(self.person_manager)
+        self.alex.remove_account(self.current)
+        self.assertEqual(self.alex.get_accounts(), [self.saver])
+        journal.undo()
+        self.assertIs(self.alex.get_account_by_name('Current'), self.current)
+        self.assertEqual(self.current.get_total().get_minor(), 120000)
+
+    def test_recover_from_log(self):
+        with tempfile.TemporaryDirectory() as directory:
+            log_path = os.path.join(directory, 'journal.log')
+            journal = Journal(self.person_manager, self.category_manager, log_path=log_path, checkpoint_interval=3)
+            with self.person_manager.get_ledger().batch():
+                self.current.add_bill('Phone', 20, '14')
+                self.rent.set_amount(850)
+            self.saver.set_account_name('Rainy day')
+            self.current.remove_bill(self.rent)
+            self.person_manager.add_person_by_name('Sam').create_account('Joint').add_income('Wages', 1500, '15')
+            expected = describe(self.person_manager)
+            journal.close()
+
+            person_manager, _ = recover(log_path)
+            self.assertEqual(describe(person_manager), expected)
+
+if __name__ == '__main__':
+    unittest.main()
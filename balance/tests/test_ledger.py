@@ -0,0 +1,85 @@
+import unittest
+
+from balance.main.base_classes import Category, PersonManager
+from balance.main.journal import Journal
+from balance.main.ledger import LedgerListener
+
+class CompactionListener(LedgerListener):
+    def __init__(self):
+        self.rows = None
+
+    def ledger_compacted(self, ledger, rows):
+        self.rows = list(rows)
+
+class TestCompact(unittest.TestCase):
+    def setUp(self):
+        self.person_manager = PersonManager()
+        self.ledger = self.person_manager.get_ledger()
+        self.groceries = Category('Groceries', ())
+        self.alex = self.person_manager.add_person_by_name('Alex')
+        self.current = self.alex.create_account('Current')
+        self.saver = self.alex.create_account('Saver')
+        self.sam = self.person_manager.add_person_by_name('Sam')
+        self.joint = self.sam.create_account('Joint')
+
+        self.current.add_income('Salary', 2000, '28')
+        self.food = self.current.add_bill('Food', 300, '5', self.groceries)
+        self.current.add_bill('Gym', 30, '2')
+        self.current.add_transfer('Savings', 100, '1', self.saver)
+        self.joint.add_bill('Energy', 120, '3')
+
+    def totals(self) -> dict:
+        return {account.get_account_name(): account.get_total().get_minor()
+                for person in self.person_manager.get_people() for account in person.get_accounts()}
+
+    def test_drops_removed_rows(self):
+        self.ledger.get_index()
+        self.ledger.get_cube()
+        self.current.remove_bill(self.current.get_bills_due(1, 3)[0])
+        self.current.remove_income(self.current.get_incomes()[0])
+        self.saver.remove_transfer_in(self.saver.get_transfers_in()[0])
+        totals = self.totals()
+        listener = CompactionListener()
+        self.ledger.subscribe(listener)
+
+        self.person_manager.compact()
+        self.assertEqual(len(self.ledger), 3)
+        self.assertEqual(listener.rows, [-1, 0, -1, 1, -1, 2])
+        self.assertEqual(self.totals(), totals)
+        self.assertEqual([bill.get_name() for bill in self.current.get_bills()], ['Food'])
+        self.assertEqual(self.current.get_transfers_to(self.saver)[0].get_name(), 'Savings')
+        self.assertEqual(self.person_manager.get_category_total(self.groceries).get_minor(), -30000)
+        self.assertEqual([bill.get_name() for bill in self.joint.get_bills_due(1, 31)], ['Energy'])
+
+        # Views held by the account stay usable for edits and removal after compacting.
+        self.food.set_amount(250)
+        self.assertEqual(self.current.get_total().get_minor(), -35000)
+        self.current.add_bill('Phone', 20, '14')
+        self.assertEqual(self.current.get_total().get_minor(), -37000)
+
+    def test_drops_slots_of_moved_accounts(self):
+        other = PersonManager()
+        taylor = other.add_person_by_name('Taylor')
+        self.sam.detach_account(self.joint)
+        taylor.add_account(self.joint)
+        self.assertEqual(len(self.ledger.accounts), 3)
+
+        self.person_manager.compact()
+        self.assertEqual(len(self.ledger), 5)
+        self.assertEqual(self.ledger.accounts, [self.current, self.saver])
+        self.assertEqual([account.account_id for account in self.alex.get_accounts()], [0, 1])
+        self.assertIs(self.alex.get_account_by_id(self.saver.account_id), self.saver)
+        self.assertEqual(self.saver.get_total().get_minor(), 10000)
+        self.assertEqual(taylor.get_total().get_minor(), -12000)
+
+    def test_clears_journal(self):
+        journal = Journal(self.person_manager)
+        self.current.remove_bill(self.food)
+        self.person_manager.compact()
+        self.assertFalse(journal.undo())
+        self.current.add_bill('Phone', 20, '14')
+        self.assertTrue(journal.undo())
+        self.assertEqual([bill.get_name() for bill in self.current.get_bills()], ['Gym'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+
+try:
+    from PySide6 import QtWidgets
+    from balance.main import main
+except ImportError:
+    QtWidgets = None
+
+@unittest.skipIf(QtWidgets is None, "PySide6 is not installed")
+class TestPageStack(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.application = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+    def setUp(self):
+        self.pages = main.PageStack()
+        self.built = []
+
+    def tearDown(self):
+        self.pages.deleteLater()
+
+    def factory(self, name):
+        def build():
+            self.built.append(name)
+            return QtWidgets.QLabel(name)
+        return build
+
+    def test_built_on_first_show(self):
+        self.pages.register_page("Home", self.factory("Home"))
+        self.pages.register_page("Settings", self.factory("Settings"))
+        self.assertEqual(self.built, [])
+        self.assertEqual(self.pages.count(), 0)
+
+        home = self.pages.show_page("Home")
+        self.assertEqual(self.built, ["Home"])
+        self.assertTrue(self.pages.is_built("Home"))
+        self.assertFalse(self.pages.is_built("Settings"))
+        self.assertIs(self.pages.currentWidget(), home)
+        self.assertEqual(list(self.pages.build_seconds), ["Home"])
+
+        self.pages.show_page("Settings")
+        self.assertIs(self.pages.show_page("Home"), home)
+        self.assertEqual(self.built, ["Home", "Settings"])
+        self.assertEqual(self.pages.count(), 2)
+
+    def test_toolbar_button(self):
+        toolbar = main.Toolbar()
+        button = toolbar.create_page_button("Settings", self.pages, self.factory("Settings"))
+        self.assertEqual(self.built, [])
+        button.click()
+        self.assertEqual(self.built, ["Settings"])
+        self.assertEqual(self.pages.currentWidget().text(), "Settings")
+        toolbar.deleteLater()
+
+@unittest.skipIf(QtWidgets is None, "PySide6 is not installed")
+class TestPanelCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.application = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+    def setUp(self):
+        self.manager = main.WidgetPeopleManager(panel_cache_size=2)
+        self.alex = self.manager.add_person('Alex')
+        self.sam = self.manager.add_person('Sam')
+        self.taylor = self.manager.add_person('Taylor')
+
+    def tearDown(self):
+        self.manager.deleteLater()
+
+    def test_reuse(self):
+        self.manager.load_person(self.alex)
+        panel = self.manager.details
+        self.manager.load_person(self.sam)
+        self.manager.load_person(self.alex)
+        self.assertIs(self.manager.details, panel)
+        self.assertIs(self.manager.details_stack.currentWidget(), panel)
+        self.assertEqual(list(self.manager.panels), [self.sam, self.alex])
+        self.assertEqual(self.manager.details_stack.count(), 2)
+
+    def test_least_recently_shown_evicted(self):
+        self.manager.load_person(self.alex)
+        self.manager.load_person(self.sam)
+        # Showing Alex again makes Sam the least recently shown.
+        self.manager.load_person(self.alex)
+        self.manager.load_person(self.taylor)
+        self.assertEqual(list(self.manager.panels), [self.alex, self.taylor])
+        self.assertEqual(self.manager.details_stack.count(), 2)
+
+        self.manager.load_person(self.sam)
+        sam_panel = self.manager.details
+        self.assertEqual(list(self.manager.panels), [self.taylor, self.sam])
+        self.assertIs(sam_panel.person, self.sam)
+
+    def test_shrink_keeps_shown_panel(self):
+        self.manager.set_panel_cache_size(3)
+        for person in (self.alex, self.sam, self.taylor):
+            self.manager.load_person(person)
+        self.manager.load_person(self.alex)
+        self.manager.set_panel_cache_size(1)
+        self.assertEqual(list(self.manager.panels), [self.alex])
+        self.assertIs(self.manager.details.person, self.alex)
+        self.assertEqual(self.manager.details_stack.count(), 1)
+
+    def test_hide(self):
+        self.manager.load_person(self.alex)
+        self.manager.load_person(None)
+        self.assertIsNone(self.manager.details)
+        self.assertEqual(list(self.manager.panels), [self.alex])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+
+try:
+    from PySide6 import QtCore
+    from balance.main import models
+except ImportError:
+    QtCore = None
+
+from balance.main.base_classes import PersonManager
+
+class SignalRecorder():
+    def __init__(self, model):
+        self.events = []
+        model.dataChanged.connect(lambda top, bottom, roles=(): self.events.append(('changed', top.row(), bottom.row())))
+        model.rowsInserted.connect(lambda parent, first, last: self.events.append(('inserted', first, last)))
+        model.rowsRemoved.connect(lambda parent, first, last: self.events.append(('removed', first, last)))
+        model.modelReset.connect(lambda: self.events.append(('reset',)))
+
+@unittest.skipIf(QtCore is None, "PySide6 is not installed")
+class TestListModels(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.application = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+    def setUp(self):
+        self.person_manager = PersonManager()
+        self.alex = self.person_manager.add_person_by_name('Alex')
+        self.sam = self.person_manager.add_person_by_name('Sam')
+        self.taylor = self.person_manager.add_person_by_name('Taylor')
+
+    def test_people(self):
+        model = models.PersonListModel(self.person_manager)
+        recorder = SignalRecorder(model)
+        self.assertEqual(model.rowCount(), 3)
+
+        self.sam.set_name('Samantha')
+        self.assertEqual(recorder.events, [('changed', 1, 1)])
+        self.assertEqual(model.data(model.index(1)), 'Samantha')
+
+        recorder.events.clear()
+        model.add_person('Jordan')
+        self.person_manager.remove_person(self.alex)
+        self.assertEqual(recorder.events, [('inserted', 3, 3), ('removed', 0, 0)])
+        self.assertEqual([model.data(model.index(row)) for row in range(model.rowCount())],
+                         ['Samantha', 'Taylor', 'Jordan'])
+
+    def test_accounts(self):
+        current = self.alex.create_account('Current')
+        saver = self.alex.create_account('Saver')
+        model = models.AccountListModel(self.alex)
+        recorder = SignalRecorder(model)
+
+        saver.set_account_name('Rainy day')
+        self.assertEqual(recorder.events, [('changed', 1, 1)])
+        # Changes to another person's accounts leave the model alone.
+        self.sam.create_account('Joint')
+        self.assertEqual(recorder.events, [('changed', 1, 1)])
+
+        recorder.events.clear()
+        self.alex.remove_account(current)
+        self.assertEqual(recorder.events, [('removed', 0, 0)])
+        self.assertIs(model.get_account(model.index(0)), saver)
+
+@unittest.skipIf(QtCore is None, "PySide6 is not installed")
+class TestTransactionTableModel(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.application = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+    def setUp(self):
+        self.person_manager = PersonManager()
+        self.account = self.person_manager.add_person_by_name('Alex').create_account('Current')
+        self.rent = self.account.add_bill('Rent', 800, '1')
+        self.phone = self.account.add_bill('Phone', 20, '14')
+        self.model = models.TransactionTableModel(self.account)
+        self.recorder = SignalRecorder(self.model)
+
+    def test_cells(self):
+        self.assertEqual(self.model.rowCount(), 2)
+        self.assertEqual([self.model.data(self.model.index(0, column)) for column in range(5)],
+                         ['Rent', '800.00', '1', 'Bill', ''])
+
+    def test_changed_row_only(self):
+        self.phone.set_amount(25)
+        self.assertEqual(self.recorder.events, [('changed', 1, 1)])
+        self.assertEqual(self.model.data(self.model.index(1, 1)), '25.00')
+
+    def test_added_rows_refresh(self):
+        self.account.add_bill('Water', 30, '20')
+        self.assertEqual(self.recorder.events, [('reset',)])
+        self.assertEqual(self.model.rowCount(), 3)
+
+    def test_other_account_ignored(self):
+        other = self.person_manager.add_person_by_name('Sam').create_account('Joint')
+        other.add_bill('Energy', 120, '3')
+        self.assertEqual(self.recorder.events, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+from decimal import Decimal
+
+from balance.main.money import Money, to_minor
+
+class TestToMinor(unittest.TestCase):
+    def test_floats_round_half_up_as_written(self):
+        self.assertEqual(to_minor(2.675), 268)
+        self.assertEqual(to_minor(1.005), 101)
+        self.assertEqual(to_minor(0.125), 13)
+        self.assertEqual(to_minor(-0.125), -13)
+        self.assertEqual(to_minor(0.1 + 0.2), 30)
+
+    def test_strings_and_decimals(self):
+        self.assertEqual(to_minor('12.345'), 1235)
+        self.assertEqual(to_minor(Decimal('-0.005')), -1)
+        with self.assertRaises(ValueError):
+            to_minor('twelve')
+
+class TestMoneyComparison(unittest.TestCase):
+    def test_equal_values_hash_alike(self):
+        for number in (2, 2.5, Decimal('2.50')):
+            money = Money(number)
+            self.assertEqual(money, number)
+            self.assertEqual(hash(money), hash(number))
+        self.assertEqual(len({Money(3), Money('3.00'), 3}), 1)
+
+    def test_inexact_floats_and_strings_are_not_equal(self):
+        self.assertNotEqual(Money('0.10'), 0.1)
+        self.assertNotEqual(Money('1.00'), '1.00')
+        self.assertEqual(Money('0.10'), Money(0.1))
+
+    def test_ordering_with_numbers(self):
+        self.assertTrue(Money(1.5) <= 1.5)
+        self.assertTrue(Money(1.5) >= 1.5)
+        self.assertTrue(Money(1) < 2.0)
+        self.assertTrue(Money(-1) < 0)
+        self.assertEqual(min([Money(3), Money(-2), Money(1)]), Money(-2))
+        with self.assertRaises(TypeError):
+            Money(1) < '2'
+
+    def test_currencies(self):
+        self.assertNotEqual(Money(1, 'GBP'), Money(1, 'EUR'))
+        with self.assertRaises(ValueError):
+            Money(1, 'GBP') < Money(2, 'EUR')
+
+class TestMoneyArithmetic(unittest.TestCase):
+    def test_multiply_rounds_half_up(self):
+        # round() would give 2 and 4, rounding the halves to even.
+        self.assertEqual((Money.from_minor(5) * 0.5).get_minor(), 3)
+        self.assertEqual((Money.from_minor(7) * Decimal('0.5')).get_minor(), 4)
+        self.assertEqual((Money.from_minor(-5) * 0.5).get_minor(), -3)
+        self.assertEqual((0.1 * Money.from_minor(25)).get_minor(), 3)
+        self.assertEqual((Money.from_minor(1000) * 1.15).get_minor(), 1150)
+        self.assertEqual((Money.from_minor(333) * 3).get_minor(), 999)
+
+    def test_allocate(self):
+        shares = [share.get_minor() for share in Money.from_minor(100).allocate([1, 1, 1])]
+        self.assertEqual(shares, [34, 33, 33])
+        shares = [share.get_minor() for share in Money.from_minor(1000).allocate([0.5, 0.3, 0.2])]
+        self.assertEqual(shares, [500, 300, 200])
+        shares = [share.get_minor() for share in Money.from_minor(-100).allocate([1, 2])]
+        self.assertEqual(shares, [-33, -67])
+        self.assertEqual(sum(share.get_minor() for share in Money.from_minor(10001).allocate([1 / 3] * 3)), 10001)
+        self.assertEqual(Money(1, 'EUR').allocate([Decimal('0.25'), 0])[0], Money(1, 'EUR'))
+
+    def test_allocate_invalid_weights(self):
+        with self.assertRaises(ValueError):
+            Money(1).allocate([0, 0])
+        with self.assertRaises(ValueError):
+            Money(1).allocate([2, -1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+
+from balance.main.base_classes import CategoryManager, PersonManager
+from balance.main.journal import Journal
+
+class TestRemovePerson(unittest.TestCase):
+    def setUp(self):
+        self.person_manager = PersonManager()
+        self.category_manager = CategoryManager()
+        self.bills = self.category_manager.add_category('Bills', ())
+
+        self.alex = self.person_manager.add_person_by_name('Alex')
+        account = self.alex.create_account('Current')
+        account.add_income('Salary', 2000, '28')
+        account.add_bill('Rent', 800, '1', self.bills)
+
+        self.sam = self.person_manager.add_person_by_name('Sam')
+        account = self.sam.create_account('Joint')
+        account.add_income('Wages', 1500, '15')
+        account.add_bill('Energy', 120, '3', self.bills)
+
+    def test_totals_update(self):
+        ledger = self.person_manager.get_ledger()
+        self.assertEqual(self.person_manager.get_category_total(self.bills).get_minor(), -92000)
+        self.person_manager.remove_person(self.alex)
+        self.assertEqual(self.person_manager.get_category_total(self.bills).get_minor(), -12000)
+        self.assertEqual(len(list(ledger.live_rows())), 2)
+        self.assertEqual(self.person_manager.get_people(), [self.sam])
+
+    def test_undo_restores_person_and_rows(self):
+        journal = Journal(self.person_manager, self.category_manager)
+        self.person_manager.remove_person(self.alex)
+        self.assertTrue(journal.undo())
+        self.assertIs(self.person_manager.get_person_by_name('Alex'), self.alex)
+        self.assertEqual(self.alex.get_total().get_minor(), 120000)
+        self.assertEqual(self.person_manager.get_category_total(self.bills).get_minor(), -92000)
+        self.assertFalse(journal.undo())
+
+        self.assertTrue(journal.redo())
+        self.assertIsNone(self.person_manager.get_person_by_name('Alex'))
+        self.assertEqual(self.person_manager.get_category_total(self.bills).get_minor(), -12000)
+
+if __name__ == '__main__':
+    unittest.main()
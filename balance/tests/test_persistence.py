@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+from array import array
+
+from balance.main.base_classes import CategoryManager, PersonManager
+from balance.main import persistence
+from balance.main.ledger import ROW_COLUMNS
+
+class TestPersistence(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'household.baln')
+
+        person_manager = PersonManager()
+        category_manager = CategoryManager()
+        bills = category_manager.add_category('Bills', (1.0, 0.0, 0.0))
+        person = person_manager.add_person_by_name('Alex')
+        account = person.create_account('Current')
+        account.add_income('Salary', 2000, '28')
+        account.add_income('Refund', 15.5, 'TBD')
+        account.add_bill('Rent', 800, '1', bills)
+        account.add_bill('Phone', 20.25, '14')
+        persistence.save(self.path, person_manager, category_manager)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def get_account(self, person_manager):
+        return person_manager.get_person_by_name('Alex').get_account_by_name('Current')
+
+    def test_save_over_loaded_file(self):
+        person_manager, category_manager = persistence.load(self.path)
+        account = self.get_account(person_manager)
+        for income in list(account.get_incomes()):
+            account.remove_income(income)
+
+        # The file the manager was loaded from is replaced while its names are still undecoded.
+        persistence.save(self.path, person_manager, category_manager)
+        self.assertEqual([bill.get_name() for bill in account.get_bills()], ['Rent', 'Phone'])
+        self.assertFalse(os.path.exists(self.path + '.tmp'))
+
+        reloaded, _ = persistence.load(self.path)
+        account = self.get_account(reloaded)
+        self.assertEqual(account.get_incomes(), [])
+        self.assertEqual([bill.get_name() for bill in account.get_bills()], ['Rent', 'Phone'])
+        self.assertEqual(account.get_total().get_minor(), -82025)
+
+    def test_days_round_trip(self):
+        person_manager, _ = persistence.load(self.path)
+        ledger = person_manager.get_ledger()
+        self.assertEqual([ledger.days[row] for row in ledger.live_rows()],
+                         [ledger.get_parsed_date(row).day for row in ledger.live_rows()])
+        account = self.get_account(person_manager)
+        self.assertEqual([bill.get_name() for bill in account.get_bills_due(1, 7)], ['Rent'])
+
+    def test_columns_mapped_until_rows_added(self):
+        person_manager, _ = persistence.load(self.path)
+        ledger = person_manager.get_ledger()
+        self.assertIsInstance(ledger.amounts, memoryview)
+        account = self.get_account(person_manager)
+        account.get_bills()[1].set_amount(25)
+        self.assertIsInstance(ledger.amounts, memoryview)
+        self.assertEqual(account.get_total().get_minor(), 119050)
+
+        account.add_bill('Water', 30, '20')
+        self.assertTrue(all(isinstance(getattr(ledger, column), array)
+                            for column in ROW_COLUMNS + ('account_ids', 'alive')))
+        self.assertEqual(account.get_total().get_minor(), 116050)
+
+        # Edits to a loaded file stay in memory until saved.
+        reloaded, _ = persistence.load(self.path)
+        self.assertEqual(self.get_account(reloaded).get_total().get_minor(), 119525)
+
+    def test_saved_name_keeps_its_code(self):
+        person_manager, _ = persistence.load(self.path)
+        ledger = person_manager.get_ledger()
+        account = self.get_account(person_manager)
+        rent = account.get_bills()[0].get_row()
+        self.assertEqual(ledger.strings.code('Rent'), ledger.name_ids[rent])
+        account.add_bill('Rent', 900, '1')
+        self.assertEqual(ledger.name_ids[ledger.rows_for_account(account.account_id)[-1]], ledger.name_ids[rent])
+        self.assertEqual(ledger.strings.code('Council Tax'), len(ledger.strings) - 1)
+
+if __name__ == '__main__':
+    unittest.main()
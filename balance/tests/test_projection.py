@@ -0,0 +1,27 @@
+import datetime
+import unittest
+
+from balance.main.base_classes import PersonManager
+from balance.main.projection import project
+
+class TestProjection(unittest.TestCase):
+    def setUp(self):
+        person_manager = PersonManager()
+        self.ledger = person_manager.get_ledger()
+        self.account = person_manager.add_person_by_name('Alex').create_account('Current')
+        self.account.add_income('Salary', 2000, '28')
+        self.account.add_bill('Rent', 800, '1')
+
+    def test_lowest_balance(self):
+        projection = project(self.ledger, 1, datetime.date(2024, 2, 10), {self.account: 100})
+        day, balance = projection.get_lowest_balance(self.account)
+        self.assertEqual(day, datetime.date(2024, 2, 1))
+        self.assertEqual(balance.get_minor(), -70000)
+
+    def test_months_must_be_positive(self):
+        for months in (0, -1):
+            with self.assertRaises(ValueError):
+                project(self.ledger, months)
+
+if __name__ == '__main__':
+    unittest.main()
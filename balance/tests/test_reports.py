@@ -0,0 +1,77 @@
+import unittest
+
+from balance.main.base_classes import CategoryManager, PersonManager
+from balance.main.ledger import TransactionKind, RECURRING
+from balance.main.reports import AggregationCube, month_range
+
+class TestAggregationCube(unittest.TestCase):
+    def setUp(self):
+        self.person_manager = PersonManager()
+        self.category_manager = CategoryManager()
+        self.bills = self.category_manager.add_category('Bills', (1.0, 0.0, 0.0))
+        self.ledger = self.person_manager.get_ledger()
+        self.cube = self.ledger.get_cube()
+
+        self.alex = self.person_manager.add_person_by_name('Alex')
+        self.current = self.alex.create_account('Current')
+        self.current.add_income('Salary', 2000, '28')
+        self.rent = self.current.add_bill('Rent', 800, '1', self.bills)
+        self.current.add_transactions([(TransactionKind.BILL, 'Shop', 5000, '3', 202401),
+                                       (TransactionKind.BILL, 'Shop', 2500, '4', 202402),
+                                       (TransactionKind.INCOME, 'Refund', 1000, '9', 202402)])
+
+        self.sam = self.person_manager.add_person_by_name('Sam')
+        self.joint = self.sam.create_account('Joint')
+        self.joint.add_bill('Energy', 100, '3', self.bills)
+
+    def minor(self, totals : dict) -> dict:
+        return {key: money.get_minor() for key, money in totals.items()}
+
+    def test_month_range(self):
+        self.assertEqual(month_range(202311, 202402), [202311, 202312, 202401, 202402])
+        self.assertEqual(month_range(202402, 202401), [])
+
+    def test_total_without_range_counts_recurring_once(self):
+        self.assertEqual(self.cube.get_total().get_minor(), 103500)
+        self.assertEqual(self.minor(self.cube.group_by('period')), {RECURRING: 110000, 202401: -5000, 202402: -1500})
+
+    def test_range_expands_recurring_rows(self):
+        self.assertEqual(self.cube.get_total(first_period=202401, last_period=202403).get_minor(), 323500)
+        self.assertEqual(self.minor(self.cube.group_by('period', first_period=202401, last_period=202402)),
+                         {202401: 105000, 202402: 108500})
+        self.assertEqual(self.cube.get_total(person=self.sam, first_period=202401, last_period=202403).get_minor(),
+                         -30000)
+        # An open end stops at the latest dated month.
+        self.assertEqual(self.cube.get_total(first_period=202402).get_minor(), 108500)
+        self.assertEqual(self.cube.get_total(first_period=202403, last_period=202402).get_minor(), 0)
+
+    def test_category_breakdown(self):
+        breakdown = self.cube.get_category_breakdown(first_period=202401, last_period=202402)
+        self.assertEqual([(category, total.get_minor(), colour) for category, total, colour in breakdown],
+                         [(self.bills, 180000, (1.0, 0.0, 0.0)), (None, 7500, None)])
+        self.assertEqual(self.minor(self.cube.group_by('person', kind=TransactionKind.BILL)),
+                         {self.alex: -87500, self.sam: -10000})
+
+    def test_filters_matching_nothing(self):
+        unused = self.category_manager.add_category('Unused', ())
+        self.assertEqual(self.cube.get_total(category=unused).get_minor(), 0)
+        self.assertEqual(self.cube.group_by('account', category=unused), {})
+        with self.assertRaises(ValueError):
+            self.cube.group_by('colour')
+
+    def test_incremental_matches_rebuild(self):
+        self.rent.set_amount(850)
+        self.rent.set_category(None)
+        self.current.remove_income(self.current.get_incomes()[0])
+        self.sam.detach_account(self.joint)
+        self.alex.add_account(self.joint)
+        self.person_manager.compact()
+
+        fresh = AggregationCube(self.ledger)
+        fresh.close()
+        self.assertEqual(self.cube.cells, fresh.cells)
+        self.assertEqual(self.cube.period_keys, fresh.period_keys)
+        self.assertEqual(self.cube.get_total(first_period=202401, last_period=202402).get_minor(), -196500)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+
+from balance.main import persistence
+from balance.main.base_classes import CategoryManager, PersonManager
+from balance.main.search import ACCOUNT, CATEGORY, PERSON, TRANSACTION, SearchIndex
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.person_manager = PersonManager()
+        self.category_manager = CategoryManager()
+        self.groceries = self.category_manager.add_category('Groceries', ())
+        self.alex = self.person_manager.add_person_by_name('Alex')
+        self.current = self.alex.create_account('Current')
+        self.current.add_bill('Tesco', 60, '3', self.groceries)
+        self.current.add_bill('Tesco', 45, '17', self.groceries)
+        self.current.add_bill('Tesco Express', 12, '9')
+        self.current.add_bill('Thames Water', 40, '12')
+        self.index = SearchIndex(self.person_manager, self.category_manager)
+
+    def names(self, query, **options):
+        return [(result.kind, result.name, result.count) for result in self.index.search(query, **options)]
+
+    def test_ranking(self):
+        # Every trigram matches both names; the closer length wins.
+        self.assertEqual(self.names('tesco'), [(TRANSACTION, 'Tesco', 2), (TRANSACTION, 'Tesco Express', 1)])
+        self.assertEqual(self.names('tesco expr')[0], (TRANSACTION, 'Tesco Express', 1))
+        self.assertEqual(self.names('tescp'), [(TRANSACTION, 'Tesco', 2), (TRANSACTION, 'Tesco Express', 1)])
+        self.assertEqual(self.names('tesco', limit=1), [(TRANSACTION, 'Tesco', 2)])
+        self.assertEqual(self.names('groc'), [(CATEGORY, 'Groceries', 1)])
+        self.assertEqual(self.names('alex', kinds=(PERSON, ACCOUNT)), [(PERSON, 'Alex', 1)])
+        self.assertEqual(self.names('   '), [])
+
+    def test_updates_on_add_and_remove(self):
+        bill = self.current.add_bill('Tesco', 30, '24')
+        self.assertEqual(self.names('tesco')[0], (TRANSACTION, 'Tesco', 3))
+        self.current.remove_bill(bill)
+        self.current.remove_bill(self.current.get_bills_due(12, 12)[0])
+        self.assertEqual(self.names('thames'), [])
+        self.assertEqual(self.names('tesco')[0], (TRANSACTION, 'Tesco', 2))
+
+        self.current.get_bills_due(9, 9)[0].set_name('Aldi')
+        self.assertEqual(self.names('tesco'), [(TRANSACTION, 'Tesco', 2)])
+        self.assertEqual([bill.get_date() for bill in self.index.get_transactions('Tesco')], ['3', '17'])
+        self.assertEqual(self.index.get_transactions('Tesco Express'), [])
+
+        sam = self.person_manager.add_person_by_name('Sam')
+        sam.create_account('Joint')
+        self.assertEqual(self.names('joint'), [(ACCOUNT, 'Joint', 1)])
+        self.person_manager.remove_person(sam)
+        self.assertEqual(self.names('joint'), [])
+        self.assertEqual(self.names('sam'), [])
+
+    def test_categories_follow_manager(self):
+        self.groceries.set_name('Food shopping')
+        self.assertEqual(self.names('groceries'), [])
+        self.assertEqual(self.names('food'), [(CATEGORY, 'Food shopping', 1)])
+        fuel = self.category_manager.add_category('Fuel', ())
+        self.assertEqual(self.names('fuel'), [(CATEGORY, 'Fuel', 1)])
+        self.category_manager.remove_category(fuel)
+        self.assertEqual(self.names('fuel'), [])
+
+    def test_compact_keeps_rows(self):
+        self.current.remove_bill(self.current.get_bills()[0])
+        self.person_manager.compact()
+        self.assertEqual([bill.get_date() for bill in self.index.get_transactions('Tesco')], ['17'])
+        self.assertEqual(self.names('tesco')[0], (TRANSACTION, 'Tesco', 1))
+
+    def test_saved_name_typed_again(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'household.baln')
+            persistence.save(path, self.person_manager, self.category_manager)
+            person_manager, category_manager = persistence.load(path)
+        index = SearchIndex(person_manager, category_manager)
+        account = person_manager.get_person_by_name('Alex').get_account_by_name('Current')
+        account.add_bill('Tesco', 30, '24')
+        results = [(result.name, result.count) for result in index.search('tesco')]
+        self.assertEqual(results, [('Tesco', 3), ('Tesco Express', 1)])
+        self.assertEqual(len(index.get_transactions('Tesco')), 3)
+
+if __name__ == '__main__':
+    unittest.main()
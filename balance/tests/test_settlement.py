@@ -0,0 +1,90 @@
+import unittest
+
+from balance.main.base_classes import CategoryManager, PersonManager
+from balance.main.ledger import TransactionKind
+from balance.main.settlement import SplitMethod, SplitRule, settle, simplify_debts
+
+class TestSimplifyDebts(unittest.TestCase):
+    def test_settles_every_position(self):
+        positions = {'a': 5000, 'b': 3000, 'c': -5000, 'd': -1999, 'e': -1001}
+        transfers = simplify_debts(positions)
+        self.assertLessEqual(len(transfers), len(positions) - 1)
+        remaining = dict(positions)
+        for payer, payee, amount in transfers:
+            self.assertGreater(amount, 0)
+            remaining[payer] += amount
+            remaining[payee] -= amount
+        self.assertEqual(set(remaining.values()), {0})
+
+    def test_unbalanced_positions(self):
+        with self.assertRaises(ValueError):
+            simplify_debts({'a': 100, 'b': -99})
+        self.assertEqual(simplify_debts({'a': 0}), [])
+
+class TestSettle(unittest.TestCase):
+    def setUp(self):
+        self.person_manager = PersonManager()
+        self.category_manager = CategoryManager()
+        self.bills = self.category_manager.add_category('Bills', ())
+        self.groceries = self.category_manager.add_category('Groceries', ())
+
+        self.alex = self.person_manager.add_person_by_name('Alex')
+        self.alex_account = self.alex.create_account('Current')
+        self.alex_account.add_income('Salary', 3000, '28')
+        self.alex_account.add_bill('Rent', 800, '1', self.bills)
+        self.alex_account.add_bill('Gym', 40, '5')
+
+        self.sam = self.person_manager.add_person_by_name('Sam')
+        self.sam_account = self.sam.create_account('Current')
+        self.sam_account.add_income('Wages', 1000, '15')
+        self.sam_account.add_bill('Energy', 100, '3', self.bills)
+
+    def get_positions(self, settlement):
+        return {person.get_name(): money.get_minor() for person, money in settlement.get_positions().items()}
+
+    def test_equal_split(self):
+        settlement = settle(self.person_manager)
+        self.assertEqual(self.get_positions(settlement), {'Alex': 37000, 'Sam': -37000})
+        [transfer] = settlement.get_transfers()
+        self.assertIs(transfer.payer, self.sam)
+        self.assertIs(transfer.to_account, self.alex_account)
+        self.assertEqual(transfer.amount.get_minor(), 37000)
+
+    def test_income_split_by_category(self):
+        rules = [SplitRule(method=SplitMethod.INCOME, category=self.bills)]
+        settlement = settle(self.person_manager, rules)
+        # 900 of bills, three quarters owed by Alex; the uncategorised gym is personal.
+        self.assertEqual(self.get_positions(settlement), {'Alex': 12500, 'Sam': -12500})
+
+    def test_unused_category_not_registered(self):
+        ledger = self.person_manager.get_ledger()
+        categories = list(ledger.categories)
+        rules = [SplitRule(category=self.groceries), SplitRule(category=self.bills)]
+        settlement = settle(self.person_manager, rules)
+        self.assertEqual(ledger.categories, categories)
+        self.assertEqual(self.get_positions(settlement), {'Alex': 35000, 'Sam': -35000})
+
+    def test_apply_settles(self):
+        settlement = settle(self.person_manager)
+        [(transfer_out, transfer_in)] = settlement.apply("Bills share", "28")
+        self.assertEqual(self.sam_account.get_transfers_out(), [transfer_out])
+        self.assertEqual(self.alex_account.get_transfers_in(), [transfer_in])
+        self.assertIs(transfer_out.get_target_account(), self.alex_account)
+        self.assertEqual(transfer_in.get_amount().get_minor(), 37000)
+        self.assertEqual(self.sam_account.get_total().get_minor(), 53000)
+
+        settlement = settle(self.person_manager)
+        self.assertEqual(settlement.get_transfers(), [])
+        self.assertEqual(self.get_positions(settlement), {'Alex': 0, 'Sam': 0})
+
+    def test_apply_to_month(self):
+        self.sam_account.add_transactions([(TransactionKind.BILL, 'Takeaway', 6000, '12', 202403)])
+        settlement = settle(self.person_manager, period=202403)
+        self.assertEqual(self.get_positions(settlement), {'Alex': -3000, 'Sam': 3000})
+        [(transfer_out, _)] = settlement.apply()
+        self.assertEqual(transfer_out.get_period(), 202403)
+        self.assertEqual(settle(self.person_manager, period=202403).get_transfers(), [])
+        self.assertEqual(self.get_positions(settle(self.person_manager)), {'Alex': 37000, 'Sam': -37000})
+
+if __name__ == '__main__':
+    unittest.main()
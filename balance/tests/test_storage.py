@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+
+from balance.main.base_classes import CategoryManager, PersonManager
+from balance.main.storage import SqliteStorage
+
+class TestSqliteStorage(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'household.db')
+
+        self.person_manager = PersonManager()
+        self.category_manager = CategoryManager()
+        self.bills = self.category_manager.add_category('Bills', (0.5, 0.5, 0.5))
+        self.alex = self.person_manager.add_person_by_name('Alex')
+        self.current = self.alex.create_account('Current')
+        self.current.add_bill('Rent', 800, '1', self.bills)
+        self.sam = self.person_manager.add_person_by_name('Sam')
+        self.sam.create_account('Saver').add_income('Interest', 5, '1')
+
+        self.storage = SqliteStorage(self.path, self.person_manager, self.category_manager)
+        self.statements = []
+        self.storage.connection.set_trace_callback(self.statements.append)
+
+    def tearDown(self):
+        self.storage.connection.close()
+        self.directory.cleanup()
+
+    def writes(self) -> list[str]:
+        return [statement for statement in self.statements if statement.split()[0] in ('INSERT', 'DELETE', 'UPDATE')]
+
+    def reopen(self) -> SqliteStorage:
+        self.storage.close()
+        self.storage = SqliteStorage(self.path)
+        return self.storage
+
+    def test_flush_without_changes_writes_nothing(self):
+        self.storage.flush()
+        self.assertEqual(self.statements, [])
+
+    def test_rename_writes_one_person(self):
+        self.alex.set_name('Alexandra')
+        self.storage.flush()
+        self.assertEqual(len(self.writes()), 1)
+        self.assertIn('INSERT OR REPLACE INTO people', self.writes()[0])
+
+        person_manager = self.reopen().person_manager
+        self.assertEqual([person.get_name() for person in person_manager.get_people()], ['Alexandra', 'Sam'])
+
+    def test_remove_person_deletes_accounts_and_transactions(self):
+        self.person_manager.remove_person(self.sam)
+        self.storage.flush()
+        self.assertFalse(any('people' in statement or 'categories' in statement
+                             for statement in self.writes() if statement.startswith('INSERT')))
+
+        person_manager = self.reopen().person_manager
+        self.assertEqual([person.get_name() for person in person_manager.get_people()], ['Alex'])
+        self.assertEqual(self.storage.connection.execute("SELECT COUNT(*) FROM accounts").fetchone(), (1,))
+        self.assertEqual(self.storage.connection.execute("SELECT COUNT(*) FROM transactions").fetchone(), (1,))
+
+    def test_category_changes(self):
+        self.bills.set_name('Household bills')
+        self.category_manager.add_category('Leisure', ())
+        self.storage.flush()
+        self.assertEqual(len(self.writes()), 2)
+
+        category_manager = self.reopen().category_manager
+        self.assertEqual([category.get_name() for category in category_manager.get_categories()],
+                         ['Household bills', 'Leisure'])
+        bill, = self.storage.get_bills()
+        self.assertEqual(bill.get_name(), 'Rent')
+
+    def test_compact(self):
+        self.current.add_bill('Phone', 20, '14')
+        self.current.remove_bill(self.current.get_bills()[0])
+        self.person_manager.compact()
+        self.current.get_bills()[0].set_amount(25)
+        self.storage.flush()
+
+        person_manager = self.reopen().person_manager
+        account = person_manager.get_person_by_name('Alex').get_account_by_name('Current')
+        self.assertEqual([(bill.get_name(), bill.get_amount().get_minor()) for bill in account.get_bills()],
+                         [('Phone', 2500)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import threading
+import unittest
+from unittest import mock
+
+try:
+    from PySide6 import QtCore
+    from balance.main import tasks
+except ImportError:
+    QtCore = None
+
+class Recorder():
+    def __init__(self, task):
+        self.events = []
+        task.progress.connect(lambda done, total: self.events.append(('progress', done, total)))
+        task.succeeded.connect(lambda result: self.events.append(('succeeded', result)))
+        task.failed.connect(lambda error: self.events.append(('failed', type(error))))
+        task.cancelled.connect(lambda: self.events.append(('cancelled',)))
+        task.finished.connect(lambda: self.events.append(('finished',)))
+
+@unittest.skipIf(QtCore is None, "PySide6 is not installed")
+class TestTask(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.application = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+    def test_success(self):
+        task = tasks.Task("sum")
+        recorder = Recorder(task)
+        self.assertEqual(task.run(lambda context, values: sum(context.track(values)), ([1, 2, 3],), {}), 6)
+        self.assertEqual(recorder.events, [('succeeded', 6), ('finished',)])
+
+    def test_failure(self):
+        task = tasks.Task("fail")
+        recorder = Recorder(task)
+
+        def fail(context):
+            raise ValueError("bad statement")
+        with self.assertRaises(ValueError):
+            task.run(fail, (), {})
+        self.assertEqual(recorder.events, [('failed', ValueError), ('finished',)])
+
+    def test_cancel_before_start(self):
+        task = tasks.Task("never")
+        recorder = Recorder(task)
+        called = []
+        task.cancel()
+        with self.assertRaises(tasks.TaskCancelled):
+            task.run(lambda context: called.append(True), (), {})
+        self.assertEqual(called, [])
+        self.assertEqual(recorder.events, [('cancelled',), ('finished',)])
+
+    def test_cancel_while_tracking(self):
+        task = tasks.Task("long")
+        recorder = Recorder(task)
+
+        def count(context):
+            for done, _ in enumerate(context.track(range(10000), every=100), 1):
+                if done == 250:
+                    task.cancel()
+        with self.assertRaises(tasks.TaskCancelled):
+            task.run(count, (), {})
+        self.assertEqual(recorder.events[-2:], [('cancelled',), ('finished',)])
+
+    def test_progress_throttled(self):
+        task = tasks.Task("parse")
+        recorder = Recorder(task)
+        with mock.patch.object(tasks, 'PROGRESS_INTERVAL', 10):
+            list(task.context.track(range(5000), total=5000))
+        # The first report and the final one pass; those in between fall within the interval.
+        self.assertEqual(recorder.events, [('progress', 1000, 5000), ('progress', 5000, 5000)])
+
+@unittest.skipIf(QtCore is None, "PySide6 is not installed")
+class TestTaskScheduler(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.application = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+    def setUp(self):
+        self.scheduler = tasks.TaskScheduler(max_workers=1)
+
+    def tearDown(self):
+        self.scheduler.shutdown()
+
+    def test_cancelled_task_never_runs(self):
+        release = threading.Event()
+        called = []
+        first = self.scheduler.submit(lambda context: release.wait(5), name="blocking")
+        second = self.scheduler.submit(lambda context: called.append(True), name="queued")
+        second.cancel()
+        release.set()
+        self.assertTrue(first.result(5))
+        with self.assertRaises(tasks.TaskCancelled):
+            second.result(5)
+        self.assertEqual(called, [])
+        self.assertTrue(second.is_done())
+
+    def test_result(self):
+        task = self.scheduler.submit(lambda context, a, b=0: a + b, 2, b=3, name="add")
+        self.assertEqual(task.result(5), 5)
+        self.assertTrue(task.is_done())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+
+from balance.main.base_classes import Bill, PersonManager
+
+class TestTransactionViews(unittest.TestCase):
+    def setUp(self):
+        self.person_manager = PersonManager()
+        self.account = self.person_manager.add_person_by_name('Alex').create_account('Current')
+        self.rent = self.account.add_bill('Rent', 800, '1')
+        self.phone = self.account.add_bill('Phone', 20, '14')
+
+    def test_views_of_same_row_are_equal(self):
+        ledger = self.person_manager.get_ledger()
+        view = Bill.from_row(ledger, self.rent.get_row())
+        self.assertEqual(view, self.rent)
+        self.assertEqual(hash(view), hash(self.rent))
+        self.assertNotEqual(view, self.phone)
+
+    def test_remove_view_from_getter(self):
+        bill = self.account.get_bills_due(1, 31)[0]
+        self.assertIsNot(bill, self.rent)
+        self.account.remove_bill(bill)
+        self.assertEqual(self.account.get_bills(), [self.phone])
+        self.assertEqual(self.account.get_total().get_minor(), -2000)
+
+    def test_remove_transfer_from_getter(self):
+        saver = self.account.get_account_owner().create_account('Saver')
+        self.account.add_transfer('Savings', 50, '2', saver)
+        self.account.remove_transfer_out(self.account.get_transfers_to(saver)[0])
+        saver.remove_transfer_in(saver.get_transfers_from(self.account)[0])
+        self.assertEqual(self.account.get_transfers_out(), [])
+        self.assertEqual(saver.get_transfers_in(), [])
+        self.assertEqual(saver.get_total().get_minor(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
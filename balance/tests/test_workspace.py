@@ -0,0 +1,72 @@
+import tempfile
+import unittest
+
+from balance.main.workspace import Workspace
+
+class TestWorkspace(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.workspace = Workspace(self.directory.name, capacity=2)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def add_data(self, household, name, amount):
+        bills = household.get_category_manager().add_category('Bills', (1.0, 0.0, 0.0))
+        account = household.get_person_manager().add_person_by_name(name).create_account('Current')
+        account.add_income('Salary', amount, '28')
+        account.add_bill('Rent', 800, '1', bills)
+
+    def test_eviction_round_trip(self):
+        self.add_data(self.workspace.create_household('North'), 'Alex', 2000)
+        self.add_data(self.workspace.create_household('South'), 'Sam', 1500.5)
+        self.workspace.create_household('East')
+        self.assertEqual(self.workspace.get_loaded_names(), ['South', 'East'])
+        self.assertEqual(self.workspace.get_household_names(), ['East', 'North', 'South'])
+
+        north = self.workspace.open_household('North')
+        self.assertEqual(self.workspace.get_loaded_names(), ['East', 'North'])
+        person_manager = north.get_person_manager()
+        account = person_manager.get_person_by_name('Alex').get_account_by_name('Current')
+        self.assertEqual([bill.get_name() for bill in account.get_bills()], ['Rent'])
+        self.assertEqual(account.get_total().get_minor(), 120000)
+        bills = north.get_category_manager().get_category_by_name('Bills')
+        self.assertEqual(person_manager.get_category_total(bills).get_minor(), -80000)
+
+        # Changes made after reloading survive a second eviction.
+        account.add_bill('Phone', 20.25, '14')
+        self.workspace.open_household('South')
+        self.workspace.open_household('East')
+        self.assertNotIn('North', self.workspace.get_loaded_names())
+        account = self.workspace.open_household('North').get_person_manager() \
+            .get_person_by_name('Alex').get_account_by_name('Current')
+        self.assertEqual(account.get_total().get_minor(), 117975)
+
+    def test_idle_households_unloaded(self):
+        workspace = Workspace(self.directory.name, capacity=4, idle_seconds=0)
+        self.add_data(workspace.create_household('North'), 'Alex', 2000)
+        workspace.create_household('South')
+        self.assertEqual(workspace.get_loaded_names(), ['South'])
+        account = workspace.open_household('North').get_person_manager() \
+            .get_person_by_name('Alex').get_account_by_name('Current')
+        self.assertEqual(account.get_total().get_minor(), 120000)
+
+    def test_close_and_remove(self):
+        self.add_data(self.workspace.create_household('North'), 'Alex', 2000)
+        self.workspace.close()
+        self.assertEqual(self.workspace.get_loaded_names(), [])
+
+        reopened = Workspace(self.directory.name)
+        self.assertTrue(reopened.has_household('North'))
+        reopened.remove_household('North')
+        self.assertFalse(reopened.has_household('North'))
+        with self.assertRaises(ValueError):
+            reopened.open_household('North')
+
+    def test_invalid_names(self):
+        for name in ('', '..', 'a/b'):
+            with self.assertRaises(ValueError):
+                self.workspace.create_household(name)
+
+if __name__ == '__main__':
+    unittest.main()